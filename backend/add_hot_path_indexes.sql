@@ -0,0 +1,27 @@
+-- Add indexes for the hot query paths
+-- init_db() creates missing model indexes at startup; this script does the same by hand
+-- Run this migration: sqlite3 football_meme.db < add_hot_path_indexes.sql
+-- PostgreSQL: psql -d trollfb_db -f add_hot_path_indexes.sql
+-- MySQL has no CREATE INDEX IF NOT EXISTS - drop "IF NOT EXISTS" and ignore "Duplicate key name" errors
+
+-- Latest unused news: WHERE is_used = 0 ORDER BY published_at DESC
+CREATE INDEX IF NOT EXISTS ix_news_articles_is_used_published ON news_articles(is_used, published_at);
+-- Trending terms rebuild and story dedup windows
+CREATE INDEX IF NOT EXISTS ix_news_articles_published_at ON news_articles(published_at);
+CREATE INDEX IF NOT EXISTS ix_news_articles_created_at ON news_articles(created_at);
+
+-- auto_post_job: WHERE status = 'scheduled' AND scheduled_time BETWEEN ...
+CREATE INDEX IF NOT EXISTS ix_content_posts_status_scheduled ON content_posts(status, scheduled_time);
+-- Analytics periods and fetch_analytics_job: WHERE status = 'posted' AND posted_time >= ...
+CREATE INDEX IF NOT EXISTS ix_content_posts_status_posted ON content_posts(status, posted_time);
+
+-- Joins on post_id, top performing posts ordered by engagement_rate
+CREATE INDEX IF NOT EXISTS ix_post_analytics_post_id ON post_analytics(post_id);
+CREATE INDEX IF NOT EXISTS ix_post_analytics_engagement_rate ON post_analytics(engagement_rate);
+
+-- Meme library: WHERE status = 'analyzed' ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS ix_meme_templates_status_created ON meme_templates(status, created_at);
+-- Variations of a template, newest first
+CREATE INDEX IF NOT EXISTS ix_meme_variations_template_created ON meme_variations(template_id, created_at);
+
+SELECT 'Migration completed: added hot path indexes' as result;
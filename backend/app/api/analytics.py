@@ -3,14 +3,17 @@ Analytics API Routes
 Get insights and performance metrics
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, case, select
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 
-from app.core.database import get_db, PostAnalytics, ContentPost
+from app.core.database import get_async_read_db, PostAnalytics, ContentPost
+from app.services.engagement_rollups import engagement_rollups
+from app.services.dashboard_snapshots import dashboard_snapshots
 
 router = APIRouter()
 
@@ -37,226 +40,302 @@ class DashboardStats(BaseModel):
     best_post: dict
     recent_posts: List[dict]
 
-@router.get("/dashboard")
-async def get_dashboard_stats(days: int = 7, db: Session = Depends(get_db)):
-    """Get dashboard statistics"""
+def build_dashboard_stats(db: Session, days: int = 7) -> dict:
+    """Compute dashboard statistics (served from a snapshot)"""
 
     cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-    # Get posts in period
-    posts = db.query(ContentPost).filter(
+    in_period = (
         ContentPost.posted_time >= cutoff_date,
         ContentPost.status == "posted"
-    ).all()
-
-    # Get analytics for these posts
-    post_ids = [p.id for p in posts]
+    )
 
-    analytics = db.query(PostAnalytics).filter(
-        PostAnalytics.post_id.in_(post_ids)
-    ).all()
+    total_posts = db.query(func.count(ContentPost.id)).filter(*in_period).scalar()
 
-    # Calculate stats
-    total_reach = sum(a.reach for a in analytics)
-    total_engagement = sum(a.likes + a.comments + a.shares for a in analytics)
-    avg_engagement = sum(a.engagement_rate for a in analytics) / len(analytics) if analytics else 0
+    # Totals over the analytics of posts in the period - one aggregate query
+    total_reach, total_engagement, avg_engagement = db.query(
+        func.coalesce(func.sum(PostAnalytics.reach), 0),
+        func.coalesce(func.sum(PostAnalytics.likes + PostAnalytics.comments + PostAnalytics.shares), 0),
+        func.coalesce(func.avg(PostAnalytics.engagement_rate), 0)
+    ).join(ContentPost, ContentPost.id == PostAnalytics.post_id).filter(*in_period).one()
 
     # Find best post
     best_post = None
-    if analytics:
-        best = max(analytics, key=lambda x: x.engagement_rate)
-        post = db.query(ContentPost).filter(ContentPost.id == best.post_id).first()
+    best = db.query(PostAnalytics, ContentPost.title).join(
+        ContentPost, ContentPost.id == PostAnalytics.post_id
+    ).filter(*in_period).order_by(PostAnalytics.engagement_rate.desc()).first()
+
+    if best:
+        analytics, title = best
         best_post = {
-            "title": post.title,
-            "engagement_rate": best.engagement_rate,
-            "reach": best.reach,
-            "likes": best.likes,
-            "comments": best.comments,
-            "shares": best.shares
+            "title": title,
+            "engagement_rate": analytics.engagement_rate,
+            "reach": analytics.reach,
+            "likes": analytics.likes,
+            "comments": analytics.comments,
+            "shares": analytics.shares
         }
 
-    # Recent posts
-    recent = []
-    for post in posts[-5:]:
-        post_analytics = next((a for a in analytics if a.post_id == post.id), None)
-        recent.append({
+    # Recent posts (oldest first) with their analytics
+    recent_rows = db.query(ContentPost, PostAnalytics.reach, PostAnalytics.engagement_rate).outerjoin(
+        PostAnalytics, PostAnalytics.post_id == ContentPost.id
+    ).filter(*in_period).order_by(ContentPost.posted_time.desc()).limit(5).all()
+
+    recent = [
+        {
             "id": post.id,
             "title": post.title,
             "posted_time": post.posted_time.isoformat() if post.posted_time else None,
-            "reach": post_analytics.reach if post_analytics else 0,
-            "engagement_rate": post_analytics.engagement_rate if post_analytics else 0
-        })
+            "reach": reach or 0,
+            "engagement_rate": engagement_rate or 0
+        }
+        for post, reach, engagement_rate in reversed(recent_rows)
+    ]
 
     return {
-        "total_posts": len(posts),
-        "total_reach": total_reach,
-        "total_engagement": total_engagement,
-        "avg_engagement_rate": avg_engagement,
+        "total_posts": total_posts,
+        "total_reach": int(total_reach),
+        "total_engagement": int(total_engagement),
+        "avg_engagement_rate": float(avg_engagement),
         "best_post": best_post,
         "recent_posts": recent
     }
 
+dashboard_snapshots.register(
+    "analytics.dashboard", build_dashboard_stats,
+    tables=("content_posts", "post_analytics")
+)
+
+@router.get("/dashboard")
+async def get_dashboard_stats(request: Request, days: int = 7, db: AsyncSession = Depends(get_async_read_db)) -> Response:
+    """Get dashboard statistics (supports If-None-Match)"""
+    return await dashboard_snapshots.serve(request, db, "analytics.dashboard", days=days)
+
 @router.get("/post/{post_id}", response_model=AnalyticsResponse)
-async def get_post_analytics(post_id: int, db: Session = Depends(get_db)):
+async def get_post_analytics(post_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Get analytics for specific post"""
 
-    analytics = db.query(PostAnalytics).filter(
-        PostAnalytics.post_id == post_id
-    ).first()
+    analytics = (await db.execute(
+        select(PostAnalytics).where(PostAnalytics.post_id == post_id)
+    )).scalars().first()
 
     if not analytics:
         raise HTTPException(status_code=404, detail="Analytics not found")
 
     return analytics
 
+def _bucket_label(bucket_start: datetime, resolution: str) -> str:
+    return bucket_start.isoformat() if resolution == "hour" else bucket_start.date().isoformat()
+
 @router.get("/trends")
-async def get_engagement_trends(days: int = 30, db: Session = Depends(get_db)):
-    """Get engagement trends over time"""
+async def get_engagement_trends(days: int = 30, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Get engagement trends over time
 
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    Reach and engagement gained per day (per hour for windows up to
+    ANALYTICS_HOURLY_MAX_WINDOW_HOURS), read from the engagement rollups.
+    """
+
+    end_date = datetime.utcnow()
+    cutoff_date = end_date - timedelta(days=days)
 
-    posts = db.query(ContentPost).filter(
+    resolution, points = await db.run_sync(engagement_rollups.series, cutoff_date, end_date)
+
+    # Posts published per bucket
+    in_period = (
         ContentPost.posted_time >= cutoff_date,
         ContentPost.status == "posted"
-    ).order_by(ContentPost.posted_time).all()
-
-    # Group by day
-    daily_stats = {}
+    )
+    if resolution == "day":
+        posted_day = func.date(ContentPost.posted_time)
+        posts_per_bucket = [
+            (str(day), count)
+            for day, count in await db.execute(
+                select(posted_day, func.count(ContentPost.id)).where(*in_period).group_by(posted_day)
+            )
+        ]
+    else:
+        # Short window: few posts, bucket them here instead of per-dialect hour truncation
+        posts_per_bucket = {}
+        for (posted_time,) in await db.execute(select(ContentPost.posted_time).where(*in_period)):
+            label = _bucket_label(posted_time.replace(minute=0, second=0, microsecond=0), resolution)
+            posts_per_bucket[label] = posts_per_bucket.get(label, 0) + 1
+        posts_per_bucket = posts_per_bucket.items()
+
+    trends = {
+        label: {"date": label, "posts": count, "total_reach": 0, "total_impressions": 0, "total_engagement": 0}
+        for label, count in posts_per_bucket
+    }
 
-    for post in posts:
-        day = post.posted_time.date().isoformat()
+    for point in points:
+        label = _bucket_label(point["bucket_start"], resolution)
+        trend = trends.setdefault(label, {"date": label, "posts": 0, "total_reach": 0, "total_impressions": 0, "total_engagement": 0})
+        trend["total_reach"] = point["reach"]
+        trend["total_impressions"] = point["impressions"]
+        trend["total_engagement"] = point["engagement"]
 
-        if day not in daily_stats:
-            daily_stats[day] = {
-                "date": day,
-                "posts": 0,
-                "total_reach": 0,
-                "total_engagement": 0
-            }
+    return {
+        "resolution": resolution,
+        "trends": [trends[label] for label in sorted(trends)]
+    }
 
-        analytics = db.query(PostAnalytics).filter(
-            PostAnalytics.post_id == post.id
-        ).first()
+@router.get("/engagement-series")
+async def get_engagement_series(
+    hours: int = 24,
+    post_id: Optional[int] = None,
+    resolution: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Engagement gained per bucket over the last `hours` (hourly or daily, picked from the window)"""
 
-        daily_stats[day]["posts"] += 1
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(hours=hours)
 
-        if analytics:
-            daily_stats[day]["total_reach"] += analytics.reach
-            daily_stats[day]["total_engagement"] += (
-                analytics.likes + analytics.comments + analytics.shares
-            )
+    try:
+        resolution, points = await db.run_sync(
+            engagement_rollups.series, start_date, end_date, resolution=resolution, post_ids=[post_id] if post_id else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
-        "trends": list(daily_stats.values())
+        "resolution": resolution,
+        "points": [{**point, "bucket_start": point["bucket_start"].isoformat()} for point in points]
     }
 
 @router.get("/top-performing")
-async def get_top_performing(limit: int = 10, db: Session = Depends(get_db)):
+async def get_top_performing(limit: int = 10, db: AsyncSession = Depends(get_async_read_db)):
     """Get top performing posts"""
 
-    analytics = db.query(PostAnalytics).order_by(
-        PostAnalytics.engagement_rate.desc()
-    ).limit(limit).all()
+    rows = await db.execute(
+        select(PostAnalytics, ContentPost).join(
+            ContentPost, ContentPost.id == PostAnalytics.post_id
+        ).order_by(PostAnalytics.engagement_rate.desc()).limit(limit)
+    )
 
-    results = []
-
-    for a in analytics:
-        post = db.query(ContentPost).filter(ContentPost.id == a.post_id).first()
-
-        if post:
-            results.append({
-                "post_id": post.id,
-                "title": post.title,
-                "caption": post.caption[:100],
-                "reach": a.reach,
-                "engagement_rate": a.engagement_rate,
-                "likes": a.likes,
-                "comments": a.comments,
-                "shares": a.shares,
-                "posted_time": post.posted_time.isoformat() if post.posted_time else None
-            })
+    results = [
+        {
+            "post_id": post.id,
+            "title": post.title,
+            "caption": post.caption[:100],
+            "reach": a.reach,
+            "engagement_rate": a.engagement_rate,
+            "likes": a.likes,
+            "comments": a.comments,
+            "shares": a.shares,
+            "posted_time": post.posted_time.isoformat() if post.posted_time else None
+        }
+        for a, post in rows
+    ]
 
     return {"top_posts": results}
 
-@router.get("/overview")
-async def get_analytics_overview(days: int = 30, db: Session = Depends(get_db)):
+def build_analytics_overview(db: Session, days: int = 30) -> dict:
     """
-    Get analytics overview for specified time period
+    Compute the analytics overview for specified time period (served from a snapshot)
+
+    Totals are the reach and engagement gained during the period, read from
+    the daily engagement rollups.
     """
     # Calculate date range
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
 
-    # Get posted content
-    posted_content = db.query(ContentPost).filter(
+    total_posts = db.query(func.count(ContentPost.id)).filter(
         ContentPost.status == "posted",
         ContentPost.posted_time >= start_date
-    ).all()
+    ).scalar()
+
+    # Period totals are the sum of the daily points
+    _, engagement_by_day = engagement_rollups.series(db, start_date, end_date, resolution="day")
+
+    total_reach = sum(point["reach"] for point in engagement_by_day)
+    total_impressions = sum(point["impressions"] for point in engagement_by_day)
+    total_engagement = sum(point["engagement"] for point in engagement_by_day)
+    avg_engagement_rate = (total_engagement / total_impressions * 100) if total_impressions > 0 else 0
+
+    # Top posts by engagement rate in the period (ranked in SQL), recent posts by posted time
+    totals_by_post = engagement_rollups.totals_by_post(db, start_date, end_date, resolution="day", top=10)
+    top_ids = list(totals_by_post)
+
+    recent = db.query(ContentPost).filter(
+        ContentPost.status == "posted",
+        ContentPost.posted_time >= start_date
+    ).order_by(ContentPost.posted_time.desc()).limit(10).all()
+
+    recent_ids = [post.id for post in recent if post.id not in totals_by_post]
+    if recent_ids:
+        totals_by_post.update(engagement_rollups.totals_by_post(db, start_date, end_date, resolution="day", post_ids=recent_ids))
 
-    # Get analytics for these posts
-    post_ids = [post.id for post in posted_content]
+    posts = {post.id: post for post in recent}
+    missing = [post_id for post_id in top_ids if post_id not in posts]
+    if missing:
+        posts.update({post.id: post for post in db.query(ContentPost).filter(ContentPost.id.in_(missing)).all()})
 
-    if not post_ids:
+    def post_summary(post: ContentPost) -> dict:
+        totals = totals_by_post.get(post.id, {})
         return {
-            "total_posts": 0,
-            "total_reach": 0,
-            "total_engagement": 0,
-            "avg_engagement_rate": 0,
-            "top_posts": [],
-            "recent_posts": [],
-            "engagement_by_day": []
+            "id": post.id,
+            "caption": post.caption,
+            "posted_time": post.posted_time.isoformat() if post.posted_time else None,
+            "reach": totals.get("reach", 0),
+            "impressions": totals.get("impressions", 0),
+            "likes": totals.get("likes", 0),
+            "comments": totals.get("comments", 0),
+            "shares": totals.get("shares", 0),
+            "engagement_rate": totals.get("engagement_rate", 0)
         }
 
-    analytics_data = db.query(PostAnalytics).filter(
-        PostAnalytics.post_id.in_(post_ids)
-    ).all()
-
-    # Calculate totals
-    total_posts = len(posted_content)
-    total_reach = sum(a.reach for a in analytics_data)
-    total_engagement = sum(a.likes + a.comments + a.shares for a in analytics_data)
-    avg_engagement_rate = sum(a.engagement_rate for a in analytics_data) / len(analytics_data) if analytics_data else 0
-
-    # Get top performing posts
-    analytics_with_posts = []
-    for analytics in analytics_data:
-        post = next((p for p in posted_content if p.id == analytics.post_id), None)
-        if post:
-            analytics_with_posts.append({
-                "id": post.id,
-                "caption": post.caption,
-                "posted_time": post.posted_time.isoformat() if post.posted_time else None,
-                "reach": analytics.reach,
-                "impressions": analytics.impressions,
-                "likes": analytics.likes,
-                "comments": analytics.comments,
-                "shares": analytics.shares,
-                "engagement_rate": analytics.engagement_rate
-            })
-
-    # Sort by engagement rate
-    top_posts = sorted(analytics_with_posts, key=lambda x: x["engagement_rate"], reverse=True)[:10]
-    recent_posts = sorted(analytics_with_posts, key=lambda x: x["posted_time"] or "", reverse=True)[:10]
-
     return {
         "total_posts": total_posts,
         "total_reach": total_reach,
         "total_engagement": total_engagement,
         "avg_engagement_rate": avg_engagement_rate,
-        "top_posts": top_posts,
-        "recent_posts": recent_posts,
-        "engagement_by_day": []
+        "top_posts": [post_summary(posts[post_id]) for post_id in top_ids if post_id in posts],
+        "recent_posts": [post_summary(post) for post in recent],
+        "engagement_by_day": [
+            {
+                "date": point["bucket_start"].date().isoformat(),
+                "reach": point["reach"],
+                "impressions": point["impressions"],
+                "engagement": point["engagement"]
+            }
+            for point in engagement_by_day
+        ]
     }
 
-@router.get("/content-stats")
-async def get_content_stats(db: Session = Depends(get_db)):
+dashboard_snapshots.register(
+    "analytics.overview", build_analytics_overview,
+    tables=("content_posts", "engagement_daily")
+)
+
+@router.get("/overview")
+async def get_analytics_overview(request: Request, days: int = 30, db: AsyncSession = Depends(get_async_read_db)) -> Response:
+    """Get analytics overview for specified time period (supports If-None-Match)"""
+    return await dashboard_snapshots.serve(request, db, "analytics.overview", days=days)
+
+# Statuses counted by the content stats, and the payload key of each
+CONTENT_STATUS_KEYS = {
+    "draft": "total_drafts",
+    "scheduled": "total_scheduled",
+    "posted": "total_posted",
+    "failed": "total_failed"
+}
+
+def build_content_stats(db: Session) -> dict:
     """
-    Get content statistics by status
+    Compute content statistics by status (served from a snapshot)
     """
-    total_drafts = db.query(ContentPost).filter(ContentPost.status == "draft").count()
-    total_scheduled = db.query(ContentPost).filter(ContentPost.status == "scheduled").count()
-    total_posted = db.query(ContentPost).filter(ContentPost.status == "posted").count()
-    total_failed = db.query(ContentPost).filter(ContentPost.status == "failed").count()
+    def status_count(status: str):
+        return func.coalesce(func.sum(case((ContentPost.status == status, 1), else_=0)), 0)
+
+    # One pass over the table with conditional aggregation
+    total_drafts, total_scheduled, total_posted, total_failed = db.query(
+        status_count("draft"),
+        status_count("scheduled"),
+        status_count("posted"),
+        status_count("failed")
+    ).one()
 
     return {
         "total_drafts": total_drafts,
@@ -264,3 +343,17 @@ async def get_content_stats(db: Session = Depends(get_db)):
         "total_posted": total_posted,
         "total_failed": total_failed
     }
+
+# Status counts follow post changes in place, without a rebuild
+dashboard_snapshots.register(
+    "analytics.content_stats", build_content_stats,
+    tables=("content_posts",),
+    counters={"content_posts": ("status", CONTENT_STATUS_KEYS.get)}
+)
+
+@router.get("/content-stats")
+async def get_content_stats(request: Request, db: AsyncSession = Depends(get_async_read_db)) -> Response:
+    """
+    Get content statistics by status (supports If-None-Match)
+    """
+    return await dashboard_snapshots.serve(request, db, "analytics.content_stats")
@@ -4,16 +4,19 @@ ComfyUI API Endpoints
 Generate meme images for content
 """
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from pathlib import Path
+import json
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.models.content_suggestions import ContentSuggestion
 from app.models.trends import TrendingTopic
 from app.services.comfyui_service import comfyui_service
+from app.services.comfyui_render_queue import comfyui_render_queue
+from app.services.comfyui_tracker import comfyui_tracker
 
 
 router = APIRouter(prefix="/api/comfyui", tags=["ComfyUI"])
@@ -24,6 +27,7 @@ class GenerateImagesRequest(BaseModel):
     content_id: int
     num_variants: int = 4
     selected_styles: Optional[List[str]] = None  # List of style IDs like ["claymation", "pixar"]
+    images_per_style: int = 1  # Rendered together as one batched workflow per style
 
 
 class ImageVariant(BaseModel):
@@ -31,6 +35,7 @@ class ImageVariant(BaseModel):
     filename: str
     url: str
     style: str
+    batch_index: int = 0
 
 
 class GenerateImagesResponse(BaseModel):
@@ -53,7 +58,7 @@ class ComfyUIStatus(BaseModel):
 
 
 @router.get("/status", response_model=ComfyUIStatus)
-async def get_comfyui_status():
+def get_comfyui_status():
     """
     Check if ComfyUI is running
     """
@@ -65,6 +70,32 @@ async def get_comfyui_status():
     )
 
 
+@router.get("/progress")
+async def get_generation_progress(prompt_id: Optional[str] = None):
+    """
+    Progress of queued and recent prompts (from ComfyUI's event stream)
+
+    Per prompt: status (queued / running / success / error), the node
+    executing, its sampler step (value of max) and the nodes finished.
+    mode is "polling" while the event stream is down (progress is then
+    only updated when a prompt finishes).
+    """
+    return comfyui_tracker.get_progress(prompt_id)
+
+
+@router.get("/queue")
+async def get_render_queue():
+    """
+    Render queue in front of ComfyUI
+
+    queued / queued_by_model: renders waiting to be handed to ComfyUI;
+    in_flight: renders ComfyUI has; model_switches / checkpoint_switches:
+    times the next render needed another LoRA or checkpoint; aged_jobs:
+    switches forced by a render waiting longer than COMFYUI_MAX_JOB_DELAY.
+    """
+    return comfyui_render_queue.get_stats()
+
+
 @router.get("/styles", response_model=List[StyleInfo])
 async def get_available_styles():
     """
@@ -81,7 +112,7 @@ async def get_available_styles():
 
 
 @router.post("/generate", response_model=GenerateImagesResponse)
-async def generate_meme_images(
+def generate_meme_images(
     request: GenerateImagesRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
@@ -91,6 +122,7 @@ async def generate_meme_images(
 
     - **content_id**: ID of content suggestion
     - **num_variants**: Number of image variants (default 4)
+    - **images_per_style**: Images per style, rendered as one batch (default 1)
 
     Style variants:
     - Variant 0: Claymation (stop-motion clay style)
@@ -126,7 +158,8 @@ async def generate_meme_images(
             content=content.content,
             keyword=trend_keyword,
             num_variants=request.num_variants,
-            selected_styles=request.selected_styles
+            selected_styles=request.selected_styles,
+            images_per_style=request.images_per_style
         )
 
         # Convert to response format
@@ -135,7 +168,8 @@ async def generate_meme_images(
                 variant_id=r["variant_id"],
                 filename=r["filename"],
                 url=r["url"],
-                style=r["style"]
+                style=r["style"],
+                batch_index=r["batch_index"]
             )
             for r in results
         ]
@@ -158,6 +192,72 @@ async def generate_meme_images(
         )
 
 
+@router.post("/generate-stream")
+def generate_meme_images_stream(
+    request: GenerateImagesRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Generate meme image variants, streaming each one as it finishes
+
+    Newline-delimited JSON: one {"image": {...}} line per finished variant
+    (in completion order), then {"done": true, "count": N}. Variants that
+    fail are left out; the ones that finished are saved on the content.
+    """
+    content = db.query(ContentSuggestion).filter(
+        ContentSuggestion.id == request.content_id
+    ).first()
+
+    if not content:
+        raise HTTPException(status_code=404, detail="Content not found")
+
+    if not comfyui_service.is_comfyui_running():
+        raise HTTPException(
+            status_code=503,
+            detail="ComfyUI is not running. Please start ComfyUI first."
+        )
+
+    trend = db.query(TrendingTopic).filter(TrendingTopic.id == content.trend_id).first()
+    trend_keyword = trend.keyword if trend else "football"
+    content_id, title, text = content.id, content.title, content.content
+
+    def stream():
+        results = []
+
+        for result in comfyui_service.iter_meme_images(
+            title=title,
+            content=text,
+            keyword=trend_keyword,
+            num_variants=request.num_variants,
+            selected_styles=request.selected_styles,
+            images_per_style=request.images_per_style
+        ):
+            results.append(result)
+            image = ImageVariant(
+                variant_id=result["variant_id"],
+                filename=result["filename"],
+                url=result["url"],
+                style=result["style"],
+                batch_index=result["batch_index"]
+            )
+            yield json.dumps({"image": image.model_dump()}) + "\n"
+
+        # The request's session is closed once streaming starts
+        save_db = SessionLocal()
+        try:
+            save_db.query(ContentSuggestion).filter(ContentSuggestion.id == content_id).update(
+                {ContentSuggestion.generated_images: sorted(results, key=lambda r: r["variant_id"])},
+                synchronize_session=False
+            )
+            save_db.commit()
+        finally:
+            save_db.close()
+
+        yield json.dumps({"done": True, "count": len(results)}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.get("/image/{filename}")
 async def get_image(filename: str):
     """
@@ -178,7 +278,7 @@ async def get_image(filename: str):
 
 
 @router.post("/generate-batch")
-async def generate_batch_images(
+def generate_batch_images(
     content_ids: List[int],
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
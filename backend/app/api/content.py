@@ -83,7 +83,7 @@ async def generate_caption(request: CaptionRequest, db: Session = Depends(get_db
         )
 
 @router.post("/create-meme")
-async def create_meme(request: MemeRequest, db: Session = Depends(get_db)):
+def create_meme(request: MemeRequest, db: Session = Depends(get_db)):
     """
     Create meme image with text overlay
     """
@@ -128,7 +128,7 @@ async def create_meme(request: MemeRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Lỗi tạo meme: {str(e)}")
 
 @router.post("/save")
-async def save_content(request: SaveContentRequest, db: Session = Depends(get_db)):
+def save_content(request: SaveContentRequest, db: Session = Depends(get_db)):
     """
     Save content as draft
     """
@@ -168,7 +168,7 @@ async def save_content(request: SaveContentRequest, db: Session = Depends(get_db
         raise HTTPException(status_code=500, detail=f"Lỗi lưu nội dung: {str(e)}")
 
 @router.get("/drafts")
-async def get_drafts(db: Session = Depends(get_db)):
+def get_drafts(db: Session = Depends(get_db)):
     """
     Get all draft contents
     """
@@ -179,7 +179,7 @@ async def get_drafts(db: Session = Depends(get_db)):
     return drafts
 
 @router.get("/scheduled")
-async def get_scheduled_posts(db: Session = Depends(get_db)):
+def get_scheduled_posts(db: Session = Depends(get_db)):
     """
     Get all scheduled posts
     """
@@ -190,7 +190,7 @@ async def get_scheduled_posts(db: Session = Depends(get_db)):
     return scheduled
 
 @router.put("/{post_id}/schedule")
-async def schedule_post(post_id: int, request: ScheduleRequest, db: Session = Depends(get_db)):
+def schedule_post(post_id: int, request: ScheduleRequest, db: Session = Depends(get_db)):
     """
     Schedule a post for future publishing
     """
@@ -224,7 +224,7 @@ async def schedule_post(post_id: int, request: ScheduleRequest, db: Session = De
         raise HTTPException(status_code=500, detail=f"Lỗi lên lịch: {str(e)}")
 
 @router.put("/{post_id}/unschedule")
-async def unschedule_post(post_id: int, db: Session = Depends(get_db)):
+def unschedule_post(post_id: int, db: Session = Depends(get_db)):
     """
     Unschedule a post (move back to draft)
     """
@@ -253,7 +253,7 @@ async def unschedule_post(post_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Lỗi hủy lịch: {str(e)}")
 
 @router.put("/{post_id}")
-async def update_post(post_id: int, request: SaveContentRequest, db: Session = Depends(get_db)):
+def update_post(post_id: int, request: SaveContentRequest, db: Session = Depends(get_db)):
     """
     Update a post (caption, title, etc.)
     """
@@ -281,7 +281,7 @@ async def update_post(post_id: int, request: SaveContentRequest, db: Session = D
         raise HTTPException(status_code=500, detail=f"Lỗi cập nhật bài đăng: {str(e)}")
 
 @router.delete("/{post_id}")
-async def delete_post(post_id: int, db: Session = Depends(get_db)):
+def delete_post(post_id: int, db: Session = Depends(get_db)):
     """
     Delete a post
     """
@@ -2,16 +2,18 @@
 """
 API endpoints for AI Content Suggestions
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_read_db
 from app.models.trends import TrendingTopic
 from app.models.content_suggestions import ContentSuggestion, PublishingSchedule
 from app.services.content_generator_service import content_generator
+from app.services.dashboard_snapshots import dashboard_snapshots
 
 
 router = APIRouter(prefix="/api/content", tags=["content"])
@@ -71,7 +73,7 @@ class ContentStatsResponse(BaseModel):
 
 
 @router.post("/generate", response_model=GenerateContentResponse)
-async def generate_content_for_trend(
+def generate_content_for_trend(
     request: GenerateContentRequest,
     db: Session = Depends(get_db)
 ):
@@ -102,7 +104,7 @@ async def generate_content_for_trend(
 
 
 @router.get("/trend/{trend_id}", response_model=List[ContentSuggestionResponse])
-async def get_content_for_trend(
+def get_content_for_trend(
     trend_id: int,
     status: Optional[str] = None,
     db: Session = Depends(get_db)
@@ -125,7 +127,7 @@ async def get_content_for_trend(
 
 
 @router.get("/{content_id}", response_model=ContentSuggestionResponse)
-async def get_content_by_id(
+def get_content_by_id(
     content_id: int,
     db: Session = Depends(get_db)
 ):
@@ -141,7 +143,7 @@ async def get_content_by_id(
 
 
 @router.put("/{content_id}")
-async def update_content(
+def update_content(
     content_id: int,
     request: UpdateContentRequest,
     db: Session = Depends(get_db)
@@ -171,7 +173,7 @@ async def update_content(
 
 
 @router.delete("/{content_id}")
-async def delete_content(
+def delete_content(
     content_id: int,
     db: Session = Depends(get_db)
 ):
@@ -190,7 +192,7 @@ async def delete_content(
 
 
 @router.post("/approve/{content_id}")
-async def approve_content(
+def approve_content(
     content_id: int,
     db: Session = Depends(get_db)
 ):
@@ -210,7 +212,7 @@ async def approve_content(
 
 
 @router.post("/publish/{content_id}")
-async def publish_content_now(
+def publish_content_now(
     content_id: int,
     platforms: List[str] = Query(default=["facebook"]),
     db: Session = Depends(get_db)
@@ -244,7 +246,7 @@ async def publish_content_now(
 
 
 @router.post("/schedule")
-async def schedule_content(
+def schedule_content(
     request: SchedulePublishRequest,
     db: Session = Depends(get_db)
 ):
@@ -288,10 +290,9 @@ async def schedule_content(
     }
 
 
-@router.get("/stats/overview", response_model=ContentStatsResponse)
-async def get_content_stats(db: Session = Depends(get_db)):
+def build_content_stats(db: Session) -> ContentStatsResponse:
     """
-    Get overall statistics about content suggestions
+    Compute overall statistics about content suggestions (served from a snapshot)
     """
     from sqlalchemy import func
 
@@ -336,8 +337,22 @@ async def get_content_stats(db: Session = Depends(get_db)):
     )
 
 
+dashboard_snapshots.register(
+    "content_suggestions.stats", build_content_stats,
+    tables=("content_suggestions",)
+)
+
+
+@router.get("/stats/overview", response_model=ContentStatsResponse)
+async def get_content_stats(request: Request, db: AsyncSession = Depends(get_async_read_db)) -> Response:
+    """
+    Get overall statistics about content suggestions (supports If-None-Match)
+    """
+    return await dashboard_snapshots.serve(request, db, "content_suggestions.stats")
+
+
 @router.get("/top-performing", response_model=List[ContentSuggestionResponse])
-async def get_top_performing_content(
+def get_top_performing_content(
     limit: int = 10,
     db: Session = Depends(get_db)
 ):
@@ -48,7 +48,7 @@ class MemeTemplateInfo(BaseModel):
 
 
 @router.post("/upload", response_model=MemeUploadResponse)
-async def upload_meme(
+def upload_meme(
     file: UploadFile = File(...),
     caption: str = Form(...),
     context: Optional[str] = Form(None),
@@ -123,7 +123,7 @@ async def upload_meme(
 
 
 @router.post("/generate-variations/{template_id}", response_model=VariationsResponse)
-async def generate_variations(
+def generate_variations(
     template_id: int,
     request: GenerateVariationsRequest,
     db: Session = Depends(get_db)
@@ -195,7 +195,7 @@ async def generate_variations(
 
 
 @router.get("/templates", response_model=List[MemeTemplateInfo])
-async def get_templates(
+def get_templates(
     category: Optional[str] = None,
     limit: int = 50,
     db: Session = Depends(get_db)
@@ -237,7 +237,7 @@ async def get_templates(
 
 
 @router.get("/categories")
-async def get_categories(db: Session = Depends(get_db)):
+def get_categories(db: Session = Depends(get_db)):
     """Get all available meme categories with counts"""
     try:
         # Query distinct categories with counts
@@ -264,7 +264,7 @@ async def get_categories(db: Session = Depends(get_db)):
 
 
 @router.get("/variations/{template_id}")
-async def get_variations(
+def get_variations(
     template_id: int,
     limit: int = 50,
     db: Session = Depends(get_db)
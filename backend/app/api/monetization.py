@@ -36,13 +36,13 @@ class CampaignResponse(BaseModel):
         from_attributes = True
 
 @router.get("/campaigns", response_model=List[CampaignResponse])
-async def get_all_campaigns(db: Session = Depends(get_db)):
+def get_all_campaigns(db: Session = Depends(get_db)):
     """Get all affiliate campaigns"""
     campaigns = db.query(AffiliateCampaign).all()
     return campaigns
 
 @router.get("/campaigns/active", response_model=List[CampaignResponse])
-async def get_active_campaigns(db: Session = Depends(get_db)):
+def get_active_campaigns(db: Session = Depends(get_db)):
     """Get active campaigns"""
     campaigns = db.query(AffiliateCampaign).filter(
         AffiliateCampaign.is_active == True
@@ -50,7 +50,7 @@ async def get_active_campaigns(db: Session = Depends(get_db)):
     return campaigns
 
 @router.post("/campaigns", response_model=CampaignResponse)
-async def create_campaign(campaign: CampaignRequest, db: Session = Depends(get_db)):
+def create_campaign(campaign: CampaignRequest, db: Session = Depends(get_db)):
     """Create new affiliate campaign"""
 
     new_campaign = AffiliateCampaign(
@@ -67,7 +67,7 @@ async def create_campaign(campaign: CampaignRequest, db: Session = Depends(get_d
     return new_campaign
 
 @router.put("/campaigns/{campaign_id}")
-async def update_campaign(
+def update_campaign(
     campaign_id: int,
     is_active: bool = None,
     db: Session = Depends(get_db)
@@ -90,7 +90,7 @@ async def update_campaign(
     return campaign
 
 @router.post("/campaigns/{campaign_id}/click")
-async def track_click(campaign_id: int, db: Session = Depends(get_db)):
+def track_click(campaign_id: int, db: Session = Depends(get_db)):
     """Track affiliate link click"""
 
     campaign = db.query(AffiliateCampaign).filter(
@@ -106,7 +106,7 @@ async def track_click(campaign_id: int, db: Session = Depends(get_db)):
     return {"success": True, "clicks": campaign.clicks}
 
 @router.post("/campaigns/{campaign_id}/conversion")
-async def track_conversion(
+def track_conversion(
     campaign_id: int,
     amount: float,
     db: Session = Depends(get_db)
@@ -132,7 +132,7 @@ async def track_conversion(
     }
 
 @router.get("/revenue/summary")
-async def get_revenue_summary(db: Session = Depends(get_db)):
+def get_revenue_summary(db: Session = Depends(get_db)):
     """Get revenue summary"""
 
     from sqlalchemy import func
@@ -151,7 +151,7 @@ async def get_revenue_summary(db: Session = Depends(get_db)):
     }
 
 @router.delete("/campaigns/{campaign_id}")
-async def delete_campaign(campaign_id: int, db: Session = Depends(get_db)):
+def delete_campaign(campaign_id: int, db: Session = Depends(get_db)):
     """Delete campaign"""
 
     campaign = db.query(AffiliateCampaign).filter(
@@ -3,14 +3,21 @@ News API Routes
 Handle news-related endpoints
 """
 
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.core.database import get_db, NewsArticle
+from app.core.database import get_db, get_async_read_db, NewsArticle
 from app.services.news_service import news_aggregator
+from app.services.feed_cache_service import feed_cache
+from app.services.story_dedup_service import story_deduplicator
+from app.services.ingest_pipeline import feed_pipeline
+from app.services.reddit_ingestor import reddit_ingestor
 
 router = APIRouter()
 
@@ -43,14 +50,14 @@ class TrendingTopic(BaseModel):
 async def get_latest_news(
     limit: int = 20,
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get latest news articles"""
-    news = news_aggregator.get_latest_news(db, limit=limit, category=category)
+    news = await db.run_sync(news_aggregator.get_latest_news, limit=limit, category=category)
     return news
 
 @router.get("/trending", response_model=List[TrendingTopic])
-async def get_trending_topics(
+def get_trending_topics(
     hours: int = 24,
     db: Session = Depends(get_db)
 ):
@@ -64,26 +71,68 @@ async def fetch_news(db: Session = Depends(get_db)):
 
     try:
         # Fetch from all sources (passing db to use dynamic sources from settings)
-        rss_news = await news_aggregator.fetch_rss_feeds(db)
-        reddit_news = await news_aggregator.scrape_reddit_soccer()
-
-        all_news = rss_news + reddit_news
+        # RSS feeds and Reddit listings are fetched concurrently, each saved as it finishes
+        rss_result, reddit_result = await asyncio.gather(
+            news_aggregator.fetch_and_save_rss(db),
+            reddit_ingestor.run()
+        )
 
-        # Save to database
-        saved = news_aggregator.save_to_database(db, all_news)
+        saved = rss_result["saved"] + reddit_result["saved"]
+        fetched = rss_result["fetched"] + reddit_result["fetched"]
 
         return {
             "success": True,
-            "message": f"Fetched {len(all_news)} articles, saved {saved} new ones"
+            "message": f"Fetched {fetched} articles, saved {saved} new ones",
+            "unchanged_sources": rss_result["skipped_sources"]
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/sources/cache")
+def get_feed_cache_stats(db: Session = Depends(get_db)):
+    """Per-source conditional GET cache counters (hits = feed skipped, misses = feed parsed)"""
+    sources = feed_cache.get_stats(db)
+
+    return {
+        "total_hits": sum(s["hits"] for s in sources),
+        "total_misses": sum(s["misses"] for s in sources),
+        "sources": sources
+    }
+
+@router.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """Per-stage ingest timings (fetch / parse / enrich / persist) of the last run and since startup"""
+    return feed_pipeline.get_stats()
+
+@router.get("/{news_id}/sources")
+async def get_story_sources(news_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Other outlets' near-duplicate copies of a news story"""
+    news = await db.get(NewsArticle, news_id)
+
+    if not news:
+        raise HTTPException(status_code=404, detail="News not found")
+
+    members = await db.run_sync(story_deduplicator.get_members, news_id)
+
+    return {
+        "news_id": news_id,
+        "sources": [
+            {
+                "url": m.url,
+                "title": m.title,
+                "source": m.source,
+                "similarity": m.similarity,
+                "created_at": m.created_at.isoformat() if m.created_at else None
+            }
+            for m in members
+        ]
+    }
+
 @router.get("/{news_id}", response_model=NewsResponse)
-async def get_news_by_id(news_id: int, db: Session = Depends(get_db)):
+async def get_news_by_id(news_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Get specific news article"""
-    news = db.query(NewsArticle).filter(NewsArticle.id == news_id).first()
+    news = await db.get(NewsArticle, news_id)
 
     if not news:
         raise HTTPException(status_code=404, detail="News not found")
@@ -94,12 +143,14 @@ async def get_news_by_id(news_id: int, db: Session = Depends(get_db)):
 async def get_news_by_category(
     category: str,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get news by category"""
-    news = db.query(NewsArticle).filter(
-        NewsArticle.category == category,
-        NewsArticle.is_used == False
-    ).order_by(NewsArticle.published_at.desc()).limit(limit).all()
+    news = (await db.execute(
+        select(NewsArticle).where(
+            NewsArticle.category == category,
+            NewsArticle.is_used == False
+        ).order_by(NewsArticle.published_at.desc()).limit(limit)
+    )).scalars().all()
 
     return news
@@ -3,23 +3,36 @@ Scheduler API Routes
 Control automated posting schedule
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
+from typing import Optional
+from sqlalchemy.orm import Session
 
+from app.core.database import get_db
 from app.services.scheduler_service import scheduler_service
+from app.services.feed_poll_planner import feed_poll_planner
+from app.services.scheduler_leader import scheduler_leader
+from app.services.analytics_refresh_planner import analytics_refresh_planner
+from app.core.config import settings
 
 router = APIRouter()
 
 class SchedulerStatus(BaseModel):
     is_running: bool
+    mode: str = "single"  # single | leader
+    leader: Optional[dict] = None  # Lease state in leader mode
     jobs: list
+    sources: list = []  # Adaptive per-source polling state
+    job_stats: dict = {}  # Runs and durations per job
+    analytics_refresh: dict = {}  # Post analytics refresh plans
 
 @router.get("/status", response_model=SchedulerStatus)
-async def get_scheduler_status():
+def get_scheduler_status(db: Session = Depends(get_db)):
     """Get scheduler status"""
     jobs = []
 
-    if scheduler_service.is_running:
+    # Only the worker running jobs has them loaded
+    if scheduler_service.is_leading:
         for job in scheduler_service.scheduler.get_jobs():
             jobs.append({
                 "id": job.id,
@@ -29,7 +42,12 @@ async def get_scheduler_status():
 
     return {
         "is_running": scheduler_service.is_running,
-        "jobs": jobs
+        "mode": settings.SCHEDULER_MODE,
+        "leader": scheduler_leader.get_status() if settings.SCHEDULER_MODE == "leader" else None,
+        "jobs": jobs,
+        "sources": feed_poll_planner.get_status(db),
+        "job_stats": scheduler_service.get_job_stats(),
+        "analytics_refresh": analytics_refresh_planner.get_status(db)
     }
 
 @router.post("/start")
@@ -47,23 +65,23 @@ async def stop_scheduler():
 @router.post("/trigger/news")
 async def trigger_news_fetch():
     """Manually trigger news fetching"""
-    scheduler_service.fetch_news_job()
+    await scheduler_service.run_job("fetch_news_job")
     return {"success": True, "message": "News fetch triggered"}
 
 @router.post("/trigger/post")
 async def trigger_auto_post():
     """Manually trigger auto-posting"""
-    scheduler_service.auto_post_job()
+    await scheduler_service.run_job("auto_post_job")
     return {"success": True, "message": "Auto-post triggered"}
 
 @router.post("/trigger/analytics")
 async def trigger_analytics_fetch():
     """Manually trigger analytics fetching"""
-    scheduler_service.fetch_analytics_job()
+    await scheduler_service.run_job("fetch_analytics_job")
     return {"success": True, "message": "Analytics fetch triggered"}
 
 @router.post("/trigger/daily-plan")
 async def trigger_daily_plan():
     """Manually trigger daily content planning"""
-    scheduler_service.generate_daily_plan()
+    await scheduler_service.run_job("generate_daily_plan")
     return {"success": True, "message": "Daily plan generated"}
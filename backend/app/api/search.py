@@ -0,0 +1,65 @@
+"""
+Search API Routes
+Full-text search over news, content suggestions and meme templates
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from pydantic import BaseModel
+
+from app.core.database import get_read_db, engine
+from app.services.search_service import search_index, SEARCH_SOURCES
+
+router = APIRouter()
+
+# Schemas
+class SearchResult(BaseModel):
+    type: str  # news | suggestion | meme
+    id: int
+    title: Optional[str]
+    excerpt: str
+    url: Optional[str]
+    created_at: Optional[str]
+    score: float
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    next_cursor: Optional[str] = None
+
+@router.get("", response_model=SearchResponse)
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Search news, suggestions and meme templates
+
+    Accents are optional ("doi tuyen" finds "đội tuyển"). Pass the returned
+    next_cursor to get the following page.
+    """
+    if not search_index.available:
+        raise HTTPException(status_code=503, detail="Search index is not available for this database")
+
+    doc_types = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    if doc_types:
+        unknown = [t for t in doc_types if t not in SEARCH_SOURCES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(unknown)}")
+
+    try:
+        return search_index.search(db, q, types=doc_types, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/rebuild")
+def rebuild_search_index():
+    """Drop and rebuild the search index from the source tables"""
+    try:
+        search_index.rebuild(engine)
+        return {"success": True}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -11,6 +11,7 @@ import json
 
 from app.core.database import get_db, AppSettings
 from app.core.config import settings as app_settings
+from app.services.localization_service import localization_service
 
 router = APIRouter()
 
@@ -19,6 +20,8 @@ class SettingsRequest(BaseModel):
     auto_refresh_interval: Optional[int] = None
     manual_mode: Optional[bool] = None
     news_sources: Optional[List[str]] = None
+    vietnamese_keywords: Optional[List[str]] = None
+    international_keywords: Optional[List[str]] = None
 
 class SettingsResponse(BaseModel):
     ollama_model: str
@@ -26,12 +29,24 @@ class SettingsResponse(BaseModel):
     manual_mode: bool
     facebook_connected: bool
     news_sources: List[str]
+    vietnamese_keywords: List[str] = []
+    international_keywords: List[str] = []
 
 def get_setting(db: Session, key: str, default: str = "") -> str:
     """Get a setting value from database"""
     setting = db.query(AppSettings).filter(AppSettings.key == key).first()
     return setting.value if setting else default
 
+def _get_list_setting(db: Session, key: str, default: List[str]) -> List[str]:
+    """Get a JSON list setting from database, falling back to default"""
+    value = get_setting(db, key, "")
+    if value:
+        try:
+            return json.loads(value)
+        except:
+            pass
+    return default
+
 def set_setting(db: Session, key: str, value: str, description: str = ""):
     """Set a setting value in database"""
     setting = db.query(AppSettings).filter(AppSettings.key == key).first()
@@ -43,7 +58,7 @@ def set_setting(db: Session, key: str, value: str, description: str = ""):
     db.commit()
 
 @router.get("", response_model=SettingsResponse)
-async def get_settings(db: Session = Depends(get_db)):
+def get_settings(db: Session = Depends(get_db)):
     """
     Get all application settings
     """
@@ -62,6 +77,10 @@ async def get_settings(db: Session = Depends(get_db)):
     else:
         news_sources = app_settings.NEWS_SOURCES
 
+    # Localization keywords - from database or config
+    vietnamese_keywords = _get_list_setting(db, "vietnamese_keywords", app_settings.VIETNAMESE_KEYWORDS)
+    international_keywords = _get_list_setting(db, "international_keywords", app_settings.INTERNATIONAL_KEYWORDS)
+
     # Check Facebook connection
     facebook_connected = bool(app_settings.FB_PAGE_ACCESS_TOKEN)
 
@@ -70,11 +89,13 @@ async def get_settings(db: Session = Depends(get_db)):
         auto_refresh_interval=auto_refresh_interval,
         manual_mode=manual_mode,
         facebook_connected=facebook_connected,
-        news_sources=news_sources
+        news_sources=news_sources,
+        vietnamese_keywords=vietnamese_keywords,
+        international_keywords=international_keywords
     )
 
 @router.put("")
-async def update_settings(request: SettingsRequest, db: Session = Depends(get_db)):
+def update_settings(request: SettingsRequest, db: Session = Depends(get_db)):
     """
     Update application settings
     """
@@ -91,4 +112,14 @@ async def update_settings(request: SettingsRequest, db: Session = Depends(get_db
     if request.news_sources is not None:
         set_setting(db, "news_sources", json.dumps(request.news_sources), "News sources list")
 
+    if request.vietnamese_keywords is not None:
+        set_setting(db, "vietnamese_keywords", json.dumps(request.vietnamese_keywords, ensure_ascii=False), "Vietnamese content keywords")
+
+    if request.international_keywords is not None:
+        set_setting(db, "international_keywords", json.dumps(request.international_keywords, ensure_ascii=False), "International content keywords")
+
+    if request.vietnamese_keywords is not None or request.international_keywords is not None:
+        # Keyword matcher recompiles on next use
+        localization_service.set_keywords(request.vietnamese_keywords, request.international_keywords)
+
     return {"success": True, "message": "Cài đặt đã được cập nhật"}
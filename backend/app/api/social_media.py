@@ -25,25 +25,25 @@ class PhotoPostRequest(BaseModel):
     caption: str
 
 @router.get("/test-connection")
-async def test_facebook_connection():
+def test_facebook_connection():
     """Test Facebook API connection"""
     result = facebook_service.test_connection()
     return result
 
 @router.post("/post/text")
-async def post_text(request: TextPostRequest):
+def post_text(request: TextPostRequest):
     """Post text-only status"""
     result = facebook_service.post_text(request.message)
     return result
 
 @router.post("/post/photo")
-async def post_photo(request: PhotoPostRequest):
+def post_photo(request: PhotoPostRequest):
     """Post photo with caption"""
     result = facebook_service.post_photo(request.image_path, request.caption)
     return result
 
 @router.post("/post/from-content")
-async def post_from_content(request: PostRequest, db: Session = Depends(get_db)):
+def post_from_content(request: PostRequest, db: Session = Depends(get_db)):
     """Post content from database"""
 
     post = db.query(ContentPost).filter(ContentPost.id == request.post_id).first()
@@ -70,25 +70,25 @@ async def post_from_content(request: PostRequest, db: Session = Depends(get_db))
     return result
 
 @router.get("/posts/recent")
-async def get_recent_facebook_posts(limit: int = 10):
+def get_recent_facebook_posts(limit: int = 10):
     """Get recent posts from Facebook page"""
     posts = facebook_service.get_recent_posts(limit=limit)
     return {"posts": posts}
 
 @router.get("/insights/{post_id}")
-async def get_post_insights(post_id: str):
+def get_post_insights(post_id: str):
     """Get insights for Facebook post"""
     insights = facebook_service.get_post_insights(post_id)
     return insights
 
 @router.get("/page-insights")
-async def get_page_insights():
+def get_page_insights():
     """Get page-level insights"""
     insights = facebook_service.get_page_insights()
     return insights
 
 @router.delete("/post/{post_id}")
-async def delete_facebook_post(post_id: str):
+def delete_facebook_post(post_id: str):
     """Delete post from Facebook"""
     result = facebook_service.delete_post(post_id)
     return result
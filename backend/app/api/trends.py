@@ -3,15 +3,17 @@ Trends API Routes
 Handle trend detection and viral prediction endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_read_db
 from app.models.trends import TrendingTopic, TrendAlert
 from app.services.trend_detector_service import trend_detector
+from app.services.dashboard_snapshots import dashboard_snapshots
 
 router = APIRouter()
 
@@ -59,7 +61,7 @@ class TrendAlertResponse(BaseModel):
 
 
 @router.get("/trending", response_model=List[TrendResponse])
-async def get_trending_keywords(
+def get_trending_keywords(
     limit: int = 10,
     status: Optional[str] = None,
     db: Session = Depends(get_db)
@@ -81,7 +83,7 @@ async def get_trending_keywords(
 
 
 @router.get("/trending/{keyword}", response_model=TrendResponse)
-async def get_trend_detail(
+def get_trend_detail(
     keyword: str,
     db: Session = Depends(get_db)
 ):
@@ -142,7 +144,7 @@ async def predict_viral_potential(
 
 
 @router.get("/alerts", response_model=List[TrendAlertResponse])
-async def get_trend_alerts(
+def get_trend_alerts(
     unread_only: bool = False,
     limit: int = 20,
     db: Session = Depends(get_db)
@@ -164,7 +166,7 @@ async def get_trend_alerts(
 
 
 @router.patch("/alerts/{alert_id}/read")
-async def mark_alert_as_read(
+def mark_alert_as_read(
     alert_id: int,
     db: Session = Depends(get_db)
 ):
@@ -182,10 +184,9 @@ async def mark_alert_as_read(
     return {"status": "success", "message": "Alert marked as read"}
 
 
-@router.get("/stats")
-async def get_trend_stats(db: Session = Depends(get_db)):
+def build_trend_stats(db: Session) -> dict:
     """
-    Get overall trend statistics
+    Compute overall trend statistics (served from a snapshot)
     """
     from sqlalchemy import func
 
@@ -216,8 +217,22 @@ async def get_trend_stats(db: Session = Depends(get_db)):
     }
 
 
+dashboard_snapshots.register(
+    "trends.stats", build_trend_stats,
+    tables=("trending_topics", "trend_alerts")
+)
+
+
+@router.get("/stats")
+async def get_trend_stats(request: Request, db: AsyncSession = Depends(get_async_read_db)) -> Response:
+    """
+    Get overall trend statistics (supports If-None-Match)
+    """
+    return await dashboard_snapshots.serve(request, db, "trends.stats")
+
+
 @router.post("/should-create/{keyword}")
-async def check_should_create_content(
+def check_should_create_content(
     keyword: str,
     db: Session = Depends(get_db)
 ):
@@ -48,7 +48,7 @@ class VideoMemeResponse(BaseModel):
     status: str = "processing"  # processing, completed, failed
 
 @router.post("/create", response_model=VideoMemeResponse)
-async def create_video_meme(
+def create_video_meme(
     request: VideoMemeRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
@@ -91,7 +91,7 @@ async def create_video_meme(
         raise HTTPException(status_code=500, detail=f"Lỗi tạo video meme: {str(e)}")
 
 @router.post("/create-simple", response_model=VideoMemeResponse)
-async def create_simple_video_meme(
+def create_simple_video_meme(
     request: SimpleVideoMemeRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
@@ -20,6 +20,17 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./football_app.db"
 
+    # SQLite: WAL journaling and a tuned page cache, so API reads do not wait for ingestion commits
+    SQLITE_PERFORMANCE_MODE: bool = True
+    SQLITE_CACHE_SIZE_KB: int = 65536  # page cache per connection
+    SQLITE_MMAP_SIZE: int = 268435456  # bytes of the file read through mmap (256 MB)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # wait this long for the write lock instead of failing
+    SQLITE_READ_POOL_SIZE: int = 8  # read-only connections for API reads
+
+    # Background writes go through one writer thread, several jobs per transaction
+    DB_WRITER_BATCH_SIZE: int = 50  # jobs per transaction
+    DB_WRITER_BATCH_WAIT_MS: int = 20  # how long a batch waits for more jobs
+
     # AI Configuration - Ollama or OpenAI
     USE_OLLAMA: bool = True  # True = Ollama (local), False = OpenAI (cloud)
     OLLAMA_BASE_URL: str = "http://localhost:11434"
@@ -32,6 +43,30 @@ class Settings(BaseSettings):
     # Facebook
     FB_PAGE_ACCESS_TOKEN: str = ""
     FB_PAGE_ID: str = ""
+    FB_GRAPH_URL: str = "https://graph.facebook.com/v18.0"
+    FB_BATCH_SIZE: int = 50  # sub-requests per Graph API batch call (API max)
+    FB_BATCH_CONCURRENCY: int = 4  # batch calls in flight
+    FB_BATCH_RETRIES: int = 3  # retries per batch on errors / rate limits
+    FB_REQUEST_TIMEOUT: float = 30.0  # seconds
+    FB_RATE_LIMIT_THRESHOLD: int = 90  # % of app usage (X-App-Usage) at which to back off
+
+    # Post analytics refresh: interval by post age, stretched while metrics stay flat
+    ANALYTICS_REFRESH_TICK: int = 5  # minutes between checks for posts that are due
+    ANALYTICS_REFRESH_TIERS: List[List[int]] = [[2, 10], [24, 60], [168, 1440]]  # [max age hours, interval minutes]
+    ANALYTICS_STABLE_CHANGE: float = 0.02  # relative change below which a refresh counts as flat
+    ANALYTICS_STABLE_REFRESHES: int = 2  # flat refreshes in a row that end refreshing...
+    ANALYTICS_STOP_AFTER_HOURS: int = 24  # ...once the post is at least this old
+
+    # Engagement time series: snapshots are rolled up hourly and daily, then compacted
+    ANALYTICS_ROLLUP_INTERVAL: int = 10  # minutes
+    ANALYTICS_RAW_RETENTION_DAYS: int = 14  # keep above the last refresh tier (7 days)
+    ANALYTICS_HOURLY_RETENTION_DAYS: int = 90  # daily rollups are kept forever
+    ANALYTICS_HOURLY_MAX_WINDOW_HOURS: int = 72  # longer windows are served from the daily table
+
+    # Dashboard snapshots: precomputed responses, updated when their source tables change
+    DASHBOARD_SNAPSHOT_MAX_AGE: int = 300  # seconds - full rebuild at least this often (sliding windows, outside writes)
+    DASHBOARD_SNAPSHOT_MAX_STALENESS: int = 30  # seconds a stale snapshot may still be served while it rebuilds
+    DASHBOARD_SNAPSHOT_MEMORY_TTL: int = 5  # seconds before a worker re-reads a snapshot row (changes by other workers)
 
     # Twitter/X.com - NEW INTEGRATION
     TWITTER_ENABLED: bool = False  # Set True when ready
@@ -84,10 +119,52 @@ class Settings(BaseSettings):
         "man united", "liverpool", "arsenal", "real madrid", "barcelona"
     ]
 
+    # News fetching - concurrent RSS ingestion
+    NEWS_FETCH_TIMEOUT: float = 15.0  # seconds per source (connect + download)
+    NEWS_FETCH_CONCURRENCY: int = 8  # max sources downloaded at the same time
+    NEWS_PARSE_WORKERS: int = 4  # worker threads for feed parsing
+    NEWS_ENRICH_PROCESSES: int = 2  # worker processes for entry enrichment (0 = enrich in the parse threads)
+    NEWS_PIPELINE_QUEUE_SIZE: int = 16  # max feeds waiting between two ingest stages
+    NEWS_USER_AGENT: str = "FootballMemeBot/1.0"
+
+    # Near-duplicate story detection (MinHash + LSH over title/description)
+    NEWS_DEDUP_ENABLED: bool = True
+    NEWS_DEDUP_THRESHOLD: float = 0.7  # Estimated Jaccard similarity to join a story cluster
+    NEWS_DEDUP_NUM_PERM: int = 64  # MinHash signature length
+    NEWS_DEDUP_BANDS: int = 16  # LSH bands (NUM_PERM must be divisible by BANDS)
+    NEWS_DEDUP_WINDOW_HOURS: int = 72  # Only compare against recent stories
+    NEWS_DEDUP_INDEX_PATH: str = "./database/story_lsh_index.pkl"
+    NEWS_DEDUP_SAVE_INTERVAL: int = 300  # seconds between index snapshots (newer articles are re-read on load)
+
+    # Reddit ingestion (public JSON listings, incremental per listing)
+    REDDIT_BASE_URL: str = "https://www.reddit.com"
+    REDDIT_SUBREDDIT: str = "soccer"
+    REDDIT_LISTINGS: List[str] = ["new", "hot", "top"]
+    REDDIT_PAGE_SIZE: int = 100  # posts per request (Reddit max)
+    REDDIT_MAX_PAGES: int = 5  # pages per listing per run - the rest is picked up next run
+    REDDIT_TOP_WINDOW: str = "day"
+    REDDIT_MAX_RATE_WAIT: float = 60.0  # seconds - longer rate-limit resets end the run early
+    REDDIT_FETCH_INTERVAL: int = 10  # minutes
+
+    # Trending topics (hourly term counters)
+    TRENDING_TERMS_RETENTION_DAYS: int = 30
+
     # Scheduler Settings
-    NEWS_FETCH_INTERVAL: int = 30  # minutes
+    NEWS_FETCH_INTERVAL: int = 30  # minutes (starting interval for each news source)
+
+    # Adaptive per-source polling
+    NEWS_POLL_TICK: int = 1  # minutes between checks for sources that are due
+    NEWS_POLL_MIN_INTERVAL: int = 5  # minutes - floor for busy feeds
+    NEWS_POLL_MAX_INTERVAL: int = 240  # minutes - ceiling for idle/failing feeds
     AUTO_POST_TIMES: List[str] = ["08:00", "12:00", "17:00", "20:00", "22:00"]
 
+    # Scheduler across workers: "leader" keeps jobs in the database and lets only the
+    # worker holding the lease run them; "single" runs in-memory jobs in every process
+    SCHEDULER_MODE: str = "leader"
+    SCHEDULER_LEASE_SECONDS: int = 15  # a dead leader is replaced after this long
+    SCHEDULER_HEARTBEAT_SECONDS: int = 5  # lease renewal / takeover check interval
+    SCHEDULER_MISFIRE_GRACE: int = 300  # seconds - jobs missed during a failover still run
+
     # Upload Settings
     UPLOAD_DIR: str = "./uploads"
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
@@ -95,6 +172,12 @@ class Settings(BaseSettings):
     # ComfyUI Settings
     COMFYUI_URL: str = "http://127.0.0.1:8188"
     COMFYUI_PATH: str = "D:/1.AI/3.projects/AI_SDXL/ComfyUI"
+    COMFYUI_VARIANT_TIMEOUT: int = 60  # seconds of render time allowed per queued variant
+    COMFYUI_POLL_INTERVAL: float = 1.0  # seconds between history checks while the event socket is down
+    COMFYUI_WS_RECONNECT_SECONDS: int = 2  # first retry delay after the event socket drops
+    COMFYUI_MAX_IN_FLIGHT: int = 2  # prompts handed to ComfyUI at a time; the rest wait in the render queue to be grouped by model
+    COMFYUI_MAX_JOB_DELAY: int = 120  # seconds a render may be passed over for jobs on the loaded model
+    COMFYUI_MAX_BATCH_SIZE: int = 4  # most images of one style rendered in a single latent batch (VRAM bound)
 
     # Video Meme Models Configuration - SDXL
     VIDEO_MEME_CHECKPOINT: str = "RealCartoonXL.safetensors"  # SDXL checkpoint
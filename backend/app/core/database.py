@@ -3,19 +3,107 @@ Database Configuration and Models
 SQLAlchemy setup with SQLite
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, Float
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Boolean, Text, Float, UniqueConstraint, Index
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
+import importlib.util
 from .config import settings
 
+def _sqlite_connect(query_only: bool = False, autocommit: bool = False):
+    """Connection setup for the SQLite engines"""
+    def on_connect(dbapi_connection, connection_record):
+        if autocommit:
+            # The engine's "begin" hook starts transactions instead of the driver (savepoints need this)
+            dbapi_connection.isolation_level = None
+
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}")
+
+        if settings.SQLITE_PERFORMANCE_MODE:
+            # Readers never block the writer (and the other way round) in WAL mode;
+            # NORMAL only syncs at checkpoints, which WAL keeps safe against corruption
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = NORMAL")
+            cursor.execute(f"PRAGMA cache_size = -{settings.SQLITE_CACHE_SIZE_KB}")
+            cursor.execute(f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}")
+            cursor.execute("PRAGMA temp_store = MEMORY")
+
+        if query_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+    return on_connect
+
+# asyncio drivers for the async engine, by backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+database_url = make_url(settings.DATABASE_URL)
+backend = database_url.get_backend_name()
+async_driver = ASYNC_DRIVERS.get(backend)
+if async_driver and importlib.util.find_spec(async_driver) is None:
+    print(f"WARNING: {async_driver} not installed. Async endpoints will read through the thread pool.")
+    async_driver = None
+is_sqlite = backend == "sqlite"
+is_file_sqlite = is_sqlite and database_url.database not in (None, "", ":memory:")
+
+def _create_async_read_engine(**kwargs):
+    """Async engine for API reads, or None without an asyncio driver for the backend"""
+    if not async_driver:
+        return None
+    return create_async_engine(database_url.set(drivername=f"{backend}+{async_driver}"), **kwargs)
+
 # Create engine
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+    connect_args={"check_same_thread": False} if is_sqlite else {}  # Needed for SQLite
 )
 
+if is_file_sqlite:
+    event.listen(engine, "connect", _sqlite_connect())
+
+    # Read-only pool for API reads
+    read_engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.SQLITE_READ_POOL_SIZE
+    )
+    event.listen(read_engine, "connect", _sqlite_connect(query_only=True))
+
+    # One connection for the writer queue; BEGIN IMMEDIATE takes the write lock up front,
+    # so a batch waits for it once instead of failing half way through
+    write_engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0
+    )
+    event.listen(write_engine, "connect", _sqlite_connect(autocommit=True))
+    event.listen(write_engine, "begin", lambda conn: conn.exec_driver_sql("BEGIN IMMEDIATE"))
+
+    # Read-only pool for async endpoints: queries run on aiosqlite's thread, off the event loop
+    # (aiosqlite defaults to a new connection per checkout)
+    async_read_engine = _create_async_read_engine(
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.SQLITE_READ_POOL_SIZE
+    )
+    if async_read_engine is not None:
+        event.listen(async_read_engine.sync_engine, "connect", _sqlite_connect(query_only=True))
+else:
+    read_engine = engine
+    write_engine = engine
+    async_read_engine = _create_async_read_engine()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = (
+    async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+    if async_read_engine is not None else None
+)
 Base = declarative_base()
 
 # Database Models
@@ -23,6 +111,10 @@ Base = declarative_base()
 class NewsArticle(Base):
     """News articles from various sources"""
     __tablename__ = "news_articles"
+    __table_args__ = (
+        # Latest unused news: WHERE is_used = 0 ORDER BY published_at DESC
+        Index("ix_news_articles_is_used_published", "is_used", "published_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -30,19 +122,46 @@ class NewsArticle(Base):
     url = Column(String, unique=True)
     source = Column(String)
     image_url = Column(String)
-    published_at = Column(DateTime)
+    published_at = Column(DateTime, index=True)
     category = Column(String)  # transfer, match_result, drama, injury, etc.
     is_used = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     # Vietnamese localization fields
     content_category = Column(String)  # vietnamese | international | mixed | general
     vn_angle = Column(Text)  # Vietnamese perspective/commentary
     hashtags = Column(Text)  # JSON array of hashtags
 
+class NewsStoryMember(Base):
+    """Near-duplicate copies of a story, attached to the canonical NewsArticle"""
+    __tablename__ = "news_story_members"
+
+    id = Column(Integer, primary_key=True, index=True)
+    article_id = Column(Integer, nullable=False, index=True)  # Canonical news_articles.id
+    url = Column(String, unique=True)
+    title = Column(String)
+    source = Column(String)
+    similarity = Column(Float)  # Estimated Jaccard similarity to the canonical article
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class TrendingTermBucket(Base):
+    """Hourly counts of news title terms, updated at ingestion for trending topics"""
+    __tablename__ = "trending_term_buckets"
+    __table_args__ = (UniqueConstraint("bucket_start", "term"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime, nullable=False, index=True)  # Hour (UTC) of published_at
+    term = Column(String, nullable=False)
+    count = Column(Integer, default=0)
+
 class ContentPost(Base):
     """Generated content posts"""
     __tablename__ = "content_posts"
+    __table_args__ = (
+        # Auto-post window and analytics periods filter on status plus a time
+        Index("ix_content_posts_status_scheduled", "status", "scheduled_time"),
+        Index("ix_content_posts_status_posted", "status", "posted_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String)
@@ -70,7 +189,7 @@ class PostAnalytics(Base):
     __tablename__ = "post_analytics"
 
     id = Column(Integer, primary_key=True, index=True)
-    post_id = Column(Integer, nullable=False)
+    post_id = Column(Integer, nullable=False, index=True)
     platform = Column(String)  # facebook | twitter
 
     # Facebook metrics
@@ -89,9 +208,82 @@ class PostAnalytics(Base):
     quotes = Column(Integer, default=0)
     replies = Column(Integer, default=0)
 
-    engagement_rate = Column(Float, default=0.0)
+    engagement_rate = Column(Float, default=0.0, index=True)
     fetched_at = Column(DateTime, default=datetime.utcnow)
 
+class PostAnalyticsSnapshot(Base):
+    """Facebook metrics of a post at one refresh (time series; PostAnalytics holds the latest values)"""
+    __tablename__ = "post_analytics_snapshots"
+    __table_args__ = (Index("ix_post_analytics_snapshots_post_captured", "post_id", "captured_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, nullable=False)
+    platform = Column(String, default="facebook")
+    captured_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    impressions = Column(Integer, default=0)
+    reach = Column(Integer, default=0)
+    likes = Column(Integer, default=0)
+    comments = Column(Integer, default=0)
+    shares = Column(Integer, default=0)
+    engagement_rate = Column(Float, default=0.0)
+
+    # Change since the post's previous snapshot (the first snapshot holds the totals so far)
+    delta_impressions = Column(Integer, default=0)
+    delta_reach = Column(Integer, default=0)
+    delta_likes = Column(Integer, default=0)
+    delta_comments = Column(Integer, default=0)
+    delta_shares = Column(Integer, default=0)
+
+class EngagementHourly(Base):
+    """Per-post metric deltas summed per hour (rolled up from snapshots)"""
+    __tablename__ = "engagement_hourly"
+    __table_args__ = (UniqueConstraint("post_id", "platform", "bucket_start", name="uq_engagement_hourly_bucket"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, nullable=False)
+    platform = Column(String, nullable=False)
+    bucket_start = Column(DateTime, nullable=False, index=True)  # Hour (UTC)
+
+    impressions = Column(Integer, default=0)
+    reach = Column(Integer, default=0)
+    likes = Column(Integer, default=0)
+    comments = Column(Integer, default=0)
+    shares = Column(Integer, default=0)
+    samples = Column(Integer, default=0)  # Snapshots folded in
+
+class EngagementDaily(Base):
+    """Per-post metric deltas summed per day (rolled up from the hourly table)"""
+    __tablename__ = "engagement_daily"
+    __table_args__ = (UniqueConstraint("post_id", "platform", "bucket_start", name="uq_engagement_daily_bucket"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, nullable=False)
+    platform = Column(String, nullable=False)
+    bucket_start = Column(DateTime, nullable=False, index=True)  # Day (UTC)
+
+    impressions = Column(Integer, default=0)
+    reach = Column(Integer, default=0)
+    likes = Column(Integer, default=0)
+    comments = Column(Integer, default=0)
+    shares = Column(Integer, default=0)
+    samples = Column(Integer, default=0)
+
+class PostRefreshPlan(Base):
+    """When a posted item's analytics are refreshed next"""
+    __tablename__ = "post_refresh_plans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, unique=True, nullable=False)
+
+    interval_minutes = Column(Float)  # Current refresh interval
+    next_refresh_at = Column(DateTime, index=True)
+    last_refreshed_at = Column(DateTime)
+
+    stable_refreshes = Column(Integer, default=0)  # Refreshes in a row with (almost) no change
+    consecutive_failures = Column(Integer, default=0)
+    is_done = Column(Boolean, default=False)  # Metrics have flat-lined - no more refreshes
+
 class ContentTemplate(Base):
     """Meme templates and styles"""
     __tablename__ = "content_templates"
@@ -130,17 +322,88 @@ class AppSettings(Base):
     description = Column(String)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class SchedulerLease(Base):
+    """Leader lock: the worker holding an unexpired lease runs the scheduled jobs"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)  # host:pid:token of the worker
+    acquired_at = Column(DateTime, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+class DashboardSnapshot(Base):
+    """Precomputed dashboard response, one row per endpoint and parameters"""
+    __tablename__ = "dashboard_snapshots"
+
+    key = Column(String, primary_key=True)  # kind:params, e.g. analytics.dashboard:days=7
+    kind = Column(String, nullable=False, index=True)
+    payload = Column(Text, nullable=False)  # JSON response body
+    etag = Column(String, nullable=False)
+    version = Column(Integer, nullable=False, default=0)  # bumped on every write
+    computed_at = Column(DateTime, nullable=False)  # last full rebuild
+    changed_at = Column(DateTime)  # last change to a source table
+    stale_since = Column(DateTime)  # set by changes that could not be applied in place
+
+class FeedCacheEntry(Base):
+    """Conditional GET validators and cache counters per news source"""
+    __tablename__ = "feed_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_url = Column(String, unique=True, nullable=False)
+
+    # Validators from the last full download
+    etag = Column(String)
+    last_modified = Column(String)
+    content_hash = Column(String)  # sha256 of the last parsed body
+
+    # Counters
+    hits = Column(Integer, default=0)  # 304 or identical body - parsing skipped
+    misses = Column(Integer, default=0)  # changed body - parsed and saved
+    bytes_downloaded = Column(Integer, default=0)
+
+    last_status = Column(Integer)  # HTTP status of the last poll
+    last_checked_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class FeedPollState(Base):
+    """Adaptive polling state per news source"""
+    __tablename__ = "feed_poll_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_url = Column(String, unique=True, nullable=False)
+
+    interval_minutes = Column(Float)  # Current polling interval
+    next_poll_at = Column(DateTime)
+    last_polled_at = Column(DateTime)
+
+    # Learned publish rate
+    last_item_at = Column(DateTime)  # Newest published_at seen so far
+    avg_item_gap_minutes = Column(Float)  # Moving average gap between new items
+
+    consecutive_failures = Column(Integer, default=0)
+    consecutive_idle = Column(Integer, default=0)  # Polls without new items
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 def init_db():
     """Initialize database tables"""
     import os
 
     # Import all models here to avoid circular imports
-    from app.models import meme_templates  # noqa
+    from app.models import meme_templates, trends, content_suggestions  # noqa
+    from app.services.search_service import search_index
 
     db_path = settings.DATABASE_URL.replace("sqlite:///", "")
     abs_path = os.path.abspath(db_path)
     print(f"Database path: {abs_path}")
     Base.metadata.create_all(bind=engine)
+
+    # create_all skips the indexes of tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    search_index.install(engine)
     print("Database initialized successfully")
 
 def get_db():
@@ -150,3 +413,47 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    """Get a read-only database session (for endpoints that only read)"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+class ThreadedReadSession:
+    """
+    The AsyncSession calls the async endpoints use, on a sync read session
+
+    Used when the backend's asyncio driver is not installed: each call runs
+    in the thread pool instead of on the event loop.
+    """
+
+    def __init__(self, db):
+        self.sync_session = db
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+async def get_async_read_db():
+    """Get a read-only async database session (for async endpoints that only read)"""
+    if AsyncReadSessionLocal is None:
+        db = ThreadedReadSession(ReadSessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
+        return
+
+    async with AsyncReadSessionLocal() as db:
+        yield db
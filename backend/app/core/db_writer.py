@@ -0,0 +1,179 @@
+"""
+Database Writer
+Single writer thread for background jobs: queued write jobs are applied a batch per transaction
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, write_engine
+
+# Session.info key: callbacks a batch runs once its transaction has committed
+AFTER_BATCH_COMMIT = "db_writer.after_batch_commit"
+
+
+class DatabaseWriter:
+    """
+    Serialize background writes through one connection
+
+    Jobs are callables fn(db) that write through the session they are
+    given. The writer thread takes up to DB_WRITER_BATCH_SIZE queued jobs
+    (waiting DB_WRITER_BATCH_WAIT_MS for more) and runs them in one database
+    transaction, each job in its own savepoint: a job that fails or rolls
+    back only undoes its own writes, and db.commit() inside a job just ends
+    its savepoint. The batch commits once, so ingestion, analytics and
+    rollups hold the SQLite write lock once per batch instead of once per
+    commit, and never compete with each other for it.
+
+    Side effects of a commit outside the database (in-memory indexes, caches)
+    must wait for the batch: register them with after_commit().
+
+    A job must not open another write session (it would wait for the lock
+    its own batch holds).
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "jobs": 0, "failed_jobs": 0, "max_batch": 0}
+
+    def submit(self, fn: Callable[[Session], Any]) -> Future:
+        """Queue a write job; the future resolves once its batch is committed"""
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((future, fn))
+        return future
+
+    async def run(self, fn: Callable[[Session], Any]) -> Any:
+        """Queue a write job and wait for its result without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn))
+
+    def after_commit(self, db: Session, callback: Callable[[], Any]):
+        """
+        Run callback once what db has committed is durable
+
+        In a writer job db.commit() only ends a savepoint, so the callback waits
+        for the batch transaction (and is dropped if it fails). Any other session
+        has really committed: the callback runs now.
+        """
+        callbacks = db.info.get(AFTER_BATCH_COMMIT)
+        if callbacks is None:
+            callback()
+        else:
+            callbacks.append(callback)
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> List[Tuple[Future, Callable]]:
+        """Block for the first job, then collect more for a short while"""
+        first = self._queue.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + settings.DB_WRITER_BATCH_WAIT_MS / 1000
+
+        while len(batch) < settings.DB_WRITER_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if job is None:
+                # Finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(job)
+
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            try:
+                self._apply(batch)
+            except Exception as e:
+                print(f"❌ Database writer batch failed: {str(e)}")
+                for future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _apply(self, batch: List[Tuple[Future, Callable]]):
+        done = []
+        # Registered after a job's savepoint commits, so a later failure of the same
+        # job does not undo what they refer to - only a failed batch does
+        callbacks = []
+
+        with write_engine.connect() as conn:
+            transaction = conn.begin()
+
+            for future, fn in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                # Each job gets a savepoint in the batch transaction
+                db = SessionLocal(bind=conn, join_transaction_mode="create_savepoint")
+                db.info[AFTER_BATCH_COMMIT] = callbacks
+                try:
+                    result = fn(db)
+                    db.commit()
+                    done.append((future, result))
+                except Exception as e:
+                    db.rollback()
+                    self.stats["failed_jobs"] += 1
+                    future.set_exception(e)
+                finally:
+                    db.close()
+
+            try:
+                transaction.commit()
+            except Exception:
+                # The driver can be left inside the failed transaction: drop the connection
+                conn.invalidate()
+                raise
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Database writer after-commit callback failed: {str(e)}")
+
+        self.stats["batches"] += 1
+        self.stats["jobs"] += len(batch)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+
+        for future, result in done:
+            future.set_result(result)
+
+    def shutdown(self):
+        """Apply what is queued, then stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "queued": self._queue.qsize()}
+
+
+# Singleton instance
+db_writer = DatabaseWriter()
@@ -0,0 +1,59 @@
+"""
+Shared HTTP Clients
+Process-wide async HTTP clients, one keep-alive pool per service and event loop
+"""
+
+import asyncio
+import threading
+from typing import Callable, Dict, Tuple
+
+import httpx
+
+
+class SharedHttpClients:
+    """
+    Reuse httpx.AsyncClient instances across scheduler jobs and requests
+
+    A client belongs to the event loop that created it, so clients are kept
+    per (loop, name). Jobs on the application loop share one pool per
+    service; code that runs its own loop (asyncio.run) gets its own clients,
+    which should be closed with aclose() before that loop ends.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, factory: Callable[[], httpx.AsyncClient]) -> httpx.AsyncClient:
+        """Client registered under name for the running loop, created by factory on first use"""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), name)
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry and entry[0] is loop and not entry[1].is_closed:
+                return entry[1]
+
+            # Drop clients whose loop has gone away (an id can be reused)
+            for stale_key, (stale_loop, _) in list(self._clients.items()):
+                if stale_loop.is_closed():
+                    del self._clients[stale_key]
+
+            client = factory()
+            self._clients[key] = (loop, client)
+            return client
+
+    async def aclose(self):
+        """Close the clients of the running loop"""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            keys = [key for key, (client_loop, _) in self._clients.items() if client_loop is loop]
+            clients = [self._clients.pop(key)[1] for key in keys]
+
+        for client in clients:
+            await client.aclose()
+
+
+# Singleton instance
+http_clients = SharedHttpClients()
@@ -3,7 +3,7 @@
 Meme Templates Model
 Store crawled memes and their analysis for learning and reuse
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Float, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -11,6 +11,10 @@ from app.core.database import Base
 class MemeTemplate(Base):
     """Meme template model - stores crawled/uploaded memes with AI analysis"""
     __tablename__ = "meme_templates"
+    __table_args__ = (
+        # Template library: WHERE status = 'analyzed' ORDER BY created_at DESC
+        Index("ix_meme_templates_status_created", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -70,6 +74,10 @@ class MemeTemplate(Base):
 class MemeVariation(Base):
     """Generated variations from templates"""
     __tablename__ = "meme_variations"
+    __table_args__ = (
+        # Variations of a template, newest first
+        Index("ix_meme_variations_template_created", "template_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -3,12 +3,14 @@ AI Content Generator Service - Ollama Version
 Generate memes, captions using Ollama (local) or OpenAI (cloud)
 """
 
-import requests
+import asyncio
+import httpx
 import json
 from typing import Dict, List
 import random
 
 from app.core.config import settings
+from app.core.http_clients import http_clients
 
 class AIContentGenerator:
     """Generate engaging football content using AI"""
@@ -33,6 +35,11 @@ class AIContentGenerator:
 
         self.meme_styles = ["sarcastic", "funny", "emotional", "dramatic", "wholesome"]
 
+    async def _ollama_generate(self, payload: Dict, timeout: float) -> httpx.Response:
+        """POST /api/generate on the shared Ollama client (does not block the event loop)"""
+        client = http_clients.get("ollama", lambda: httpx.AsyncClient(base_url=self.ollama_url))
+        return await client.post("/api/generate", json={"model": self.model, **payload}, timeout=timeout)
+
     async def generate_meme_caption(self, news_title: str, news_description: str, style: str = "funny") -> Dict:
         """Generate a meme caption based on news"""
 
@@ -91,10 +98,8 @@ QUAN TRỌNG: Trả về ĐÚNG format JSON này, KHÔNG thêm text nào khác:
     async def _generate_with_ollama(self, prompt: str, news_title: str) -> Dict:
         """Generate content using Ollama local"""
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model,
+            response = await self._ollama_generate(
+                {
                     "prompt": prompt,
                     "stream": False,
                     "format": "json"
@@ -117,7 +122,7 @@ QUAN TRỌNG: Trả về ĐÚNG format JSON này, KHÔNG thêm text nào khác:
                 print(f"❌ Ollama error: {response.status_code}")
                 return self._generate_fallback_caption(news_title)
 
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             print("❌ Không kết nối được Ollama. Chạy: ollama serve")
             return self._generate_fallback_caption(news_title)
         except Exception as e:
@@ -127,7 +132,9 @@ QUAN TRỌNG: Trả về ĐÚNG format JSON này, KHÔNG thêm text nào khác:
     async def _generate_with_openai(self, prompt: str) -> Dict:
         """Generate content using OpenAI"""
         try:
-            response = self.client.chat.completions.create(
+            # Sync SDK client - run it in a worker thread
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "Bạn là chuyên gia tạo nội dung meme bóng đá tiếng Việt."},
@@ -173,10 +180,8 @@ QUAN TRỌNG: Trả về ĐÚNG format JSON này:
 
         if self.use_ollama:
             try:
-                response = requests.post(
-                    f"{self.ollama_url}/api/generate",
-                    json={
-                        "model": self.model,
+                response = await self._ollama_generate(
+                    {
                         "prompt": prompt,
                         "stream": False,
                         "format": "json"
@@ -217,10 +222,8 @@ Chỉ trả về caption đã cải thiện, không thêm text khác.
 """
 
             try:
-                response = requests.post(
-                    f"{self.ollama_url}/api/generate",
-                    json={
-                        "model": self.model,
+                response = await self._ollama_generate(
+                    {
                         "prompt": prompt,
                         "stream": False
                     },
@@ -0,0 +1,205 @@
+"""
+Analytics Refresh Planner
+Decaying per-post refresh schedule: young or still-moving posts often, flat-lined posts rarely, then never
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import ContentPost, PostAnalyticsSnapshot, PostRefreshPlan
+
+SNAPSHOT_METRICS = ("impressions", "reach", "likes", "comments", "shares")
+
+# Metrics whose movement decides whether a post is still active
+ACTIVITY_METRICS = ("impressions", "likes", "comments", "shares")
+
+# A due post as plain values, safe to hand from one session (or thread) to another
+DuePost = namedtuple("DuePost", ["id", "fb_post_id", "posted_time"])
+
+
+class AnalyticsRefreshPlanner:
+    """Decide when each posted item's insights are fetched next, and keep the snapshot series"""
+
+    # Posts that keep failing (deleted, no permission) are dropped after this many tries
+    MAX_FAILURES = 5
+
+    def __init__(self):
+        # [max age hours, interval minutes], youngest first; older posts are not refreshed
+        self.tiers = sorted(settings.ANALYTICS_REFRESH_TIERS)
+        self.stable_change = settings.ANALYTICS_STABLE_CHANGE
+        self.stable_refreshes = settings.ANALYTICS_STABLE_REFRESHES
+        self.stop_after_hours = settings.ANALYTICS_STOP_AFTER_HOURS
+
+    def _age_hours(self, post: DuePost, now: datetime) -> float:
+        return ((now - (post.posted_time or now)).total_seconds()) / 3600
+
+    def _tier_interval(self, age_hours: float) -> Optional[float]:
+        """Base interval for a post of this age (None once it is past the last tier)"""
+        for max_age_hours, interval_minutes in self.tiers:
+            if age_hours < max_age_hours:
+                return float(interval_minutes)
+        return None
+
+    def _plan_new_posts(self, db: Session, now: datetime):
+        """Give posted items without a plan their first refresh time"""
+        cutoff = now - timedelta(hours=self.tiers[-1][0])
+
+        posts = db.query(ContentPost.id, ContentPost.posted_time).outerjoin(
+            PostRefreshPlan, PostRefreshPlan.post_id == ContentPost.id
+        ).filter(
+            ContentPost.status == "posted",
+            ContentPost.fb_post_id.isnot(None),
+            ContentPost.posted_time >= cutoff,
+            PostRefreshPlan.id.is_(None)
+        ).all()
+
+        for post_id, posted_time in posts:
+            interval = self._tier_interval((now - posted_time).total_seconds() / 3600) or float(self.tiers[-1][1])
+            db.add(PostRefreshPlan(
+                post_id=post_id,
+                interval_minutes=interval,
+                next_refresh_at=posted_time + timedelta(minutes=interval),
+                stable_refreshes=0,
+                consecutive_failures=0,
+                is_done=False
+            ))
+
+        if posts:
+            db.commit()
+
+    def due_posts(self, db: Session, now: datetime = None) -> List[DuePost]:
+        """
+        Posted items whose next refresh time has passed (new posts are planned first)
+
+        Writes the plans of new posts: run it as a database writer job.
+        """
+        now = now or datetime.utcnow()
+        self._plan_new_posts(db, now)
+
+        rows = db.query(ContentPost.id, ContentPost.fb_post_id, ContentPost.posted_time).join(
+            PostRefreshPlan, PostRefreshPlan.post_id == ContentPost.id
+        ).filter(
+            PostRefreshPlan.is_done.is_(False),
+            PostRefreshPlan.next_refresh_at <= now,
+            ContentPost.fb_post_id.isnot(None)
+        ).order_by(PostRefreshPlan.next_refresh_at).all()
+
+        return [DuePost(*row) for row in rows]
+
+    def _latest_snapshots(self, db: Session, post_ids: List[int]) -> Dict[int, PostAnalyticsSnapshot]:
+        latest_ids = db.query(func.max(PostAnalyticsSnapshot.id)).filter(
+            PostAnalyticsSnapshot.post_id.in_(post_ids)
+        ).group_by(PostAnalyticsSnapshot.post_id)
+
+        return {
+            snapshot.post_id: snapshot
+            for snapshot in db.query(PostAnalyticsSnapshot).filter(PostAnalyticsSnapshot.id.in_(latest_ids)).all()
+        }
+
+    def record(
+        self,
+        db: Session,
+        posts: List[DuePost],
+        results: Dict[str, Dict],
+        errors: Dict[str, str],
+        now: datetime = None
+    ):
+        """
+        Store a snapshot per refreshed post and schedule its next refresh
+
+        Uses the caller's transaction (caller commits), so snapshots, plans
+        and the latest PostAnalytics values are saved together.
+
+        Args:
+            posts: Posts that were due (from due_posts())
+            results: {fb_post_id: analytics} from the insights collector
+            errors: {fb_post_id: message} for posts the Graph API rejected - only these count
+                    as failures; posts in neither dict were not fetched and stay due
+        """
+        if not posts:
+            return
+
+        now = now or datetime.utcnow()
+        post_ids = [post.id for post in posts]
+
+        previous = self._latest_snapshots(db, post_ids)
+        plans = {
+            plan.post_id: plan
+            for plan in db.query(PostRefreshPlan).filter(PostRefreshPlan.post_id.in_(post_ids)).all()
+        }
+
+        snapshots = []
+        for post in posts:
+            plan = plans.get(post.id)
+            if not plan:
+                plan = PostRefreshPlan(post_id=post.id, stable_refreshes=0, consecutive_failures=0, is_done=False)
+                db.add(plan)
+
+            age_hours = self._age_hours(post, now)
+            interval = self._tier_interval(age_hours)
+            analytics = results.get(post.fb_post_id)
+
+            if not analytics:
+                if post.fb_post_id not in errors:
+                    continue
+
+                plan.consecutive_failures = (plan.consecutive_failures or 0) + 1
+                self._schedule(plan, interval, now, done=interval is None or plan.consecutive_failures >= self.MAX_FAILURES)
+                continue
+
+            plan.consecutive_failures = 0
+            plan.last_refreshed_at = now
+
+            metrics = {metric: int(analytics.get(metric) or 0) for metric in SNAPSHOT_METRICS}
+            last = previous.get(post.id)
+            deltas = {metric: metrics[metric] - ((getattr(last, metric) or 0) if last else 0) for metric in SNAPSHOT_METRICS}
+
+            snapshots.append({
+                "post_id": post.id,
+                "platform": "facebook",
+                "captured_at": now,
+                "engagement_rate": analytics.get("engagement_rate", 0.0),
+                **metrics,
+                **{f"delta_{metric}": delta for metric, delta in deltas.items()}
+            })
+
+            # Relative movement since the last refresh decides whether the post is still active
+            if last:
+                before = sum((getattr(last, metric) or 0) for metric in ACTIVITY_METRICS)
+                change = sum(abs(deltas[metric]) for metric in ACTIVITY_METRICS) / max(before, 1)
+                plan.stable_refreshes = (plan.stable_refreshes or 0) + 1 if change < self.stable_change else 0
+
+            flat_lined = (plan.stable_refreshes or 0) >= self.stable_refreshes and age_hours >= self.stop_after_hours
+            if interval is not None and not flat_lined:
+                # Flat metrics stretch the interval, up to the longest tier's
+                interval = min(interval * 2 ** (plan.stable_refreshes or 0), float(self.tiers[-1][1]))
+            self._schedule(plan, interval, now, done=interval is None or flat_lined)
+
+        if snapshots:
+            db.execute(insert(PostAnalyticsSnapshot), snapshots)
+
+    def _schedule(self, plan: PostRefreshPlan, interval: Optional[float], now: datetime, done: bool):
+        plan.is_done = done
+        plan.interval_minutes = interval
+        plan.next_refresh_at = None if done else now + timedelta(minutes=interval)
+
+    def get_status(self, db: Session) -> Dict:
+        """Summary for the scheduler status endpoint"""
+        now = datetime.utcnow()
+        active = db.query(PostRefreshPlan).filter(PostRefreshPlan.is_done.is_(False))
+
+        return {
+            "active_posts": active.count(),
+            "finished_posts": db.query(PostRefreshPlan).filter(PostRefreshPlan.is_done.is_(True)).count(),
+            "due_next_hour": active.filter(PostRefreshPlan.next_refresh_at <= now + timedelta(hours=1)).count(),
+            "snapshots": db.query(PostAnalyticsSnapshot).count()
+        }
+
+
+# Singleton instance
+analytics_refresh_planner = AnalyticsRefreshPlanner()
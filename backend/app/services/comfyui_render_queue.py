@@ -0,0 +1,199 @@
+"""
+ComfyUI Render Queue
+Feeds workflows to ComfyUI grouped by model (checkpoint, LoRA) so it switches models as rarely as possible
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from app.core.config import settings
+from app.services.comfyui_tracker import comfyui_tracker
+
+# History-shaped entry for a job ComfyUI never accepted
+SUBMIT_FAILED = {"outputs": {}, "status": {"status_str": "error", "completed": False}}
+
+
+class RenderJob:
+    """A workflow waiting for (or rendering in) ComfyUI"""
+
+    def __init__(self, workflow: Dict, model_key: Tuple):
+        self.workflow = workflow
+        self.model_key = model_key
+        self.prompt_id: Optional[str] = None  # set once submitted to ComfyUI
+        self.future: Future = Future()  # resolves with the prompt's history entry
+        self.queued_at = time.time()
+
+
+class ComfyUIRenderQueue:
+    """
+    Order renders by model instead of arrival
+
+    Loading an SDXL checkpoint (or re-patching it with another LoRA) can
+    take longer than the render itself, so interleaved requests make
+    ComfyUI thrash. Jobs are held here and only COMFYUI_MAX_IN_FLIGHT at a
+    time are handed to ComfyUI (enough to keep it busy). The next job is
+    the oldest one for the model that is loaded; the queue switches to the
+    model of the oldest job once no job for the loaded model is left, or
+    as soon as the oldest job has waited COMFYUI_MAX_JOB_DELAY seconds,
+    which bounds how long any job can be passed over.
+    """
+
+    def __init__(self):
+        self._jobs: List[RenderJob] = []  # arrival order
+        self._in_flight = 0
+        self._current_key: Optional[Tuple] = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self.stats = {
+            "submitted": 0,
+            "model_switches": 0,
+            "checkpoint_switches": 0,
+            "aged_jobs": 0,  # jobs that forced a switch by waiting too long
+            "failed_submits": 0
+        }
+
+    def submit(self, workflow: Dict, model_key: Tuple) -> RenderJob:
+        """
+        Queue a workflow
+
+        Args:
+            model_key: (checkpoint, LoRA) the workflow loads - jobs with the same key are rendered together
+        """
+        job = RenderJob(workflow, model_key)
+
+        with self._cond:
+            self._jobs.append(job)
+            self._cond.notify()
+
+        self._ensure_thread()
+        return job
+
+    def cancel(self, job: RenderJob):
+        """Drop a job that is still waiting, or stop tracking one that was submitted"""
+        with self._cond:
+            if job in self._jobs:
+                self._jobs.remove(job)
+
+        job.future.cancel()
+        if job.prompt_id:
+            comfyui_tracker.forget(job.prompt_id)
+
+    def depth(self) -> int:
+        """Jobs waiting to be handed to ComfyUI"""
+        with self._cond:
+            return len(self._jobs)
+
+    # ---- Scheduling --------------------------------------------------------
+
+    def _pick(self, now: float) -> RenderJob:
+        """Next job to submit (caller holds the lock, queue not empty)"""
+        oldest = self._jobs[0]
+        same_model = next((job for job in self._jobs if job.model_key == self._current_key), None)
+
+        if same_model is None:
+            return oldest
+
+        if now - oldest.queued_at >= settings.COMFYUI_MAX_JOB_DELAY and oldest is not same_model:
+            self.stats["aged_jobs"] += 1
+            return oldest
+
+        return same_model
+
+    def _next_job(self) -> RenderJob:
+        with self._cond:
+            while True:
+                while not self._jobs or self._in_flight >= settings.COMFYUI_MAX_IN_FLIGHT:
+                    self._cond.wait()
+
+                job = self._pick(time.time())
+                self._jobs.remove(job)
+                if job.future.cancelled():
+                    continue
+
+                if self._current_key is not None and job.model_key != self._current_key:
+                    self.stats["model_switches"] += 1
+                    if job.model_key[0] != self._current_key[0]:
+                        self.stats["checkpoint_switches"] += 1
+
+                self._current_key = job.model_key
+                self._in_flight += 1
+                return job
+
+    def _release(self, job: RenderJob, tracked: Future):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+        if not tracked.cancelled() and not job.future.done():
+            job.future.set_result(tracked.result())
+
+    def _post_prompt(self, workflow: Dict) -> Optional[str]:
+        """Queue a workflow in ComfyUI"""
+        try:
+            response = requests.post(
+                f"{settings.COMFYUI_URL}/prompt",
+                json={"prompt": workflow, "client_id": comfyui_tracker.client_id},
+                timeout=10
+            )
+
+            if response.status_code == 200:
+                return response.json().get("prompt_id")
+
+            print(f"❌ Queue error: {response.text}")
+
+        except Exception as e:
+            print(f"❌ Exception: {str(e)}")
+
+        return None
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            prompt_id = self._post_prompt(job.workflow)
+
+            if not prompt_id:
+                self.stats["failed_submits"] += 1
+                with self._cond:
+                    self._in_flight -= 1
+                if not job.future.done():
+                    job.future.set_result(SUBMIT_FAILED)
+                continue
+
+            job.prompt_id = prompt_id
+            self.stats["submitted"] += 1
+
+            tracked = comfyui_tracker.track(prompt_id)
+            tracked.add_done_callback(lambda future, job=job: self._release(job, future))
+
+    def _ensure_thread(self):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="comfyui-render-queue", daemon=True)
+                self._thread.start()
+
+    def get_stats(self) -> Dict:
+        """Queue depth per model, in-flight prompts and model switch counts"""
+        with self._cond:
+            by_model: Dict[str, int] = {}
+            for job in self._jobs:
+                name = " + ".join(filter(None, job.model_key))
+                by_model[name] = by_model.get(name, 0) + 1
+
+            oldest_wait = time.time() - self._jobs[0].queued_at if self._jobs else 0
+
+            return {
+                **self.stats,
+                "queued": len(self._jobs),
+                "in_flight": self._in_flight,
+                "queued_by_model": by_model,
+                "oldest_wait_seconds": round(oldest_wait, 1),
+                "loaded_model": " + ".join(filter(None, self._current_key)) if self._current_key else None
+            }
+
+
+# Singleton instance
+comfyui_render_queue = ComfyUIRenderQueue()
@@ -12,11 +12,15 @@ if sys.platform == 'win32':
 
 import requests
 import json
-import time
 import random
-from typing import List, Dict, Optional
+from concurrent.futures import as_completed, TimeoutError as FuturesTimeoutError
+from typing import List, Dict, Iterator, Optional, Tuple
 from pathlib import Path
 
+from app.core.config import settings
+from app.services.comfyui_render_queue import comfyui_render_queue, RenderJob
+from app.services.comfyui_tracker import comfyui_tracker
+
 
 class ComfyUIService:
     """Service to interact with ComfyUI for meme generation"""
@@ -206,9 +210,7 @@ class ComfyUIService:
     }
 
     def __init__(self):
-        from app.core.config import settings
         self.comfyui_url = settings.COMFYUI_URL
-        self.client_id = "trollfb_meme_generator"
         self.comfyui_path = Path(settings.COMFYUI_PATH)
         self.output_dir = self.comfyui_path / "output"
 
@@ -233,84 +235,114 @@ class ComfyUIService:
         except:
             return False
 
-    def generate_meme_images(
+    def _resolve_styles(self, num_variants: int, selected_styles: Optional[List[str]]) -> List[Dict]:
+        """Selected styles, or the first num_variants styles when none of them is known"""
+        styles = [self.STYLE_CONFIGS[s] for s in selected_styles or [] if s in self.STYLE_CONFIGS]
+        return styles or list(self.STYLE_CONFIGS.values())[:num_variants]
+
+    def iter_meme_images(
         self,
         title: str,
         content: str,
         keyword: str,
         num_variants: int = 4,
-        selected_styles: Optional[List[str]] = None
-    ) -> List[Dict]:
+        selected_styles: Optional[List[str]] = None,
+        images_per_style: int = 1
+    ) -> Iterator[Dict]:
         """
-        Generate multiple meme image variants
+        Queue every variant at once and yield each image as it finishes
 
-        Args:
-            title: Meme title
-            content: Meme content text
-            keyword: Main keyword (e.g., "Ronaldo")
-            num_variants: Number of image variants to generate (default 4)
-            selected_styles: List of style IDs to use (e.g., ["claymation", "pixar"])
-                           If None, uses default 4 styles
+        All workflows go into the render queue up front, which feeds them to
+        ComfyUI grouped by model alongside other requests' variants. A
+        variant that cannot be queued, fails or times out is logged and
+        skipped; the others are still yielded.
 
-        Returns:
-            List of dicts with image paths and metadata
+        With images_per_style > 1 each style is still one workflow, rendered
+        as a latent batch: the prompt is encoded and the model set up once
+        for all of its images.
+
+        Yields:
+            Dicts with image paths and metadata, in completion order
         """
         if not self.is_comfyui_running():
             raise Exception("ComfyUI is not running. Please start ComfyUI first.")
 
-        # Determine which styles to use
-        if selected_styles:
-            # Use user-selected styles
-            styles_to_use = [self.STYLE_CONFIGS[s] for s in selected_styles if s in self.STYLE_CONFIGS]
-            if not styles_to_use:
-                # Fallback to default if no valid styles
-                styles_to_use = [self.STYLE_CONFIGS["claymation"], self.STYLE_CONFIGS["chibi"],
-                               self.STYLE_CONFIGS["claymate"], self.STYLE_CONFIGS["pixar"]]
-        else:
-            # Default: use first 4 styles
-            styles_to_use = [self.STYLE_CONFIGS["claymation"], self.STYLE_CONFIGS["chibi"],
-                           self.STYLE_CONFIGS["claymate"], self.STYLE_CONFIGS["pixar"]]
-
-        results = []
-
-        for i, style in enumerate(styles_to_use):
-            print(f"Generating variant {i+1}/{len(styles_to_use)} ({style['name']})...")
-
-            # Create workflow for this variant
+        styles = self._resolve_styles(num_variants, selected_styles)
+        batch_size = max(1, min(images_per_style, settings.COMFYUI_MAX_BATCH_SIZE))
+        comfyui_tracker.start()
+
+        # Jobs already waiting are rendered first (or interleaved by model)
+        ahead = comfyui_render_queue.depth()
+
+        pending = {}
+        for i, style in enumerate(styles):
+            seed = random.randint(1, 2**32)
             workflow = self._create_meme_workflow(
                 title=title,
                 content=content,
                 keyword=keyword,
                 style=style,
                 variant_id=i,
-                seed=random.randint(1, 2**32)
+                seed=seed,
+                batch_size=batch_size
             )
 
-            # Queue the workflow
-            prompt_id = self._queue_prompt(workflow)
-
-            if prompt_id:
-                # Wait for completion
-                image_info = self._wait_for_completion(prompt_id, timeout=60)
-
-                if image_info:
-                    results.append({
-                        "variant_id": i,
-                        "prompt_id": prompt_id,
-                        "filename": image_info["filename"],
-                        "path": image_info["path"],
-                        "url": image_info["url"],
-                        "style": style["name"],
-                        "style_id": style["id"]
-                    })
-                    print(f"Variant {i+1} ({style['name']}) completed: {image_info['filename']}")
-                else:
-                    print(f"Variant {i+1} failed")
+            job = comfyui_render_queue.submit(workflow, model_key=(style["checkpoint"], style.get("lora")))
+            pending[job] = (i, style, seed)
+
+        print(f"Queued {len(pending)} variants x {batch_size} images ({ahead} renders ahead)")
+
+        timeout = settings.COMFYUI_VARIANT_TIMEOUT * (len(pending) + ahead) * batch_size
 
-            # Small delay between generations
-            time.sleep(1)
+        for job, images in self._wait_for_jobs(list(pending), timeout=timeout):
+            i, style, seed = pending[job]
 
-        return results
+            if not images:
+                print(f"Variant {i+1} ({style['name']}) failed")
+                continue
+
+            print(f"Variant {i+1} ({style['name']}) completed: {len(images)} image(s)")
+
+            # Image k of a batch is rendered from the seed's k-th noise slice
+            for batch_index, image_info in enumerate(images):
+                yield {
+                    "variant_id": i * batch_size + batch_index,
+                    "prompt_id": job.prompt_id,
+                    "filename": image_info["filename"],
+                    "path": image_info["path"],
+                    "url": image_info["url"],
+                    "style": style["name"],
+                    "style_id": style["id"],
+                    "seed": seed,
+                    "batch_index": batch_index
+                }
+
+    def generate_meme_images(
+        self,
+        title: str,
+        content: str,
+        keyword: str,
+        num_variants: int = 4,
+        selected_styles: Optional[List[str]] = None,
+        images_per_style: int = 1
+    ) -> List[Dict]:
+        """
+        Generate multiple meme image variants
+
+        Args:
+            title: Meme title
+            content: Meme content text
+            keyword: Main keyword (e.g., "Ronaldo")
+            num_variants: Number of image variants to generate (default 4)
+            selected_styles: List of style IDs to use (e.g., ["claymation", "chibi"])
+                           If None, uses the first num_variants styles
+            images_per_style: Images rendered per style in one batched workflow (default 1)
+
+        Returns:
+            List of dicts with image paths and metadata, one per image of the variants that succeeded
+        """
+        results = list(self.iter_meme_images(title, content, keyword, num_variants, selected_styles, images_per_style))
+        return sorted(results, key=lambda result: result["variant_id"])
 
     def _create_meme_workflow(
         self,
@@ -319,7 +351,8 @@ class ComfyUIService:
         keyword: str,
         style: Dict,
         variant_id: int,
-        seed: int
+        seed: int,
+        batch_size: int = 1
     ) -> Dict:
         """
         Create ComfyUI workflow for meme generation
@@ -330,7 +363,8 @@ class ComfyUIService:
             keyword: Keyword for the meme
             style: Style configuration dict
             variant_id: Variant index
-            seed: Random seed
+            seed: Random seed (the batch's images get distinct noise from it)
+            batch_size: Images rendered from the one latent batch
         """
 
         # Build positive prompt with style-specific description
@@ -365,7 +399,7 @@ watermark, text overlay, signature, multiple people, blurry, low quality"""
                 "inputs": {
                     "width": 768,  # Square for memes
                     "height": 768,
-                    "batch_size": 1
+                    "batch_size": batch_size
                 },
                 "class_type": "EmptyLatentImage"
             },
@@ -416,76 +450,58 @@ watermark, text overlay, signature, multiple people, blurry, low quality"""
 
         return workflow
 
-    def _queue_prompt(self, workflow: Dict) -> Optional[str]:
-        """Queue workflow to ComfyUI"""
+    def _images_from_history(self, entry: Dict) -> List[Dict]:
+        """Every saved image of a history entry, in batch order"""
+        images = []
+
+        for node_id, output in entry.get("outputs", {}).items():
+            for img in output.get("images", []):
+                # Preview nodes write temp images that are not kept
+                if img.get("type", "output") != "output":
+                    continue
+
+                filename = img.get("filename")
+                subfolder = img.get("subfolder", "")
+
+                # Build full path
+                if subfolder:
+                    path = self.output_dir / subfolder / filename
+                else:
+                    path = self.output_dir / filename
+
+                images.append({
+                    "filename": filename,
+                    "path": str(path),
+                    "url": f"/api/comfyui/image/{filename}"
+                })
+
+        return images
+
+    def _wait_for_jobs(self, jobs: List[RenderJob], timeout: float) -> Iterator[Tuple[RenderJob, List[Dict]]]:
+        """Yield (job, images - empty on failure) for each render job as it finishes, fails or times out"""
+        futures = {job.future: job for job in jobs}
+        remaining = set(jobs)
+
         try:
-            payload = {
-                "prompt": workflow,
-                "client_id": self.client_id
-            }
+            for future in as_completed(futures, timeout=timeout):
+                job = futures[future]
+                remaining.discard(job)
 
-            response = requests.post(
-                f"{self.comfyui_url}/prompt",
-                json=payload,
-                timeout=10
-            )
+                entry = future.result()
+                if entry.get("status", {}).get("status_str") == "error":
+                    yield job, []
+                else:
+                    yield job, self._images_from_history(entry)
+
+        except FuturesTimeoutError:
+            for job in [job for job in jobs if job in remaining]:
+                print(f"⏰ Timeout after {timeout:.0f} seconds: {job.prompt_id or 'not submitted yet'}")
+                yield job, []
 
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("prompt_id")
-            else:
-                print(f"❌ Queue error: {response.text}")
-                return None
-
-        except Exception as e:
-            print(f"❌ Exception: {str(e)}")
-            return None
-
-    def _wait_for_completion(self, prompt_id: str, timeout: int = 60) -> Optional[Dict]:
-        """Wait for image generation to complete"""
-        start_time = time.time()
-
-        while time.time() - start_time < timeout:
-            try:
-                response = requests.get(
-                    f"{self.comfyui_url}/history/{prompt_id}",
-                    timeout=5
-                )
-
-                if response.status_code == 200:
-                    history = response.json()
-
-                    if prompt_id in history:
-                        outputs = history[prompt_id].get("outputs", {})
-
-                        if outputs:
-                            # Extract image info
-                            for node_id, output in outputs.items():
-                                if "images" in output and len(output["images"]) > 0:
-                                    img = output["images"][0]
-                                    filename = img.get("filename")
-                                    subfolder = img.get("subfolder", "")
-
-                                    # Build full path
-                                    if subfolder:
-                                        path = self.output_dir / subfolder / filename
-                                    else:
-                                        path = self.output_dir / filename
-
-                                    return {
-                                        "filename": filename,
-                                        "path": str(path),
-                                        "url": f"/api/comfyui/image/{filename}"
-                                    }
-
-            except Exception as e:
-                print(f"⚠️ Check error: {str(e)}")
-
-            # Wait before next check
-            time.sleep(2)
-
-        print(f"⏰ Timeout after {timeout} seconds")
-        return None
+        finally:
+            # Timed out, or the caller stopped reading: drop what is left
+            for job in remaining:
+                comfyui_render_queue.cancel(job)
 
     def get_image_url(self, filename: str) -> str:
         """Get URL for accessing generated image"""
@@ -0,0 +1,276 @@
+"""
+ComfyUI Prompt Tracker
+Long-lived WebSocket listener resolving prompt completions and per-node progress, with a polling fallback
+"""
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import requests
+
+from app.core.config import settings
+
+try:
+    import websocket
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
+    print("WARNING: websocket-client not installed. ComfyUI prompts will be tracked by polling.")
+
+# Finished prompts kept for progress lookups and late track() calls
+MAX_FINISHED_PROMPTS = 200
+
+
+class ComfyUIPromptTracker:
+    """
+    Follow queued ComfyUI prompts through the /ws event stream
+
+    ComfyUI sends execution events (execution_start, executing, progress,
+    executed, execution_error) to the socket whose clientId queued the
+    prompt, so every process uses its own client_id for both. One daemon
+    thread keeps the socket open; track(prompt_id) returns a future that
+    resolves with a history-shaped entry ({"outputs": {...}, "status":
+    {...}}) as soon as the prompt finishes.
+
+    While the socket is down (or websocket-client is missing) the thread
+    polls /history for the pending prompts every COMFYUI_POLL_INTERVAL
+    seconds, and polls once more after reconnecting to pick up prompts
+    that finished in between.
+    """
+
+    def __init__(self):
+        self.comfyui_url = settings.COMFYUI_URL
+        self.client_id = f"trollfb_{uuid.uuid4().hex}"
+        self.connected = False
+        self._connections = 0
+
+        self._prompts: Dict[str, Dict] = {}  # prompt_id -> state
+        self._futures: Dict[str, List[Future]] = {}
+        self._finished: List[str] = []  # finished prompt_ids, oldest first
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # ---- Tracking ----------------------------------------------------------
+
+    def track(self, prompt_id: str) -> Future:
+        """Future resolved with the prompt's history entry once it finishes"""
+        future = Future()
+
+        with self._lock:
+            state = self._state(prompt_id)
+            if state["entry"] is not None:
+                future.set_result(state["entry"])
+            else:
+                self._futures.setdefault(prompt_id, []).append(future)
+
+        # Registered first, so a listener that is only now connecting polls for it
+        self.start()
+        return future
+
+    def forget(self, prompt_id: str):
+        """Stop waiting for a prompt (e.g. after a timeout)"""
+        with self._lock:
+            for future in self._futures.pop(prompt_id, []):
+                future.cancel()
+
+            state = self._prompts.get(prompt_id)
+            if state is not None and state["entry"] is None:
+                del self._prompts[prompt_id]
+
+    def _state(self, prompt_id: str) -> Dict:
+        """Caller holds the lock"""
+        state = self._prompts.get(prompt_id)
+        if state is None:
+            state = self._prompts[prompt_id] = {
+                "status": "queued",
+                "node": None,
+                "value": 0,
+                "max": 0,
+                "nodes_done": 0,
+                "outputs": {},
+                "entry": None,
+                "updated_at": time.time()
+            }
+        return state
+
+    def _finish(self, prompt_id: str, entry: Dict):
+        """Resolve a prompt's futures with its history entry (first result wins)"""
+        with self._lock:
+            state = self._state(prompt_id)
+            if state["entry"] is not None:
+                return
+
+            state["entry"] = entry
+            state["status"] = entry.get("status", {}).get("status_str", "success")
+            state["node"] = None
+            state["updated_at"] = time.time()
+            futures = self._futures.pop(prompt_id, [])
+
+            self._finished.append(prompt_id)
+            while len(self._finished) > MAX_FINISHED_PROMPTS:
+                self._prompts.pop(self._finished.pop(0), None)
+
+        for future in futures:
+            if not future.cancelled():
+                future.set_result(entry)
+
+    # ---- Progress ----------------------------------------------------------
+
+    def get_progress(self, prompt_id: Optional[str] = None) -> Dict:
+        """Per-prompt progress: status, executing node, sampler step value/max, nodes done"""
+        with self._lock:
+            prompts = {
+                pid: {key: state[key] for key in ("status", "node", "value", "max", "nodes_done")}
+                for pid, state in self._prompts.items()
+                if prompt_id is None or pid == prompt_id
+            }
+
+        return {
+            "mode": "websocket" if self.connected else "polling",
+            "prompts": prompts
+        }
+
+    # ---- Events ------------------------------------------------------------
+
+    def _on_message(self, message: Dict):
+        event = message.get("type")
+        data = message.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return  # status broadcasts (queue size) and previews
+
+        if event in ("execution_error", "execution_interrupted"):
+            print(f"❌ ComfyUI prompt {prompt_id}: {data.get('exception_message') or event}")
+            self._finish(prompt_id, {"outputs": {}, "status": {"status_str": "error", "completed": False}})
+            return
+
+        with self._lock:
+            state = self._state(prompt_id)
+            state["updated_at"] = time.time()
+
+            if event == "execution_start":
+                state["status"] = "running"
+            elif event == "progress":
+                state["node"] = data.get("node")
+                state["value"] = data.get("value", 0)
+                state["max"] = data.get("max", 0)
+            elif event == "executed":
+                state["outputs"][data.get("node")] = data.get("output") or {}
+            elif event == "executing" and data.get("node") is not None:
+                if state["node"] is not None:
+                    state["nodes_done"] += 1
+                state["status"] = "running"
+                state["node"] = data.get("node")
+                state["value"] = state["max"] = 0
+
+            finished = (event == "executing" and data.get("node") is None) or event == "execution_success"
+            outputs = dict(state["outputs"])
+
+        if finished:
+            # Cached output nodes send no "executed" event - their images are only in the history
+            entry = {"outputs": outputs, "status": {"status_str": "success", "completed": True}}
+            if not any("images" in output for output in outputs.values()):
+                entry = self._fetch_history(prompt_id) or entry
+            self._finish(prompt_id, entry)
+
+    # ---- Polling -----------------------------------------------------------
+
+    def _fetch_history(self, prompt_id: str) -> Optional[Dict]:
+        """History entry of a finished prompt (None while it is queued or running)"""
+        try:
+            response = requests.get(f"{self.comfyui_url}/history/{prompt_id}", timeout=5)
+            if response.status_code == 200:
+                return response.json().get(prompt_id)
+        except Exception as e:
+            print(f"⚠️ Check error: {str(e)}")
+        return None
+
+    def _poll_pending(self):
+        with self._lock:
+            pending = list(self._futures)
+
+        for prompt_id in pending:
+            entry = self._fetch_history(prompt_id)
+            if entry:
+                self._finish(prompt_id, entry)
+
+    # ---- Listener thread ---------------------------------------------------
+
+    def start(self):
+        """Start the listener thread (call before queueing, so the socket is up for the first events)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="comfyui-tracker", daemon=True)
+                self._thread.start()
+
+    def _ws_url(self) -> str:
+        base = self.comfyui_url.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        return f"{base.rstrip('/')}/ws?clientId={self.client_id}"
+
+    def _listen(self):
+        """Read events until the socket drops or stop() is called"""
+        ws = websocket.create_connection(self._ws_url(), timeout=5)
+
+        try:
+            ws.settimeout(1)
+            self.connected = True
+            self._connections += 1
+            print("🔌 ComfyUI event stream connected")
+
+            # Prompts that finished while the socket was down
+            self._poll_pending()
+
+            while not self._stop.is_set():
+                try:
+                    message = ws.recv()
+                except websocket.WebSocketTimeoutException:
+                    continue
+
+                # Binary frames are sampler preview images
+                if isinstance(message, str) and message:
+                    self._on_message(json.loads(message))
+
+        finally:
+            self.connected = False
+            ws.close()
+
+    def _run(self):
+        delay = settings.COMFYUI_WS_RECONNECT_SECONDS
+
+        while not self._stop.is_set():
+            if WEBSOCKET_AVAILABLE:
+                connections = self._connections
+                try:
+                    self._listen()
+                except Exception as e:
+                    if self._futures:
+                        print(f"⚠️ ComfyUI event stream unavailable, polling: {str(e)}")
+
+                # A dropped socket is retried soon; back off while ComfyUI refuses connections
+                if self._connections > connections:
+                    delay = settings.COMFYUI_WS_RECONNECT_SECONDS
+                else:
+                    delay = min(delay * 2, 60)
+
+            # Poll until it is time to try the socket again
+            retry_at = time.time() + delay
+            while not self._stop.is_set() and time.time() < retry_at:
+                self._poll_pending()
+                self._stop.wait(settings.COMFYUI_POLL_INTERVAL)
+
+    def stop(self):
+        """Close the socket and stop the listener thread"""
+        self._stop.set()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout=5)
+
+
+# Singleton instance
+comfyui_tracker = ComfyUIPromptTracker()
@@ -0,0 +1,351 @@
+"""
+Dashboard Snapshots
+Precomputed dashboard responses kept in memory and in the database, updated as their source tables change
+"""
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import chain
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import DashboardSnapshot, ReadSessionLocal, SessionLocal
+from app.core.db_writer import db_writer
+
+# Session.info key for the snapshot kinds changed by the current transaction
+CHANGED_KINDS = "dashboard_snapshot_kinds"
+
+# Stale snapshots are rebuilt off the request path, one at a time
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dashboard-snapshot")
+
+
+class DashboardSnapshots:
+    """
+    Serve dashboard aggregates without recomputing them on every request
+
+    Each kind (one endpoint) registers a builder and the tables it reads.
+    A built response is stored as JSON in dashboard_snapshots, one row per
+    kind and parameters, and cached in memory for
+    DASHBOARD_SNAPSHOT_MEMORY_TTL seconds, so a read is a dictionary lookup
+    or one primary key query whatever the size of the history.
+
+    Writes made through SessionLocal update the snapshots in the same
+    transaction:
+    - counters (e.g. posts per status) get their deltas applied to the stored
+      payload, which stays exact without a rebuild;
+    - any other change marks the kind stale.
+
+    A stale snapshot is still served, while it rebuilds in the background,
+    for at most DASHBOARD_SNAPSHOT_MAX_STALENESS seconds; after that the
+    request rebuilds it. Snapshots also go stale once they are
+    DASHBOARD_SNAPSHOT_MAX_AGE old, which covers sliding time windows and
+    writes made outside the ORM.
+    """
+
+    def __init__(self):
+        self._kinds: Dict[str, Dict] = {}
+        self._tables: Dict[str, set] = {}  # table name -> kinds that read it
+        self._memory: Dict[str, Dict] = {}
+        self._changed_at: Dict[str, datetime] = {}  # kind -> last change committed by this worker
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+        event.listen(SessionLocal, "after_flush", self._after_flush)
+        event.listen(SessionLocal, "do_orm_execute", self._after_bulk_statement)
+        event.listen(SessionLocal, "after_commit", self._after_commit)
+        event.listen(SessionLocal, "after_soft_rollback", self._after_rollback)
+
+    def register(
+        self,
+        kind: str,
+        builder: Callable[..., Dict],
+        tables: Iterable[str],
+        counters: Optional[Dict[str, Tuple[str, Callable]]] = None
+    ):
+        """
+        Register a snapshot kind
+
+        Args:
+            builder: builder(db, **params) -> JSON-serializable response
+            tables: Tables the builder reads
+            counters: {table: (field, payload_key)} - a change to field on a row of
+                      table moves one count from payload_key(old) to payload_key(new)
+                      (None = not counted); changes to other fields are ignored
+        """
+        self._kinds[kind] = {"builder": builder, "counters": counters or {}}
+        for table in tables:
+            self._tables.setdefault(table, set()).add(kind)
+
+    # ---- Reading -----------------------------------------------------------
+
+    def _key(self, kind: str, params: Dict) -> str:
+        return kind + ":" + ",".join(f"{name}={params[name]}" for name in sorted(params))
+
+    def _entry(self, row) -> Dict:
+        max_age = row.computed_at + timedelta(seconds=settings.DASHBOARD_SNAPSHOT_MAX_AGE)
+        return {
+            "payload": row.payload,
+            "etag": row.etag,
+            "computed_at": row.computed_at,
+            "stale_at": min(row.stale_since, max_age) if row.stale_since else max_age,
+            "loaded_at": time.monotonic()
+        }
+
+    def _load(self, db: Session, key: str) -> Optional[Dict]:
+        row = db.query(
+            DashboardSnapshot.payload,
+            DashboardSnapshot.etag,
+            DashboardSnapshot.computed_at,
+            DashboardSnapshot.stale_since
+        ).filter(DashboardSnapshot.key == key).first()
+
+        if not row:
+            return None
+
+        entry = self._entry(row)
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    def get(self, db: Session, kind: str, **params) -> Dict:
+        """Snapshot {payload (JSON text), etag, computed_at, stale_at} for kind and params"""
+        key = self._key(kind, params)
+
+        entry = self._memory.get(key)
+        if not entry or time.monotonic() - entry["loaded_at"] >= settings.DASHBOARD_SNAPSHOT_MEMORY_TTL:
+            entry = self._load(db, key)
+
+        now = datetime.utcnow()
+        if entry is None or now >= entry["stale_at"] + timedelta(seconds=settings.DASHBOARD_SNAPSHOT_MAX_STALENESS):
+            return self._rebuild(db, kind, key, params)
+
+        if now >= entry["stale_at"]:
+            self._refresh_in_background(kind, key, params)
+
+        return entry
+
+    async def serve(self, request: Request, db: AsyncSession, kind: str, **params) -> Response:
+        """JSON response for the snapshot, or 304 when the client's ETag still matches"""
+        # A rebuild's queries wait on the async driver, not on the event loop
+        entry = await db.run_sync(self.get, kind, **params)
+        headers = {"ETag": entry["etag"], "Cache-Control": "no-cache"}
+
+        if self._etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=entry["payload"], media_type="application/json", headers=headers)
+
+    def _etag_matches(self, if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    # ---- Building ----------------------------------------------------------
+
+    def _encode(self, payload: Dict) -> Tuple[str, str]:
+        body = json.dumps(jsonable_encoder(payload), separators=(",", ":"))
+        return body, '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+    def _rebuild(self, db: Session, kind: str, key: str, params: Dict) -> Dict:
+        """Build from db (may be read-only) and hand the row to the database writer"""
+        started = datetime.utcnow()
+        body, etag = self._encode(self._kinds[kind]["builder"](db, **params))
+
+        def store(write_db: Session):
+            row = write_db.query(DashboardSnapshot).filter(DashboardSnapshot.key == key).first()
+            if not row:
+                row = DashboardSnapshot(key=key, kind=kind, version=0)
+                write_db.add(row)
+
+            # A change committed while building may be missing from the payload
+            # (a new row has no changed_at yet - this worker's own changes still count)
+            changed_at = max(filter(None, (row.changed_at, self._changed_at.get(kind))), default=None)
+            missed_change = changed_at is not None and changed_at >= started
+
+            row.payload = body
+            row.etag = etag
+            row.version = (row.version or 0) + 1
+            row.computed_at = started
+            row.stale_since = changed_at if missed_change else None
+
+        # Not waited for: the request is served from memory meanwhile
+        db_writer.submit(store)
+
+        entry = self._entry(SimpleNamespace(payload=body, etag=etag, computed_at=started, stale_since=None))
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    def _refresh_in_background(self, kind: str, key: str, params: Dict):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        _refresh_executor.submit(self._refresh, kind, key, params)
+
+    def _refresh(self, kind: str, key: str, params: Dict):
+        db = ReadSessionLocal()
+
+        try:
+            self._rebuild(db, kind, key, params)
+
+        except Exception as e:
+            print(f"⚠️ Dashboard snapshot {key} refresh failed: {str(e)}")
+            db.rollback()
+
+        finally:
+            db.close()
+            with self._lock:
+                self._refreshing.discard(key)
+
+    # ---- Change tracking ---------------------------------------------------
+
+    def _count_shift(self, obj, change: str, field: str, payload_key: Callable) -> Optional[Dict[str, int]]:
+        """Count deltas for one changed row (None = old or new value unknown)"""
+        state = inspect(obj)
+
+        if change == "dirty":
+            history = state.attrs[field].history
+            if not history.has_changes():
+                return {}
+            if not history.deleted:
+                return None  # the old value was never loaded
+            values = ((history.deleted[0], -1), (history.added[0] if history.added else None, 1))
+        else:
+            if field not in state.dict:
+                return None
+            values = ((state.dict[field], 1 if change == "new" else -1),)
+
+        shift = {}
+        for value, step in values:
+            name = payload_key(value)
+            if name:
+                shift[name] = shift.get(name, 0) + step
+        return shift
+
+    def _after_flush(self, session: Session, flush_context):
+        invalidated = set()
+        shifts: Dict[str, Dict[str, int]] = {}
+
+        changes = chain(
+            ((obj, "new") for obj in session.new),
+            ((obj, "dirty") for obj in session.dirty),
+            ((obj, "deleted") for obj in session.deleted)
+        )
+
+        for obj, change in changes:
+            table = getattr(obj, "__tablename__", None)
+            if table not in self._tables:
+                continue
+            if change == "dirty" and not session.is_modified(obj, include_collections=False):
+                continue
+
+            for kind in self._tables[table]:
+                counter = self._kinds[kind]["counters"].get(table)
+                shift = self._count_shift(obj, change, *counter) if counter else None
+
+                if shift is None:
+                    invalidated.add(kind)
+                    continue
+
+                totals = shifts.setdefault(kind, {})
+                for name, step in shift.items():
+                    totals[name] = totals.get(name, 0) + step
+
+        shifts = {
+            kind: {name: step for name, step in totals.items() if step}
+            for kind, totals in shifts.items()
+            if kind not in invalidated
+        }
+        shifts = {kind: totals for kind, totals in shifts.items() if totals}
+
+        if invalidated or shifts:
+            self._apply(session, shifts, invalidated)
+
+    def _after_bulk_statement(self, orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+
+        table = getattr(orm_execute_state.statement, "table", None)
+        kinds = self._tables.get(getattr(table, "name", None))
+        if kinds:
+            self._apply(orm_execute_state.session, {}, set(kinds))
+
+    def _apply(self, session: Session, shifts: Dict[str, Dict[str, int]], invalidated: set):
+        """Update stored snapshots in the session's transaction"""
+        now = datetime.utcnow()
+        conn = session.connection()
+
+        for kind, shift in shifts.items():
+            rows = conn.execute(
+                select(DashboardSnapshot.key, DashboardSnapshot.payload, DashboardSnapshot.version)
+                .where(DashboardSnapshot.kind == kind)
+            ).all()
+
+            for key, body, version in rows:
+                payload = json.loads(body)
+                if not all(isinstance(payload.get(name), int) for name in shift):
+                    invalidated.add(kind)
+                    continue
+
+                for name, step in shift.items():
+                    payload[name] += step
+
+                body, etag = self._encode(payload)
+                updated = conn.execute(
+                    update(DashboardSnapshot)
+                    .where(DashboardSnapshot.key == key, DashboardSnapshot.version == version)
+                    .values(payload=body, etag=etag, version=version + 1, changed_at=now)
+                ).rowcount
+
+                # Rewritten concurrently - let the next read rebuild it
+                if not updated:
+                    invalidated.add(kind)
+
+        if invalidated:
+            conn.execute(
+                update(DashboardSnapshot)
+                .where(DashboardSnapshot.kind.in_(invalidated))
+                .values(changed_at=now, stale_since=func.coalesce(DashboardSnapshot.stale_since, now))
+            )
+
+        session.info.setdefault(CHANGED_KINDS, set()).update(shifts, invalidated)
+
+    def _after_commit(self, session: Session):
+        kinds = session.info.pop(CHANGED_KINDS, None)
+        if not kinds:
+            return
+
+        # A writer job's commit only ends a savepoint: forget the snapshots once the batch commits
+        db_writer.after_commit(session, lambda: self._forget(kinds))
+
+    def _forget(self, kinds: set):
+        # This worker sees its own changes at once; other workers after the memory TTL
+        now = datetime.utcnow()
+        with self._lock:
+            for kind in kinds:
+                self._changed_at[kind] = now
+            prefixes = tuple(f"{kind}:" for kind in kinds)
+            for key in [key for key in self._memory if key.startswith(prefixes)]:
+                del self._memory[key]
+
+    def _after_rollback(self, session: Session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(CHANGED_KINDS, None)
+
+
+# Singleton instance
+dashboard_snapshots = DashboardSnapshots()
@@ -0,0 +1,267 @@
+"""
+Engagement Rollups
+Hourly and daily aggregates of the post snapshot series, compaction, and resolution-aware queries
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AppSettings, EngagementDaily, EngagementHourly, PostAnalyticsSnapshot
+
+ROLLUP_METRICS = ("impressions", "reach", "likes", "comments", "shares")
+
+RESOLUTIONS = {"hour": EngagementHourly, "day": EngagementDaily}
+
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class EngagementRollups:
+    """
+    Time series of engagement deltas at three resolutions
+
+    raw:   post_analytics_snapshots (one row per refresh, kept ANALYTICS_RAW_RETENTION_DAYS)
+    hour:  engagement_hourly (kept ANALYTICS_HOURLY_RETENTION_DAYS)
+    day:   engagement_daily (kept forever)
+
+    Rollups are recomputed from the finer table for every bucket since the
+    last run (the watermark), so re-running is idempotent and late snapshots
+    in the previous hour are picked up. Raw and hourly rows are only deleted
+    once they are behind the watermark and past their retention.
+    """
+
+    WATERMARK_SETTING_KEY = "engagement_rollup_watermark"
+
+    # ---- Watermark --------------------------------------------------------
+
+    def _load_watermark(self, db: Session) -> Optional[datetime]:
+        setting = db.query(AppSettings).filter(AppSettings.key == self.WATERMARK_SETTING_KEY).first()
+        try:
+            return datetime.fromisoformat(setting.value) if setting and setting.value else None
+        except ValueError:
+            return None
+
+    def _save_watermark(self, db: Session, watermark: datetime):
+        setting = db.query(AppSettings).filter(AppSettings.key == self.WATERMARK_SETTING_KEY).first()
+        if not setting:
+            setting = AppSettings(key=self.WATERMARK_SETTING_KEY)
+            db.add(setting)
+        setting.value = watermark.isoformat()
+
+    # ---- Rollup -----------------------------------------------------------
+
+    def _aggregate(self, rows, floor) -> List[Dict]:
+        """Sum (post_id, platform, timestamp, *metrics, samples) rows into buckets"""
+        buckets = {}
+        for post_id, platform, timestamp, *values in rows:
+            key = (post_id, platform or "facebook", floor(timestamp))
+            totals = buckets.setdefault(key, [0] * (len(ROLLUP_METRICS) + 1))
+            for i, value in enumerate(values):
+                totals[i] += value or 0
+
+        return [
+            {
+                "post_id": post_id,
+                "platform": platform,
+                "bucket_start": bucket_start,
+                **dict(zip(ROLLUP_METRICS, totals)),
+                "samples": totals[-1]
+            }
+            for (post_id, platform, bucket_start), totals in buckets.items()
+        ]
+
+    def _replace(self, db: Session, table, start: datetime, end: datetime, rows: List[Dict]):
+        db.query(table).filter(table.bucket_start >= start, table.bucket_start < end).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(table), rows)
+
+    def _rollup_hours(self, db: Session, start: datetime, end: datetime) -> int:
+        rows = db.query(
+            PostAnalyticsSnapshot.post_id,
+            PostAnalyticsSnapshot.platform,
+            PostAnalyticsSnapshot.captured_at,
+            *(getattr(PostAnalyticsSnapshot, f"delta_{metric}") for metric in ROLLUP_METRICS)
+        ).filter(
+            PostAnalyticsSnapshot.captured_at >= start,
+            PostAnalyticsSnapshot.captured_at < end
+        ).all()
+
+        # Each snapshot counts as one sample
+        buckets = self._aggregate([(*row, 1) for row in rows], _floor_hour)
+        self._replace(db, EngagementHourly, start, end, buckets)
+        return len(buckets)
+
+    def _rollup_days(self, db: Session, start: datetime, end: datetime) -> int:
+        rows = db.query(
+            EngagementHourly.post_id,
+            EngagementHourly.platform,
+            EngagementHourly.bucket_start,
+            *(getattr(EngagementHourly, metric) for metric in ROLLUP_METRICS),
+            EngagementHourly.samples
+        ).filter(
+            EngagementHourly.bucket_start >= start,
+            EngagementHourly.bucket_start < end
+        ).all()
+
+        buckets = self._aggregate(rows, _floor_day)
+        self._replace(db, EngagementDaily, start, end, buckets)
+        return len(buckets)
+
+    def rollup(self, db: Session, now: datetime = None) -> Dict[str, int]:
+        """Roll new snapshots into the hourly and daily tables, then compact old rows"""
+        now = now or datetime.utcnow()
+        current_hour = _floor_hour(now)
+        watermark = self._load_watermark(db)
+
+        if watermark is None:
+            first = db.query(func.min(PostAnalyticsSnapshot.captured_at)).scalar()
+            if first is None:
+                return {"hourly": 0, "daily": 0, "compacted_raw": 0, "compacted_hourly": 0}
+            start = _floor_hour(first)
+        else:
+            # Snapshots of a refresh that started in the previous hour may land after the last run
+            start = watermark - timedelta(hours=1)
+
+        end = current_hour + timedelta(hours=1)  # the current hour is rolled up as far as it goes
+        stats = {"hourly": 0, "daily": 0}
+
+        # A day at a time keeps a first run over a long history bounded
+        chunk_start = start
+        while chunk_start < end:
+            day_start = _floor_day(chunk_start)
+            chunk_end = min(day_start + timedelta(days=1), end)
+            stats["hourly"] += self._rollup_hours(db, chunk_start, chunk_end)
+            # The whole day is re-summed from its hourly rows
+            stats["daily"] += self._rollup_days(db, day_start, day_start + timedelta(days=1))
+            chunk_start = chunk_end
+
+        self._save_watermark(db, current_hour)
+        stats.update(self._compact(db, now, current_hour))
+        db.commit()
+
+        return stats
+
+    def _compact(self, db: Session, now: datetime, watermark: datetime) -> Dict[str, int]:
+        """Drop raw snapshots and hourly rows that are rolled up and past their retention"""
+        # Never below what the next run recomputes
+        safe = watermark - timedelta(hours=1)
+
+        raw_cutoff = min(now - timedelta(days=settings.ANALYTICS_RAW_RETENTION_DAYS), safe)
+        compacted_raw = db.query(PostAnalyticsSnapshot).filter(
+            PostAnalyticsSnapshot.captured_at < raw_cutoff
+        ).delete(synchronize_session=False)
+
+        hourly_cutoff = min(_floor_day(now - timedelta(days=settings.ANALYTICS_HOURLY_RETENTION_DAYS)), _floor_day(safe))
+        compacted_hourly = db.query(EngagementHourly).filter(
+            EngagementHourly.bucket_start < hourly_cutoff
+        ).delete(synchronize_session=False)
+
+        return {"compacted_raw": compacted_raw, "compacted_hourly": compacted_hourly}
+
+    # ---- Queries ----------------------------------------------------------
+
+    def resolution_for(self, start: datetime, end: datetime, now: datetime = None) -> str:
+        """Finest rollup that covers the whole window"""
+        now = now or datetime.utcnow()
+        hourly_from = now - timedelta(days=settings.ANALYTICS_HOURLY_RETENTION_DAYS)
+
+        if end - start <= timedelta(hours=settings.ANALYTICS_HOURLY_MAX_WINDOW_HOURS) and start >= hourly_from:
+            return "hour"
+        return "day"
+
+    def _window(self, start: datetime, end: datetime, resolution: Optional[str]):
+        resolution = resolution or self.resolution_for(start, end)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        floor = _floor_hour if resolution == "hour" else _floor_day
+        return resolution, RESOLUTIONS[resolution], floor(start)
+
+    def series(
+        self,
+        db: Session,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[str] = None,
+        post_ids: Optional[List[int]] = None
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Engagement gained per bucket in [start, end), summed over posts
+
+        Returns:
+            (resolution, [{"bucket_start", impressions, reach, likes, comments, shares, "engagement"}])
+        """
+        resolution, table, start = self._window(start, end, resolution)
+
+        query = db.query(
+            table.bucket_start,
+            *(func.sum(getattr(table, metric)) for metric in ROLLUP_METRICS)
+        ).filter(table.bucket_start >= start, table.bucket_start < end)
+        if post_ids is not None:
+            query = query.filter(table.post_id.in_(post_ids))
+
+        points = []
+        for bucket_start, *values in query.group_by(table.bucket_start).order_by(table.bucket_start).all():
+            point = {"bucket_start": bucket_start, **{metric: int(value or 0) for metric, value in zip(ROLLUP_METRICS, values)}}
+            point["engagement"] = point["likes"] + point["comments"] + point["shares"]
+            points.append(point)
+
+        return resolution, points
+
+    def totals_by_post(
+        self,
+        db: Session,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[str] = None,
+        post_ids: Optional[List[int]] = None,
+        top: Optional[int] = None
+    ) -> Dict[int, Dict]:
+        """
+        Engagement gained per post in [start, end)
+
+        Args:
+            post_ids: Only these posts
+            top: Only the posts with the highest engagement rate (ranked in SQL)
+
+        Returns:
+            {post_id: {metrics..., "engagement", "engagement_rate"}} (ordered by rate when top is set)
+        """
+        _, table, start = self._window(start, end, resolution)
+
+        query = db.query(
+            table.post_id,
+            *(func.sum(getattr(table, metric)) for metric in ROLLUP_METRICS)
+        ).filter(
+            table.bucket_start >= start,
+            table.bucket_start < end
+        )
+        if post_ids is not None:
+            query = query.filter(table.post_id.in_(post_ids))
+
+        query = query.group_by(table.post_id)
+        if top is not None:
+            engagement = func.sum(table.likes + table.comments + table.shares)
+            rate = engagement * 1.0 / func.nullif(func.sum(table.impressions), 0)
+            query = query.order_by(func.coalesce(rate, 0).desc()).limit(top)
+
+        totals = {}
+        for post_id, *values in query.all():
+            total = {metric: int(value or 0) for metric, value in zip(ROLLUP_METRICS, values)}
+            total["engagement"] = total["likes"] + total["comments"] + total["shares"]
+            total["engagement_rate"] = (total["engagement"] / total["impressions"] * 100) if total["impressions"] > 0 else 0
+            totals[post_id] = total
+
+        return totals
+
+# Singleton instance
+engagement_rollups = EngagementRollups()
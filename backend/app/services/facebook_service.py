@@ -9,13 +9,19 @@ from datetime import datetime
 
 from app.core.config import settings
 
+# Fields requested per post for analytics
+POST_INSIGHTS_FIELDS = (
+    "insights.metric(post_impressions,post_engaged_users,post_reactions_by_type_total),"
+    "reactions.summary(true),comments.summary(true),shares"
+)
+
 class FacebookService:
     """Handle Facebook Graph API operations"""
 
     def __init__(self):
         self.access_token = settings.FB_PAGE_ACCESS_TOKEN
         self.page_id = settings.FB_PAGE_ID
-        self.graph_url = "https://graph.facebook.com/v18.0"
+        self.graph_url = settings.FB_GRAPH_URL.rstrip("/")
 
     def post_text(self, message: str) -> Dict:
         """Post text-only status to Facebook page"""
@@ -131,69 +137,74 @@ class FacebookService:
         if not self.access_token:
             return {"error": "Facebook credentials not configured"}
 
-        # Remove page ID prefix if present
-        if "_" in post_id:
-            post_id = post_id.split("_")[1]
-
-        full_post_id = f"{self.page_id}_{post_id}"
+        full_post_id = self.full_post_id(post_id)
 
         url = f"{self.graph_url}/{full_post_id}"
 
         params = {
-            "fields": "insights.metric(post_impressions,post_engaged_users,post_reactions_by_type_total),reactions.summary(true),comments.summary(true),shares",
+            "fields": POST_INSIGHTS_FIELDS,
             "access_token": self.access_token
         }
 
         try:
             response = requests.get(url, params=params)
-            result = response.json()
+            return self.parse_post_insights(full_post_id.split("_")[1], response.json())
 
-            # Parse insights
-            analytics = {
-                "post_id": post_id,
-                "reach": 0,
-                "impressions": 0,
-                "engaged_users": 0,
-                "likes": 0,
-                "comments": 0,
-                "shares": 0,
-                "reactions": {}
+        except Exception as e:
+            return {
+                "error": str(e)
             }
 
-            # Get insights data
-            if "insights" in result and "data" in result["insights"]:
-                for insight in result["insights"]["data"]:
-                    metric = insight["name"]
-                    value = insight["values"][0]["value"] if insight.get("values") else 0
+    def full_post_id(self, post_id: str) -> str:
+        """{page_id}_{post_id} form of a post ID (with or without the page prefix)"""
+        # Remove page ID prefix if present
+        if "_" in post_id:
+            post_id = post_id.split("_")[1]
 
-                    if metric == "post_impressions":
-                        analytics["impressions"] = value
-                    elif metric == "post_engaged_users":
-                        analytics["engaged_users"] = value
-                    elif metric == "post_reactions_by_type_total":
-                        analytics["reactions"] = value
-                        analytics["likes"] = sum(value.values()) if isinstance(value, dict) else 0
+        return f"{self.page_id}_{post_id}"
+
+    def parse_post_insights(self, post_id: str, result: Dict) -> Dict:
+        """Turn a Graph API post response (insights, reactions, comments, shares) into analytics"""
+        analytics = {
+            "post_id": post_id,
+            "reach": 0,
+            "impressions": 0,
+            "engaged_users": 0,
+            "likes": 0,
+            "comments": 0,
+            "shares": 0,
+            "reactions": {}
+        }
 
-            # Get comments and shares
-            if "comments" in result and "summary" in result["comments"]:
-                analytics["comments"] = result["comments"]["summary"].get("total_count", 0)
+        # Get insights data
+        if "insights" in result and "data" in result["insights"]:
+            for insight in result["insights"]["data"]:
+                metric = insight["name"]
+                value = insight["values"][0]["value"] if insight.get("values") else 0
 
-            if "shares" in result:
-                analytics["shares"] = result["shares"].get("count", 0)
+                if metric == "post_impressions":
+                    analytics["impressions"] = value
+                elif metric == "post_engaged_users":
+                    analytics["engaged_users"] = value
+                elif metric == "post_reactions_by_type_total":
+                    analytics["reactions"] = value
+                    analytics["likes"] = sum(value.values()) if isinstance(value, dict) else 0
 
-            # Calculate engagement rate
-            if analytics["impressions"] > 0:
-                total_engagement = analytics["likes"] + analytics["comments"] + analytics["shares"]
-                analytics["engagement_rate"] = (total_engagement / analytics["impressions"]) * 100
+        # Get comments and shares
+        if "comments" in result and "summary" in result["comments"]:
+            analytics["comments"] = result["comments"]["summary"].get("total_count", 0)
 
-            analytics["fetched_at"] = datetime.utcnow().isoformat()
+        if "shares" in result:
+            analytics["shares"] = result["shares"].get("count", 0)
 
-            return analytics
+        # Calculate engagement rate
+        if analytics["impressions"] > 0:
+            total_engagement = analytics["likes"] + analytics["comments"] + analytics["shares"]
+            analytics["engagement_rate"] = (total_engagement / analytics["impressions"]) * 100
 
-        except Exception as e:
-            return {
-                "error": str(e)
-            }
+        analytics["fetched_at"] = datetime.utcnow().isoformat()
+
+        return analytics
 
     def get_page_insights(self, period: str = "day", metrics: list = None) -> Dict:
         """Get page-level insights"""
@@ -0,0 +1,117 @@
+"""
+Feed Cache Service
+Conditional GET (ETag / Last-Modified) validators for news sources
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.core.database import FeedCacheEntry
+
+
+class FeedCache:
+    """Persistent per-source validator cache, keyed by source URL"""
+
+    def load(self, db: Session, source_urls: List[str]) -> Dict[str, Dict]:
+        """Load cached validators for the given sources in one query"""
+        if not source_urls:
+            return {}
+
+        entries = db.query(FeedCacheEntry).filter(
+            FeedCacheEntry.source_url.in_(source_urls)
+        ).all()
+
+        return {
+            entry.source_url: {
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "content_hash": entry.content_hash
+            }
+            for entry in entries
+        }
+
+    def request_headers(self, validators: Dict) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from cached validators"""
+        headers = {}
+
+        if not validators:
+            return headers
+
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        return headers
+
+    def content_hash(self, body: bytes) -> str:
+        """Hash a feed body to detect unchanged content when the server ignores validators"""
+        return hashlib.sha256(body).hexdigest()
+
+    def record(self, db: Session, result: Dict):
+        """
+        Store validators and update counters after a feed was handled
+
+        Args:
+            result: Feed result from NewsAggregator (status, etag, last_modified,
+                    content_hash, http_status, bytes)
+        """
+        status = result.get("status")
+        if status == "error":
+            return
+
+        entry = db.query(FeedCacheEntry).filter(
+            FeedCacheEntry.source_url == result["source_url"]
+        ).first()
+
+        if not entry:
+            entry = FeedCacheEntry(source_url=result["source_url"], hits=0, misses=0, bytes_downloaded=0)
+            db.add(entry)
+
+        if status in ("not_modified", "unchanged"):
+            entry.hits = (entry.hits or 0) + 1
+        else:
+            entry.misses = (entry.misses or 0) + 1
+
+        # A 304 carries no body - keep the validators we already have
+        if status != "not_modified":
+            entry.etag = result.get("etag")
+            entry.last_modified = result.get("last_modified")
+            entry.content_hash = result.get("content_hash")
+
+        entry.bytes_downloaded = (entry.bytes_downloaded or 0) + result.get("bytes", 0)
+        entry.last_status = result.get("http_status")
+        entry.last_checked_at = datetime.utcnow()
+
+        db.commit()
+
+    def get_stats(self, db: Session) -> List[Dict]:
+        """Per-source hit/miss counters"""
+        entries = db.query(FeedCacheEntry).order_by(FeedCacheEntry.source_url).all()
+
+        stats = []
+        for entry in entries:
+            hits = entry.hits or 0
+            misses = entry.misses or 0
+            total = hits + misses
+
+            stats.append({
+                "source_url": entry.source_url,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "bytes_downloaded": entry.bytes_downloaded or 0,
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "last_status": entry.last_status,
+                "last_checked_at": entry.last_checked_at.isoformat() if entry.last_checked_at else None
+            })
+
+        return stats
+
+
+# Singleton instance
+feed_cache = FeedCache()
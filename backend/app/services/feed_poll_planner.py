@@ -0,0 +1,152 @@
+"""
+Feed Poll Planner
+Adaptive per-source polling: busy feeds are polled often, idle or failing feeds back off
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import FeedPollState
+
+
+class FeedPollPlanner:
+    """Learn each feed's publish rate and decide when it should be polled next"""
+
+    # Weight of the newest observation in the moving average of item gaps
+    GAP_SMOOTHING = 0.3
+
+    # Interval multiplier for each poll without new items / each failure
+    BACKOFF_FACTOR = 2.0
+
+    def __init__(self):
+        self.min_interval = settings.NEWS_POLL_MIN_INTERVAL
+        self.max_interval = settings.NEWS_POLL_MAX_INTERVAL
+        self.default_interval = settings.NEWS_FETCH_INTERVAL
+
+    def _clamp(self, minutes: float) -> float:
+        return max(self.min_interval, min(self.max_interval, minutes))
+
+    def _to_utc_naive(self, value: Optional[datetime]) -> Optional[datetime]:
+        """Feed dates may carry a timezone - store everything as naive UTC"""
+        if value is None:
+            return None
+        if value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def due_sources(self, db: Session, sources: List[str], now: datetime = None) -> List[str]:
+        """Return the sources whose next poll time has passed (unknown sources are always due)"""
+        now = now or datetime.utcnow()
+
+        states = {
+            state.source_url: state
+            for state in db.query(FeedPollState).filter(FeedPollState.source_url.in_(sources)).all()
+        } if sources else {}
+
+        return [
+            source_url for source_url in sources
+            if source_url not in states
+            or states[source_url].next_poll_at is None
+            or states[source_url].next_poll_at <= now
+        ]
+
+    def record_poll(self, db: Session, source_url: str, status: str, new_items: List[Dict], now: datetime = None):
+        """
+        Update a source's state after a poll
+
+        Args:
+            status: Feed result status ("new", "not_modified", "unchanged", "error")
+            new_items: Items from this poll that were not stored before
+        """
+        now = now or datetime.utcnow()
+
+        state = db.query(FeedPollState).filter(FeedPollState.source_url == source_url).first()
+        if not state:
+            state = FeedPollState(
+                source_url=source_url,
+                interval_minutes=float(self.default_interval),
+                consecutive_failures=0,
+                consecutive_idle=0
+            )
+            db.add(state)
+
+        interval = state.interval_minutes or float(self.default_interval)
+
+        if status == "error":
+            # Exponential backoff from the normal interval while the feed keeps failing
+            state.consecutive_failures = (state.consecutive_failures or 0) + 1
+            interval = interval * self.BACKOFF_FACTOR
+
+        elif new_items:
+            state.consecutive_failures = 0
+            state.consecutive_idle = 0
+            interval = self._learn_rate(state, new_items, now)
+
+        else:
+            # Reachable but quiet - back off gradually
+            state.consecutive_failures = 0
+            state.consecutive_idle = (state.consecutive_idle or 0) + 1
+            interval = interval * self.BACKOFF_FACTOR
+
+        state.interval_minutes = self._clamp(interval)
+        state.last_polled_at = now
+        state.next_poll_at = now + timedelta(minutes=state.interval_minutes)
+
+        db.commit()
+
+    def _learn_rate(self, state: FeedPollState, new_items: List[Dict], now: datetime) -> float:
+        """Fold the publish times of new items into the average item gap; returns the new interval"""
+        timestamps = sorted(
+            ts for ts in (self._to_utc_naive(item.get("published_at")) for item in new_items)
+            if ts is not None and ts <= now
+        )
+
+        if state.last_item_at:
+            timestamps = [ts for ts in timestamps if ts > state.last_item_at]
+            points = [state.last_item_at] + timestamps
+        else:
+            points = timestamps
+
+        gaps = [
+            (later - earlier).total_seconds() / 60
+            for earlier, later in zip(points, points[1:])
+        ]
+
+        avg_gap = state.avg_item_gap_minutes
+        for gap in gaps:
+            avg_gap = gap if avg_gap is None else (
+                self.GAP_SMOOTHING * gap + (1 - self.GAP_SMOOTHING) * avg_gap
+            )
+        state.avg_item_gap_minutes = avg_gap
+
+        if timestamps:
+            state.last_item_at = timestamps[-1]
+
+        # Aim for roughly one new item per poll
+        if avg_gap is None:
+            return float(self.default_interval)
+        return avg_gap
+
+    def get_status(self, db: Session) -> List[Dict]:
+        """Per-source polling state for the scheduler status endpoint"""
+        states = db.query(FeedPollState).order_by(FeedPollState.next_poll_at).all()
+
+        return [
+            {
+                "source_url": state.source_url,
+                "interval_minutes": round(state.interval_minutes or 0, 1),
+                "next_poll": state.next_poll_at.isoformat() if state.next_poll_at else None,
+                "last_polled": state.last_polled_at.isoformat() if state.last_polled_at else None,
+                "avg_item_gap_minutes": round(state.avg_item_gap_minutes, 1) if state.avg_item_gap_minutes else None,
+                "consecutive_failures": state.consecutive_failures or 0,
+                "consecutive_idle": state.consecutive_idle or 0
+            }
+            for state in states
+        ]
+
+
+# Singleton instance
+feed_poll_planner = FeedPollPlanner()
@@ -0,0 +1,304 @@
+"""
+Ingest Pipeline
+Staged RSS ingestion: fetch -> parse -> enrich -> persist, connected by bounded queues
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db_writer import db_writer
+from app.core.http_clients import http_clients
+from app.services.feed_cache_service import feed_cache
+from app.services.localization_service import localization_service
+
+STAGES = ("fetch", "parse", "enrich", "persist")
+
+# feedparser is blocking and CPU-bound - keep it off the event loop
+_parse_executor = ThreadPoolExecutor(
+    max_workers=settings.NEWS_PARSE_WORKERS,
+    thread_name_prefix="feed-parse"
+)
+
+
+class StageMetrics:
+    """Per-stage timings for one pipeline run"""
+
+    def __init__(self):
+        self.started_at = datetime.utcnow()
+        self.stages = {
+            stage: {"feeds": 0, "entries": 0, "busy_seconds": 0.0, "max_seconds": 0.0, "blocked_seconds": 0.0}
+            for stage in STAGES
+        }
+
+    def add(self, stage: str, seconds: float, entries: int = 0):
+        """Record one feed handled by a stage"""
+        metrics = self.stages[stage]
+        metrics["feeds"] += 1
+        metrics["entries"] += entries
+        metrics["busy_seconds"] += seconds
+        metrics["max_seconds"] = max(metrics["max_seconds"], seconds)
+
+    def blocked(self, stage: str, seconds: float):
+        """Record time a stage waited on a full downstream queue (back-pressure)"""
+        self.stages[stage]["blocked_seconds"] += seconds
+
+    def to_dict(self, wall_seconds: float, sources: int) -> Dict:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(wall_seconds, 3),
+            "sources": sources,
+            "stages": {
+                stage: {key: round(value, 3) if isinstance(value, float) else value for key, value in metrics.items()}
+                for stage, metrics in self.stages.items()
+            }
+        }
+
+
+class FeedIngestPipeline:
+    """
+    Run RSS ingestion as four concurrent stages
+
+    fetch:   async downloads (conditional GET), bounded by NEWS_FETCH_CONCURRENCY
+    parse:   feedparser in a thread pool
+    enrich:  HTML cleanup, image, localization and category in a process pool
+    persist: one consumer handing each feed to the database writer as soon as it is enriched
+
+    Feeds flow through bounded queues, so a slow stage applies back-pressure
+    instead of piling up parsed feeds in memory. 304 / unchanged / failed
+    feeds go straight to persist to update the feed cache and poll planner.
+    """
+
+    def __init__(self):
+        self._enrich_pool = None
+        self._pool_lock = threading.Lock()
+        self.last_run: Dict = {}
+        self.totals = {stage: {"feeds": 0, "entries": 0, "busy_seconds": 0.0} for stage in STAGES}
+        self.runs = 0
+
+    def _enrich_executor(self):
+        """Process pool for enrichment, started on first use (threads when disabled)"""
+        if settings.NEWS_ENRICH_PROCESSES <= 0:
+            return _parse_executor
+
+        with self._pool_lock:
+            if self._enrich_pool is None:
+                # spawn: forking a process that runs the scheduler and thread pools is unsafe
+                self._enrich_pool = ProcessPoolExecutor(
+                    max_workers=settings.NEWS_ENRICH_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._enrich_pool
+
+    def _reset_enrich_pool(self):
+        with self._pool_lock:
+            if self._enrich_pool is not None:
+                self._enrich_pool.shutdown(wait=False, cancel_futures=True)
+                self._enrich_pool = None
+
+    def shutdown(self):
+        """Stop the enrichment worker processes"""
+        self._reset_enrich_pool()
+
+    async def run(self, aggregator, db: Session = None, sources: List[str] = None, save: bool = True) -> Dict:
+        """
+        Fetch, parse, enrich and (optionally) save RSS sources
+
+        Args:
+            aggregator: NewsAggregator providing the per-stage operations
+            db: Session for sources, keyword settings and the feed cache (saving goes through db_writer)
+            sources: Explicit source list (default: configured sources)
+            save: Persist items; when False they are collected and returned instead
+
+        Returns:
+            {"fetched", "saved", "skipped_sources", "items" (only when not saving), "metrics"}
+        """
+        # Lazy: news_service imports this module
+        from app.services.news_service import enrich_feed_entries
+
+        summary = {"fetched": 0, "saved": 0, "skipped_sources": 0, "items": [], "metrics": {}}
+
+        # Settings and cache reads are blocking: they run in a worker thread
+        if sources is None:
+            # Get news sources from database if db session provided, otherwise use default
+            sources = await asyncio.to_thread(aggregator._get_news_sources, db) if db else aggregator.sources
+
+        if not sources:
+            return summary
+
+        if db:
+            await asyncio.to_thread(aggregator._load_keyword_settings, db)
+        keyword_lists = (localization_service.vietnamese_keywords, localization_service.international_keywords)
+
+        cached = await asyncio.to_thread(feed_cache.load, db, sources) if (db and save) else {}
+
+        metrics = StageMetrics()
+        run_started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+
+        size = settings.NEWS_PIPELINE_QUEUE_SIZE
+        parse_queue = asyncio.Queue(maxsize=size)
+        enrich_queue = asyncio.Queue(maxsize=size)
+        persist_queue = asyncio.Queue(maxsize=size)
+
+        async def put(stage: str, queue: asyncio.Queue, result: Dict):
+            started = time.perf_counter()
+            await queue.put(result)
+            metrics.blocked(stage, time.perf_counter() - started)
+
+        async def fetch_one(client, semaphore, source_url: str):
+            # Global cap on concurrent downloads; only the download itself is timed
+            async with semaphore:
+                started = time.perf_counter()
+                result = await aggregator._fetch_source(client, source_url, cached.get(source_url))
+                metrics.add("fetch", time.perf_counter() - started)
+
+            next_queue = parse_queue if result["status"] == "new" else persist_queue
+            await put("fetch", next_queue, result)
+
+        async def fetch_stage():
+            semaphore = asyncio.Semaphore(settings.NEWS_FETCH_CONCURRENCY)
+            # Keep-alive pool shared across runs on this loop
+            client = http_clients.get("news", aggregator._http_client)
+            await asyncio.gather(*(fetch_one(client, semaphore, url) for url in sources))
+
+        async def parse_worker():
+            while True:
+                result = await parse_queue.get()
+                if result is None:
+                    return
+
+                started = time.perf_counter()
+                try:
+                    result["source_name"], result["entries"] = await loop.run_in_executor(
+                        _parse_executor,
+                        aggregator._parse_feed,
+                        result["source_url"],
+                        result.pop("body"),
+                        result.pop("content_type", "")
+                    )
+                    next_queue = enrich_queue
+                except Exception as e:
+                    print(f"❌ Error parsing {result['source_url']}: {str(e)}")
+                    result["status"] = "error"
+                    next_queue = persist_queue
+
+                metrics.add("parse", time.perf_counter() - started, len(result.get("entries", [])))
+                await put("parse", next_queue, result)
+
+        async def enrich_worker():
+            while True:
+                result = await enrich_queue.get()
+                if result is None:
+                    return
+
+                started = time.perf_counter()
+                entries = result.pop("entries")
+                try:
+                    result["items"] = await loop.run_in_executor(
+                        self._enrich_executor(),
+                        enrich_feed_entries,
+                        result.pop("source_name"),
+                        entries,
+                        keyword_lists
+                    )
+                    print(f"✅ Fetched {len(result['items'])} articles from {result['source_url']}")
+                except Exception as e:
+                    print(f"❌ Error enriching {result['source_url']}: {str(e)}")
+                    if isinstance(e, BrokenProcessPool):
+                        self._reset_enrich_pool()
+                    result["status"] = "error"
+
+                metrics.add("enrich", time.perf_counter() - started, len(entries))
+                await put("enrich", persist_queue, result)
+
+        async def persist(result: Dict):
+            started = time.perf_counter()
+
+            try:
+                # Feeds that finish together are written in one writer batch
+                new_items = await db_writer.run(lambda write_db: aggregator._persist_feed_result(write_db, result))
+                summary["saved"] += len(new_items)
+            except Exception as e:
+                print(f"❌ Error saving {result['source_url']}: {str(e)}")
+
+            metrics.add("persist", time.perf_counter() - started, len(result["items"]))
+
+        async def persist_worker():
+            writes = []
+
+            while True:
+                result = await persist_queue.get()
+                if result is None:
+                    await asyncio.gather(*writes)
+                    return
+
+                if result["status"] in ("not_modified", "unchanged"):
+                    summary["skipped_sources"] += 1
+
+                summary["fetched"] += len(result["items"])
+
+                if save:
+                    writes.append(asyncio.create_task(persist(result)))
+                else:
+                    summary["items"].extend(result["items"])
+
+        parsers = [asyncio.create_task(parse_worker()) for _ in range(settings.NEWS_PARSE_WORKERS)]
+        enrichers = [
+            asyncio.create_task(enrich_worker())
+            for _ in range(settings.NEWS_ENRICH_PROCESSES or settings.NEWS_PARSE_WORKERS)
+        ]
+        persister = asyncio.create_task(persist_worker())
+
+        try:
+            await fetch_stage()
+            # Each stage is told to stop only once everything upstream is done
+            for queue, workers in ((parse_queue, parsers), (enrich_queue, enrichers), (persist_queue, [persister])):
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+        finally:
+            for task in parsers + enrichers + [persister]:
+                task.cancel()
+
+        summary["metrics"] = self._finish_run(metrics, time.perf_counter() - run_started, len(sources))
+        return summary
+
+    def _finish_run(self, metrics: StageMetrics, wall_seconds: float, sources: int) -> Dict:
+        run = metrics.to_dict(wall_seconds, sources)
+
+        self.runs += 1
+        self.last_run = run
+        for stage, stage_metrics in metrics.stages.items():
+            for key in self.totals[stage]:
+                self.totals[stage][key] += stage_metrics[key]
+
+        busy = ", ".join(
+            f"{stage} {stage_metrics['busy_seconds']:.2f}s" for stage, stage_metrics in metrics.stages.items()
+        )
+        print(f"⏱️ Ingested {sources} sources in {wall_seconds:.2f}s ({busy})")
+
+        return run
+
+    def get_stats(self) -> Dict:
+        """Stage timings of the last run and totals since startup"""
+        return {
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "totals": {
+                stage: {key: round(value, 3) if isinstance(value, float) else value for key, value in totals.items()}
+                for stage, totals in self.totals.items()
+            }
+        }
+
+
+# Singleton instance
+feed_pipeline = FeedIngestPipeline()
@@ -0,0 +1,277 @@
+"""
+Insights Collector
+Batched Graph API post insights: up to 50 posts per call, a few calls in flight, one bulk upsert
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import httpx
+from sqlalchemy import insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import PostAnalytics
+from app.core.http_clients import http_clients
+from app.services.facebook_service import facebook_service, POST_INSIGHTS_FIELDS
+
+# Graph API error codes: throttling (app, user, page, custom, page BUC) and transient errors
+RATE_LIMIT_CODES = {4, 17, 32, 613, 80001}
+TRANSIENT_CODES = {1, 2}
+
+RATE_LIMIT_PAUSE = 60.0  # seconds to back off after a throttling error
+MAX_RATE_WAIT = 300.0  # longer pauses end the run - the next hourly run picks the rest up
+
+
+class InsightsCollector:
+    """
+    Fetch post insights through the Graph API batch endpoint
+
+    Post IDs are split into batches of FB_BATCH_SIZE sub-requests and sent
+    by at most FB_BATCH_CONCURRENCY workers. A batch retries only the posts
+    that failed with a transient or throttling error, with exponential
+    backoff; throttling (error codes or X-App-Usage near the limit) pauses
+    every worker.
+    """
+
+    def __init__(self):
+        self._resume_at = 0.0  # time.monotonic() when throttling ends
+        self.last_run: Dict = {}
+
+    def _http_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=settings.FB_REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.FB_BATCH_CONCURRENCY,
+                max_keepalive_connections=settings.FB_BATCH_CONCURRENCY
+            )
+        )
+
+    # ---- Rate limits -------------------------------------------------------
+
+    def _back_off(self, seconds: float):
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _update_usage(self, headers: httpx.Headers):
+        """Back off when X-App-Usage / X-Business-Use-Case-Usage approach the limit"""
+        usages = []
+        try:
+            if "x-app-usage" in headers:
+                usages.append(json.loads(headers["x-app-usage"]))
+            if "x-business-use-case-usage" in headers:
+                for entries in json.loads(headers["x-business-use-case-usage"]).values():
+                    usages.extend(entries)
+        except (ValueError, AttributeError):
+            return
+
+        for usage in usages:
+            percent = max(usage.get(key) or 0 for key in ("call_count", "total_cputime", "total_time"))
+            if percent >= settings.FB_RATE_LIMIT_THRESHOLD:
+                # estimated_time_to_regain_access is in minutes
+                regain = (usage.get("estimated_time_to_regain_access") or 0) * 60
+                print(f"⏳ Graph API usage at {percent}%, backing off")
+                self._back_off(regain or RATE_LIMIT_PAUSE)
+
+    async def _wait_for_rate_limit(self) -> bool:
+        """Sleep while throttled; False if the pause is too long for this run"""
+        wait = self._resume_at - time.monotonic()
+        if wait > MAX_RATE_WAIT:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    # ---- Fetching ----------------------------------------------------------
+
+    async def _fetch_batch(
+        self,
+        client: httpx.AsyncClient,
+        post_ids: List[str],
+        stats: Dict,
+        errors: Dict[str, str]
+    ) -> Dict[str, Dict]:
+        """Insights for one batch of posts, retrying the failed sub-requests (per-post errors go to errors)"""
+        results = {}
+        pending = list(post_ids)
+
+        for attempt in range(settings.FB_BATCH_RETRIES + 1):
+            if attempt:
+                stats["retries"] += 1
+                await asyncio.sleep(min(2 ** (attempt - 1), 30))
+
+            if not await self._wait_for_rate_limit():
+                print("⏳ Graph API throttled for too long - stopping this run")
+                break
+
+            batch = [
+                {"method": "GET", "relative_url": f"{facebook_service.full_post_id(post_id)}?fields={POST_INSIGHTS_FIELDS}"}
+                for post_id in pending
+            ]
+
+            stats["calls"] += 1
+            try:
+                response = await client.post(
+                    f"{facebook_service.graph_url}/",
+                    data={
+                        "access_token": facebook_service.access_token,
+                        "batch": json.dumps(batch),
+                        "include_headers": "false"
+                    }
+                )
+            except httpx.HTTPError as e:
+                print(f"⚠️ Graph API batch failed: {str(e)}")
+                continue
+
+            self._update_usage(response.headers)
+
+            if response.status_code != 200:
+                try:
+                    code = response.json().get("error", {}).get("code")
+                except ValueError:
+                    code = None
+
+                if response.status_code == 429 or code in RATE_LIMIT_CODES:
+                    self._back_off(RATE_LIMIT_PAUSE)
+                    continue
+                if response.status_code >= 500 or code in TRANSIENT_CODES:
+                    continue
+
+                # Bad token, permissions... - retrying will not help
+                print(f"❌ Graph API batch returned HTTP {response.status_code}: {response.text[:200]}")
+                break
+
+            retry = []
+            for post_id, item in zip(pending, response.json()):
+                # null: the sub-request did not complete in time
+                if item is None:
+                    retry.append(post_id)
+                    continue
+
+                try:
+                    body = json.loads(item.get("body") or "{}")
+                except ValueError:
+                    body = {}
+
+                if item.get("code") == 200:
+                    full_post_id = facebook_service.full_post_id(post_id)
+                    results[post_id] = facebook_service.parse_post_insights(full_post_id.split("_")[1], body)
+                    continue
+
+                code = body.get("error", {}).get("code")
+                if code in RATE_LIMIT_CODES:
+                    self._back_off(RATE_LIMIT_PAUSE)
+                    retry.append(post_id)
+                elif code in TRANSIENT_CODES or item.get("code", 0) >= 500:
+                    retry.append(post_id)
+                else:
+                    errors[post_id] = str(body.get("error", {}).get("message", item.get("code")))
+                    print(f"⚠️ No insights for {post_id}: {errors[post_id]}")
+
+            pending = retry
+            if not pending:
+                break
+
+        return results
+
+    async def collect(self, post_ids: List[str]) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+        """
+        Insights for many posts
+
+        Returns:
+            ({fb_post_id: analytics} (see FacebookService.parse_post_insights),
+             {fb_post_id: error message} for posts the Graph API answered with an error).
+            Posts in neither were not fetched this run (no token, whole batch rejected,
+            throttled, transient errors) and are worth trying again.
+        """
+        post_ids = list(dict.fromkeys(post_id for post_id in post_ids if post_id))
+        if not post_ids or not facebook_service.access_token:
+            return {}, {}
+
+        started = time.perf_counter()
+        client = http_clients.get("facebook", self._http_client)
+        semaphore = asyncio.Semaphore(settings.FB_BATCH_CONCURRENCY)
+
+        size = settings.FB_BATCH_SIZE
+        batches = [post_ids[i:i + size] for i in range(0, len(post_ids), size)]
+        stats = {"posts": len(post_ids), "batches": len(batches), "calls": 0, "retries": 0}
+        results = {}
+        errors = {}
+
+        async def run_batch(batch: List[str]):
+            async with semaphore:
+                results.update(await self._fetch_batch(client, batch, stats, errors))
+
+        await asyncio.gather(*(run_batch(batch) for batch in batches))
+
+        stats["fetched"] = len(results)
+        stats["failed"] = len(errors)
+        stats["not_fetched"] = len(post_ids) - len(results) - len(errors)
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        stats["finished_at"] = datetime.utcnow().isoformat()
+        self.last_run = stats
+
+        print(f"📊 Insights for {len(results)}/{len(post_ids)} posts in {stats['calls']} batch calls ({stats['seconds']:.2f}s)")
+        return results, errors
+
+    # ---- Saving ------------------------------------------------------------
+
+    def save(self, db: Session, posts: List, results: Dict[str, Dict]) -> int:
+        """
+        Bulk upsert insights into PostAnalytics (one row per post)
+
+        Args:
+            posts: Posts the insights were collected for (anything with id and fb_post_id)
+            results: Output of collect()
+
+        Returns:
+            Number of posts updated
+        """
+        fetched_at = datetime.utcnow()
+        rows = []
+
+        for post in posts:
+            analytics = results.get(post.fb_post_id)
+            if not analytics:
+                continue
+
+            rows.append({
+                "post_id": post.id,
+                "platform": "facebook",
+                "fb_post_id": post.fb_post_id,
+                "reach": analytics.get("reach", 0),
+                "impressions": analytics.get("impressions", 0),
+                "likes": analytics.get("likes", 0),
+                "comments": analytics.get("comments", 0),
+                "shares": analytics.get("shares", 0),
+                "engagement_rate": analytics.get("engagement_rate", 0.0),
+                "fetched_at": fetched_at
+            })
+
+        if not rows:
+            return 0
+
+        # One lookup for every post; the oldest row per post is the one kept up to date
+        existing = dict(
+            db.query(PostAnalytics.post_id, PostAnalytics.id).filter(
+                PostAnalytics.post_id.in_([row["post_id"] for row in rows]),
+                or_(PostAnalytics.platform == "facebook", PostAnalytics.platform.is_(None))
+            ).order_by(PostAnalytics.id.desc()).all()
+        )
+
+        updates = [{"id": existing[row["post_id"]], **row} for row in rows if row["post_id"] in existing]
+        inserts = [row for row in rows if row["post_id"] not in existing]
+
+        if updates:
+            db.execute(update(PostAnalytics), updates)
+        if inserts:
+            db.execute(insert(PostAnalytics), inserts)
+        db.commit()
+
+        return len(rows)
+
+
+# Singleton instance
+insights_collector = InsightsCollector()
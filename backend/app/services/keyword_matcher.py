@@ -0,0 +1,95 @@
+"""
+Keyword Matcher
+Shared multi-class keyword matching for localization, news categorization and viral prediction
+"""
+
+from typing import Dict, FrozenSet, Iterable, Optional, Sequence, Set, Tuple
+
+
+class KeywordMatcher:
+    """
+    Match a text against several named keyword classes in one call
+
+    Keyword lists are compiled once into lowercase, de-duplicated tuples
+    (single accented characters into a set) and recompiled only when they change.
+    Matching keeps substring semantics ("keyword in text"): CPython's C-level
+    substring search beats a combined alternation regex or a pure-Python
+    Aho-Corasick automaton for lists of this size.
+    """
+
+    def __init__(self, keyword_classes: Dict[str, Iterable[str]] = None):
+        self._signature: Optional[Tuple] = None
+        # class name -> (keywords, single accented characters)
+        self._compiled: Dict[str, Tuple[Tuple[str, ...], FrozenSet[str]]] = {}
+        self.update(keyword_classes or {})
+
+    def update(self, keyword_classes: Dict[str, Iterable[str]]) -> bool:
+        """Recompile if the keyword lists changed; returns True when rebuilt"""
+        signature = tuple(
+            (name, tuple(keywords)) for name, keywords in keyword_classes.items()
+        )
+
+        if signature == self._signature:
+            return False
+
+        compiled = {}
+
+        for name, class_keywords in signature:
+            unique = dict.fromkeys(k.lower() for k in class_keywords if k)
+            accented_chars = frozenset(k for k in unique if len(k) == 1 and not k.isascii())
+            compiled[name] = (
+                tuple(k for k in unique if k not in accented_chars),
+                accented_chars
+            )
+
+        # Single assignment so concurrent readers never see a half-built matcher
+        self._compiled = compiled
+        self._signature = signature
+        return True
+
+    @property
+    def classes(self) -> Tuple[str, ...]:
+        return tuple(self._compiled)
+
+    def _class_matches(self, compiled: Tuple[Tuple[str, ...], FrozenSet[str]], text: str) -> bool:
+        keywords, chars = compiled
+        # ASCII-only text can't contain any of the accented characters
+        if chars and not text.isascii() and not chars.isdisjoint(text):
+            return True
+
+        for keyword in keywords:
+            if keyword in text:
+                return True
+
+        return False
+
+    def match(self, text: str, classes: Sequence[str] = None) -> Set[str]:
+        """
+        Return every keyword class with at least one match in text
+
+        Args:
+            text: Text to scan (lowercased here)
+            classes: Only check these classes (default: all)
+        """
+        if not text:
+            return set()
+
+        text = text.lower()
+        compiled = self._compiled
+        return {
+            name for name in (classes or compiled)
+            if name in compiled and self._class_matches(compiled[name], text)
+        }
+
+    def first_match(self, text: str, classes: Sequence[str]) -> Optional[str]:
+        """Return the first class (in the given priority order) that matches text"""
+        if not text:
+            return None
+
+        text = text.lower()
+        compiled = self._compiled
+        for name in classes:
+            if name in compiled and self._class_matches(compiled[name], text):
+                return name
+
+        return None
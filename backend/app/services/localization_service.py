@@ -4,44 +4,57 @@ Adds Vietnamese perspective and unique angles to news
 """
 
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from app.core.config import settings
+from app.services.keyword_matcher import KeywordMatcher
 
 
 class LocalizationService:
     """Add Vietnamese angle and unique perspective to content"""
 
+    # Vietnamese diacritics (accented characters) - any of them marks Vietnamese text
+    VIETNAMESE_CHARS = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
+
     def __init__(self):
         self.vietnamese_keywords = settings.VIETNAMESE_KEYWORDS
         self.international_keywords = settings.INTERNATIONAL_KEYWORDS
+        self.matcher = KeywordMatcher()
+        self._compile()
+
+    def set_keywords(self, vietnamese_keywords: List[str] = None, international_keywords: List[str] = None):
+        """Replace keyword lists (e.g. from settings) and recompile the matcher if they changed"""
+        if vietnamese_keywords is not None:
+            self.vietnamese_keywords = vietnamese_keywords
+        if international_keywords is not None:
+            self.international_keywords = international_keywords
+        self._compile()
+
+    def _compile(self):
+        """Keyword matcher for the current lists - built here, not per call, so matching stays one lookup"""
+        self.matcher.update({
+            # Method 1: Vietnamese diacritics, Method 2: Vietnamese keywords
+            "vietnamese": list(self.VIETNAMESE_CHARS) + list(self.vietnamese_keywords),
+            "international": self.international_keywords
+        })
 
     def is_vietnamese_content(self, text: str) -> bool:
         """Check if content is Vietnamese-related"""
-        text_lower = text.lower()
-
-        # Method 1: Check for Vietnamese diacritics (accented characters)
-        vietnamese_chars = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
-        has_vietnamese_chars = any(char in text_lower for char in vietnamese_chars)
-
-        # Method 2: Check for Vietnamese keywords
-        has_keywords = any(keyword in text_lower for keyword in self.vietnamese_keywords)
-
-        return has_vietnamese_chars or has_keywords
+        return bool(self.matcher.match(text, ("vietnamese",)))
 
     def is_international_content(self, text: str) -> bool:
         """Check if content is international"""
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.international_keywords)
+        return bool(self.matcher.match(text, ("international",)))
 
     def categorize_content(self, title: str, description: str = "") -> str:
         """
         Categorize content type
         Returns: "vietnamese" | "international" | "mixed"
         """
-        combined_text = f"{title} {description}".lower()
+        combined_text = f"{title} {description}"
 
-        has_vn = self.is_vietnamese_content(combined_text)
-        has_intl = self.is_international_content(combined_text)
+        matched = self.matcher.match(combined_text)
+        has_vn = "vietnamese" in matched
+        has_intl = "international" in matched
 
         if has_vn and not has_intl:
             return "vietnamese"
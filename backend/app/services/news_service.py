@@ -3,19 +3,120 @@ News Aggregator Service
 Automatically fetch news from multiple sources (RSS, Twitter, web scraping)
 """
 
+import asyncio
 import feedparser
-import requests
+import html
+import httpx
+import lxml.html
 import re
 from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-from typing import List, Dict
+from datetime import datetime
+from typing import List, Dict, Optional, Set, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.database import NewsArticle, AppSettings
+from app.core.database import NewsArticle, NewsStoryMember, AppSettings
+from app.core.db_writer import db_writer
 from app.services.localization_service import localization_service
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.story_dedup_service import story_deduplicator
+from app.services.trending_terms_service import trending_terms
+from app.services.feed_cache_service import feed_cache
+from app.services.feed_poll_planner import feed_poll_planner
+from app.services.ingest_pipeline import feed_pipeline
 import json
 
+# Title keywords per news category, checked in this order
+NEWS_CATEGORY_KEYWORDS = {
+    "transfer": ["transfer", "signs", "joins", "linked"],
+    "match_result": ["vs", "wins", "loses", "draw", "goal", "score"],
+    "injury": ["injury", "injured", "out", "sidelined"],
+    "drama": ["drama", "controversy", "ban", "suspended"],
+    "achievement": ["record", "milestone", "achievement"],
+}
+NEWS_CATEGORY_PRIORITY = tuple(NEWS_CATEGORY_KEYWORDS)
+_category_matcher = KeywordMatcher(NEWS_CATEGORY_KEYWORDS)
+
+# Max URLs per IN (...) lookup - stays below SQLite's bound-parameter limit
+URL_LOOKUP_CHUNK_SIZE = 500
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _html_text_and_image(markup: str) -> Tuple[str, Optional[str]]:
+    """
+    Plain text and first absolute <img> URL of an HTML snippet, from a single lxml parse
+
+    Plain-text snippets skip parsing entirely; markup lxml rejects falls back
+    to BeautifulSoup.
+    """
+    if not markup:
+        return "", None
+
+    if "<" not in markup:
+        return _WHITESPACE_RE.sub(" ", html.unescape(markup)).strip(), None
+
+    try:
+        root = lxml.html.fragment_fromstring(markup, create_parent="div")
+        text = root.text_content()
+        image_url = next(
+            (src for src in (img.get("src") for img in root.iter("img")) if src and src.startswith("http")),
+            None
+        )
+    except Exception:
+        soup = BeautifulSoup(markup, "html.parser")
+        text = soup.get_text()
+        img = soup.find("img", src=re.compile(r"^http"))
+        image_url = img["src"] if img else None
+
+    return _WHITESPACE_RE.sub(" ", text).strip(), image_url
+
+
+def enrich_feed_entries(source_name: str, entries: List[Dict], keyword_lists: Tuple = None) -> List[Dict]:
+    """
+    Turn parsed feed entries into news items (HTML cleanup, image, localization, category)
+
+    Module-level so it can run in the enrichment process pool; keyword_lists
+    carries the localization keywords loaded from settings in the parent.
+    """
+    if keyword_lists:
+        localization_service.set_keywords(*keyword_lists)
+
+    news_items = []
+
+    for entry in entries:
+        title = entry["title"]
+        description, summary_image = _html_text_and_image(entry["summary"])
+
+        # Image: media/enclosures, then <img> in summary or content, then image links
+        image_url = entry["media_image"] or summary_image
+        if not image_url and entry["content"]:
+            image_url = _html_text_and_image(entry["content"])[1]
+        image_url = image_url or entry["link_image"]
+        print(f"  📷 Image for '{title[:50]}...': {image_url or 'NO IMAGE'}")
+
+        # Add Vietnamese localization
+        content_category = localization_service.categorize_content(title, description)
+        vn_angle_data = localization_service.add_vietnamese_angle(title, description, content_category)
+
+        news_items.append({
+            "title": title,
+            "description": description,
+            "url": entry["link"],
+            "source": source_name,
+            "image_url": image_url,
+            "published_at": entry["published_at"],
+            "category": _category_matcher.first_match(title, NEWS_CATEGORY_PRIORITY) or "general",
+            # Vietnamese localization fields
+            "content_category": content_category,  # vietnamese | international | mixed
+            "vn_angle": vn_angle_data.get("angle", ""),
+            "hashtags": json.dumps(vn_angle_data.get("hashtags", []))  # Convert list to JSON string
+        })
+
+    return news_items
+
 class NewsAggregator:
     """Aggregate football news from multiple sources"""
 
@@ -24,14 +125,7 @@ class NewsAggregator:
 
     def _strip_html(self, text: str) -> str:
         """Remove HTML tags from text"""
-        if not text:
-            return ""
-        # Remove HTML tags
-        soup = BeautifulSoup(text, "html.parser")
-        text = soup.get_text()
-        # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return _html_text_and_image(text)[0]
 
     def _get_news_sources(self, db: Session) -> List[str]:
         """Get news sources from database settings or use default from config"""
@@ -48,54 +142,176 @@ class NewsAggregator:
         # Fallback to config
         return settings.NEWS_SOURCES
 
+    def _load_keyword_settings(self, db: Session):
+        """Apply localization keyword lists saved in settings (matcher rebuilds if they changed)"""
+        keyword_lists = {}
+
+        try:
+            rows = db.query(AppSettings).filter(
+                AppSettings.key.in_(["vietnamese_keywords", "international_keywords"])
+            ).all()
+            for row in rows:
+                if row.value:
+                    keyword_lists[row.key] = json.loads(row.value)
+        except Exception as e:
+            print(f"⚠️ Could not load keywords from database: {e}")
+
+        localization_service.set_keywords(
+            keyword_lists.get("vietnamese_keywords"),
+            keyword_lists.get("international_keywords")
+        )
+
+    def _http_client(self) -> httpx.AsyncClient:
+        """Pooled async HTTP client shared by every source and fetch run"""
+        return httpx.AsyncClient(
+            headers={"User-Agent": settings.NEWS_USER_AGENT},
+            follow_redirects=True,
+            timeout=settings.NEWS_FETCH_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.NEWS_FETCH_CONCURRENCY,
+                max_keepalive_connections=settings.NEWS_FETCH_CONCURRENCY
+            )
+        )
+
+    async def _download_feed(
+        self,
+        client: httpx.AsyncClient,
+        source_url: str,
+        headers: Dict[str, str] = None
+    ) -> httpx.Response:
+        """Download one feed, bounded by the per-source timeout"""
+        print(f"📰 Fetching from: {source_url}")
+        response = await asyncio.wait_for(
+            client.get(source_url, headers=headers),
+            timeout=settings.NEWS_FETCH_TIMEOUT
+        )
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def _parse_feed(self, source_url: str, body: bytes, content_type: str = "") -> Tuple[str, List[Dict]]:
+        """
+        Parse a downloaded feed (runs in the parse worker pool)
+
+        Returns the feed title and plain-dict entries holding only what
+        enrichment needs, so they are cheap to hand to another process.
+        """
+        feed = feedparser.parse(body, response_headers={
+            "content-type": content_type or "application/xml",
+            "content-location": source_url
+        })
+
+        entries = [self._entry_fields(entry) for entry in feed.entries[:10]]  # Get latest 10 articles
+        return feed.feed.get("title", "Unknown"), entries
+
+    def _entry_fields(self, entry: Dict) -> Dict:
+        """Pick the fields of a feedparser entry used by enrich_feed_entries"""
+        content = entry.get("content")
+        if isinstance(content, list):
+            content = content[0].get("value", "") if content else ""
+
+        return {
+            "title": entry.get("title", ""),
+            "link": entry.get("link", ""),
+            "summary": entry.get("summary", ""),
+            "content": str(content or ""),
+            "published_at": self._parse_date(entry.get("published")),
+            "media_image": self._media_image(entry),
+            "link_image": self._link_image(entry)
+        }
+
+    async def _fetch_source(
+        self,
+        client: httpx.AsyncClient,
+        source_url: str,
+        validators: Dict = None
+    ) -> Dict:
+        """
+        Download one source (fetch stage of the ingest pipeline)
+
+        Returns a feed result dict with:
+            status: "new" | "not_modified" | "unchanged" | "error"
+            body, content_type: the downloaded feed when status is "new"
+            items: filled in by the later pipeline stages
+            plus the validators needed to update the feed cache
+        """
+        result = {
+            "source_url": source_url,
+            "status": "error",
+            "items": [],
+            "http_status": None,
+            "bytes": 0
+        }
+
+        try:
+            response = await self._download_feed(
+                client, source_url,
+                headers=feed_cache.request_headers(validators)
+            )
+            result["http_status"] = response.status_code
+
+            # Server confirmed nothing changed - skip parsing, localization and DB work
+            if response.status_code == 304:
+                print(f"💤 Not modified: {source_url}")
+                result["status"] = "not_modified"
+                return result
+
+            body = response.content
+            result.update({
+                "bytes": len(body),
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "content_hash": feed_cache.content_hash(body)
+            })
+
+            # Server ignored validators but sent the same body again
+            if validators and validators.get("content_hash") == result["content_hash"]:
+                print(f"💤 Unchanged: {source_url}")
+                result["status"] = "unchanged"
+                return result
+
+            result.update({
+                "status": "new",
+                "body": body,
+                "content_type": response.headers.get("content-type", "")
+            })
+
+        except asyncio.TimeoutError:
+            print(f"❌ Timeout fetching from {source_url} after {settings.NEWS_FETCH_TIMEOUT}s")
+        except Exception as e:
+            print(f"❌ Error fetching from {source_url}: {str(e)}")
+
+        return result
+
     async def fetch_rss_feeds(self, db: Session = None) -> List[Dict]:
-        """Fetch news from RSS feeds"""
-        all_news = []
+        """Fetch news from RSS feeds (without saving)"""
+        result = await feed_pipeline.run(self, db, save=False)
+        return result["items"]
 
-        # Get news sources from database if db session provided, otherwise use default
-        sources = self._get_news_sources(db) if db else self.sources
+    async def fetch_and_save_rss(self, db: Session, sources: List[str] = None) -> Dict[str, int]:
+        """
+        Fetch RSS feeds through the staged ingest pipeline and save each feed as soon as it is ready
 
-        for source_url in sources:
-            try:
-                print(f"📰 Fetching from: {source_url}")
-                feed = feedparser.parse(source_url)
-
-                for entry in feed.entries[:10]:  # Get latest 10 articles
-                    image_url = self._extract_image(entry)
-                    print(f"  📷 Image for '{entry.get('title', '')[:50]}...': {image_url or 'NO IMAGE'}")
-
-                    title = entry.get("title", "")
-                    description_raw = entry.get("summary", "")
-
-                    # Clean HTML from description
-                    description = self._strip_html(description_raw)
-
-                    # Add Vietnamese localization
-                    content_category = localization_service.categorize_content(title, description)
-                    vn_angle_data = localization_service.add_vietnamese_angle(title, description, content_category)
-
-                    news_item = {
-                        "title": title,
-                        "description": description,
-                        "url": entry.get("link", ""),
-                        "source": feed.feed.get("title", "Unknown"),
-                        "image_url": image_url,
-                        "published_at": self._parse_date(entry.get("published")),
-                        "category": self._categorize_news(title),
-                        # Vietnamese localization fields
-                        "content_category": content_category,  # vietnamese | international | mixed
-                        "vn_angle": vn_angle_data.get("angle", ""),
-                        "hashtags": json.dumps(vn_angle_data.get("hashtags", []))  # Convert list to JSON string
-                    }
-                    all_news.append(news_item)
-
-                print(f"✅ Fetched {len(feed.entries[:10])} articles from {feed.feed.get('title', 'Unknown')}")
-
-            except Exception as e:
-                print(f"❌ Error fetching from {source_url}: {str(e)}")
-                continue
+        Uses the feed cache, so feeds that did not change since the last poll
+        cost one conditional request and nothing else. Every outcome is fed to
+        the adaptive poll planner. Fetches every configured source unless an
+        explicit list is given.
+        """
+        result = await feed_pipeline.run(self, db, sources=sources)
+        return {key: result[key] for key in ("fetched", "saved", "skipped_sources")}
+
+    def _persist_feed_result(self, db: Session, result: Dict) -> List[Dict]:
+        """Persist stage: save a feed's items, then its cache validators and poll outcome"""
+        new_items = []
+
+        if result["items"]:
+            new_items = self._insert_new_articles(db, result["items"])
+
+        # Only store new validators once the feed's items are safely saved
+        feed_cache.record(db, result)
+        feed_poll_planner.record_poll(db, result["source_url"], result["status"], new_items)
 
-        return all_news
+        return new_items
 
     async def fetch_twitter_trends(self) -> List[Dict]:
         """Fetch trending football topics from Twitter/X"""
@@ -117,75 +333,77 @@ class NewsAggregator:
 
         return trending_topics
 
-    async def scrape_reddit_soccer(self) -> List[Dict]:
-        """Scrape top posts from r/soccer"""
-        reddit_news = []
+    def save_to_database(self, db: Session, news_items: List[Dict]) -> int:
+        """Save news items to database"""
+        return len(self._insert_new_articles(db, news_items))
 
-        try:
-            url = "https://www.reddit.com/r/soccer/top.json?limit=10&t=day"
-            headers = {"User-Agent": "FootballMemeBot/1.0"}
-            response = requests.get(url, headers=headers)
-
-            if response.status_code == 200:
-                data = response.json()
-
-                for post in data["data"]["children"]:
-                    post_data = post["data"]
-
-                    # Extract best quality image
-                    image_url = None
-                    # Try preview images first (better quality)
-                    if "preview" in post_data and "images" in post_data["preview"]:
-                        try:
-                            image_url = post_data["preview"]["images"][0]["source"]["url"].replace("&amp;", "&")
-                        except:
-                            pass
-                    # Fallback to thumbnail if it's a valid URL
-                    if not image_url:
-                        thumbnail = post_data.get("thumbnail", "")
-                        if thumbnail.startswith("http"):
-                            image_url = thumbnail
-                    # Try url_overridden_by_dest for direct image links
-                    if not image_url:
-                        url_override = post_data.get("url_overridden_by_dest", "")
-                        if url_override and (url_override.endswith((".jpg", ".jpeg", ".png", ".gif", ".webp"))):
-                            image_url = url_override
-
-                    title = post_data.get("title", "")
-                    description_raw = post_data.get("selftext", "")[:200] or title
-                    description = self._strip_html(description_raw)
-
-                    news_item = {
-                        "title": title,
-                        "description": description,
-                        "url": f"https://reddit.com{post_data.get('permalink', '')}",
-                        "source": "Reddit r/soccer",
-                        "image_url": image_url,
-                        "published_at": datetime.fromtimestamp(post_data.get("created_utc", 0)),
-                        "category": "community"
-                    }
-                    reddit_news.append(news_item)
+    def _find_existing_urls(self, db: Session, urls: List[str]) -> Set[str]:
+        """Resolve which URLs are already stored, one IN query per chunk"""
+        existing = set()
 
-        except Exception as e:
-            print(f"❌ Error scraping Reddit: {str(e)}")
+        for i in range(0, len(urls), URL_LOOKUP_CHUNK_SIZE):
+            chunk = urls[i:i + URL_LOOKUP_CHUNK_SIZE]
+            rows = db.query(NewsArticle.url).filter(NewsArticle.url.in_(chunk)).all()
+            existing.update(row.url for row in rows)
 
-        return reddit_news
+            # URLs already attached to a story cluster as near-duplicates
+            rows = db.query(NewsStoryMember.url).filter(NewsStoryMember.url.in_(chunk)).all()
+            existing.update(row.url for row in rows)
 
-    def save_to_database(self, db: Session, news_items: List[Dict]) -> int:
-        """Save news items to database"""
-        saved_count = 0
+        return existing
+
+    def _insert_new_articles(self, db: Session, news_items: List[Dict]) -> List[Dict]:
+        """
+        Bulk-insert news items whose URL is not stored yet
 
+        Dedupes within the batch (first occurrence wins), resolves existing
+        URLs with chunked IN queries and inserts the rest in one executemany.
+        Near-duplicates of a recent story are attached to its cluster instead
+        of becoming new articles. Returns the inserted article rows.
+        """
+        unique_items = {}
         for item in news_items:
-            # Check if already exists
-            existing = db.query(NewsArticle).filter(NewsArticle.url == item["url"]).first()
+            url = item.get("url")
+            if url and url not in unique_items:
+                unique_items[url] = item
+
+        if not unique_items:
+            return []
+
+        columns = set(NewsArticle.__table__.columns.keys())
+
+        for attempt in range(2):
+            existing_urls = self._find_existing_urls(db, list(unique_items))
+
+            new_rows = [
+                {key: value for key, value in item.items() if key in columns}
+                for url, item in unique_items.items()
+                if url not in existing_urls
+            ]
+
+            if not new_rows:
+                return []
+
+            plan = story_deduplicator.plan(db, new_rows)
+
+            try:
+                if plan["articles"]:
+                    db.execute(insert(NewsArticle), plan["articles"])
+                article_ids = story_deduplicator.apply(db, plan)
+                trending_terms.record(db, plan["articles"])
+                db.commit()
+            except IntegrityError:
+                # Another fetch inserted some of these URLs meanwhile - resolve again
+                db.rollback()
+                if attempt:
+                    raise
+                continue
 
-            if not existing:
-                news = NewsArticle(**item)
-                db.add(news)
-                saved_count += 1
+            # Only once the rows are durable (a writer job's commit waits for its batch)
+            db_writer.after_commit(db, lambda: story_deduplicator.index(plan, article_ids))
+            return plan["articles"]
 
-        db.commit()
-        return saved_count
+        return []
 
     def get_latest_news(self, db: Session, limit: int = 20, category: str = None) -> List[NewsArticle]:
         """Get latest news from database"""
@@ -198,35 +416,15 @@ class NewsAggregator:
 
     def get_trending_topics(self, db: Session, hours: int = 24) -> List[Dict]:
         """Get trending topics based on recent news"""
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-
-        recent_news = db.query(NewsArticle).filter(
-            NewsArticle.published_at >= cutoff_time
-        ).all()
-
-        # Analyze keywords and return trending topics
-        topics = {}
-
-        for news in recent_news:
-            # Simple keyword extraction (can be improved with NLP)
-            words = news.title.lower().split()
-            for word in words:
-                if len(word) > 4:  # Filter short words
-                    topics[word] = topics.get(word, 0) + 1
+        # Counters are updated at ingestion - this only sums hourly buckets
+        return trending_terms.top_terms(db, hours=hours, limit=10)
 
-        # Sort by frequency
-        trending = sorted(topics.items(), key=lambda x: x[1], reverse=True)[:10]
-
-        return [{"topic": topic, "count": count} for topic, count in trending]
-
-    def _extract_image(self, entry: Dict) -> str:
-        """Extract image URL from RSS entry"""
+    def _media_image(self, entry: Dict) -> Optional[str]:
+        """Image URL from media_content, media_thumbnail or enclosures"""
         # Method 1: Try media_content (most RSS feeds)
         if hasattr(entry, "media_content") and entry.media_content:
             for media in entry.media_content:
-                if media.get("url") and media.get("medium") == "image":
-                    return media["url"]
-                elif media.get("url"):
+                if media.get("url"):
                     return media["url"]
 
         # Method 2: Try media_thumbnail
@@ -239,22 +437,10 @@ class NewsAggregator:
                 if enclosure.get("type", "").startswith("image"):
                     return enclosure.get("href") or enclosure.get("url")
 
-        # Method 4: Parse from description/summary HTML
-        for field in ["summary", "description", "content"]:
-            if field in entry:
-                content = entry[field]
-                if isinstance(content, list):
-                    content = content[0].get("value", "")
-
-                soup = BeautifulSoup(str(content), "html.parser")
-                img = soup.find("img")
-                if img and img.get("src"):
-                    src = img["src"]
-                    # Make sure it's a full URL
-                    if src.startswith("http"):
-                        return src
-
-        # Method 5: Try links with image rel
+        return None
+
+    def _link_image(self, entry: Dict) -> Optional[str]:
+        """Image URL from links with an image enclosure rel (last resort after the HTML)"""
         if hasattr(entry, "links") and entry.links:
             for link in entry.links:
                 if link.get("rel") == "enclosure" and "image" in link.get("type", ""):
@@ -277,20 +463,8 @@ class NewsAggregator:
 
     def _categorize_news(self, title: str) -> str:
         """Automatically categorize news based on title"""
-        title_lower = title.lower()
-
-        if any(word in title_lower for word in ["transfer", "signs", "joins", "linked"]):
-            return "transfer"
-        elif any(word in title_lower for word in ["vs", "wins", "loses", "draw", "goal", "score"]):
-            return "match_result"
-        elif any(word in title_lower for word in ["injury", "injured", "out", "sidelined"]):
-            return "injury"
-        elif any(word in title_lower for word in ["drama", "controversy", "ban", "suspended"]):
-            return "drama"
-        elif any(word in title_lower for word in ["record", "milestone", "achievement"]):
-            return "achievement"
-        else:
-            return "general"
+        category = _category_matcher.first_match(title, NEWS_CATEGORY_PRIORITY)
+        return category or "general"
 
 # Singleton instance
 news_aggregator = NewsAggregator()
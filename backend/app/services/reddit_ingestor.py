@@ -0,0 +1,319 @@
+"""
+Reddit Ingestor
+Incremental r/soccer ingestion: paged listings with persistent cursors over one pooled async client
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db_writer import db_writer
+from app.core.http_clients import http_clients
+from app.core.database import SessionLocal, AppSettings
+from app.services.news_service import news_aggregator
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+# Listings sorted by time - paging stops at the first already-seen post.
+# Ranked listings (hot, top) stop at the first page with nothing new.
+CHRONOLOGICAL_LISTINGS = ("new",)
+
+
+def _post_to_item(post_data: Dict) -> Dict:
+    """Convert a Reddit post to a news item"""
+    # Extract best quality image
+    image_url = None
+    # Try preview images first (better quality)
+    if "preview" in post_data and "images" in post_data["preview"]:
+        try:
+            image_url = post_data["preview"]["images"][0]["source"]["url"].replace("&amp;", "&")
+        except (KeyError, IndexError, TypeError):
+            pass
+    # Fallback to thumbnail if it's a valid URL
+    if not image_url:
+        thumbnail = post_data.get("thumbnail", "")
+        if thumbnail.startswith("http"):
+            image_url = thumbnail
+    # Try url_overridden_by_dest for direct image links
+    if not image_url:
+        url_override = post_data.get("url_overridden_by_dest", "")
+        if url_override and url_override.endswith(IMAGE_EXTENSIONS):
+            image_url = url_override
+
+    title = post_data.get("title", "")
+    description_raw = post_data.get("selftext", "")[:200] or title
+
+    return {
+        "title": title,
+        "description": news_aggregator._strip_html(description_raw),
+        "url": f"https://reddit.com{post_data.get('permalink', '')}",
+        "source": f"Reddit r/{post_data.get('subreddit', settings.REDDIT_SUBREDDIT)}",
+        "image_url": image_url,
+        "published_at": datetime.utcfromtimestamp(post_data.get("created_utc", 0)),
+        "category": "community"
+    }
+
+
+class RedditIngestor:
+    """
+    Fetch only what is new since the last run, per listing
+
+    Cursor state (stored in app settings) per listing:
+        last_seen_utc: newest post creation time seen so far
+        after:         Reddit paging token where an unfinished catch-up stopped
+        backlog_until: where that catch-up ends (last_seen_utc when it started)
+    """
+
+    CURSOR_SETTING_KEY = "reddit_cursors"
+
+    def __init__(self):
+        self.base_url = settings.REDDIT_BASE_URL.rstrip("/")
+        self.subreddit = settings.REDDIT_SUBREDDIT
+        self.listings = settings.REDDIT_LISTINGS
+        self.page_size = settings.REDDIT_PAGE_SIZE
+        self.max_pages = settings.REDDIT_MAX_PAGES
+
+        # Shared by every listing: Reddit rate-limits per client, not per endpoint
+        self._rate_remaining: Optional[float] = None
+        self._rate_reset_at = 0.0  # time.monotonic()
+
+    # ---- Cursors ----------------------------------------------------------
+
+    def _load_cursors(self, db: Session) -> Dict[str, Dict]:
+        setting = db.query(AppSettings).filter(AppSettings.key == self.CURSOR_SETTING_KEY).first()
+        try:
+            return json.loads(setting.value) if setting and setting.value else {}
+        except ValueError:
+            print("⚠️ Invalid Reddit cursors in settings, starting over")
+            return {}
+
+    def _save_cursors(self, db: Session, cursors: Dict[str, Dict]):
+        setting = db.query(AppSettings).filter(AppSettings.key == self.CURSOR_SETTING_KEY).first()
+        if not setting:
+            setting = AppSettings(key=self.CURSOR_SETTING_KEY)
+            db.add(setting)
+        setting.value = json.dumps(cursors)
+        db.commit()
+
+    def get_cursors(self, db: Session) -> Dict[str, Dict]:
+        """Current cursor state per listing"""
+        return self._load_cursors(db)
+
+    # ---- HTTP -------------------------------------------------------------
+
+    def _http_client(self) -> httpx.AsyncClient:
+        """One keep-alive connection pool for all listings, pages and runs"""
+        return httpx.AsyncClient(
+            headers={"User-Agent": settings.NEWS_USER_AGENT},
+            follow_redirects=True,
+            timeout=settings.NEWS_FETCH_TIMEOUT,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4)
+        )
+
+    def _update_rate_limit(self, headers: httpx.Headers):
+        """Track X-Ratelimit-Remaining / X-Ratelimit-Reset from the last response"""
+        try:
+            if "x-ratelimit-remaining" in headers:
+                self._rate_remaining = float(headers["x-ratelimit-remaining"])
+            if "x-ratelimit-reset" in headers:
+                self._rate_reset_at = time.monotonic() + float(headers["x-ratelimit-reset"])
+        except ValueError:
+            pass
+
+    async def _wait_for_rate_limit(self) -> bool:
+        """Sleep until the rate-limit window resets if the budget is spent; False if that is too long"""
+        if self._rate_remaining is None or self._rate_remaining >= 1:
+            return True
+
+        wait = self._rate_reset_at - time.monotonic()
+        if wait > settings.REDDIT_MAX_RATE_WAIT:
+            print(f"⏳ Reddit rate limit resets in {wait:.0f}s - stopping this run")
+            return False
+
+        if wait > 0:
+            print(f"⏳ Reddit rate limit reached, waiting {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+        self._rate_remaining = None
+        return True
+
+    async def _get_page(
+        self,
+        client: httpx.AsyncClient,
+        listing: str,
+        after: Optional[str]
+    ) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """One listing page: (posts, next after token), or (None, None) on failure"""
+        url = f"{self.base_url}/r/{self.subreddit}/{listing}.json"
+        params = {"limit": self.page_size, "raw_json": 1}
+        if after:
+            params["after"] = after
+        if listing == "top":
+            params["t"] = settings.REDDIT_TOP_WINDOW
+
+        # Second attempt only after a 429
+        for _ in range(2):
+            if not await self._wait_for_rate_limit():
+                return None, None
+
+            try:
+                response = await client.get(url, params=params)
+            except httpx.HTTPError as e:
+                print(f"❌ Error fetching Reddit {listing}: {str(e)}")
+                return None, None
+
+            self._update_rate_limit(response.headers)
+
+            if response.status_code == 429:
+                retry_after = response.headers.get("retry-after") or response.headers.get("x-ratelimit-reset") or 60
+                self._rate_remaining = 0
+                self._rate_reset_at = time.monotonic() + float(retry_after)
+                continue
+
+            if response.status_code != 200:
+                print(f"❌ Reddit {listing} returned HTTP {response.status_code}")
+                return None, None
+
+            data = response.json().get("data", {})
+            return [child["data"] for child in data.get("children", [])], data.get("after")
+
+        return None, None
+
+    # ---- Paging -----------------------------------------------------------
+
+    def _seen_flags(self, db: Session, listing: str, posts: List[Dict], until: float) -> List[bool]:
+        if listing in CHRONOLOGICAL_LISTINGS:
+            return [post.get("created_utc", 0) <= until for post in posts]
+
+        urls = [f"https://reddit.com{post.get('permalink', '')}" for post in posts]
+        existing = news_aggregator._find_existing_urls(db, urls)
+        return [url in existing for url in urls]
+
+    async def _walk(
+        self,
+        client: httpx.AsyncClient,
+        db: Session,
+        listing: str,
+        after: Optional[str],
+        until: float,
+        budget: int
+    ) -> Tuple[List[Dict], Optional[str], bool, int]:
+        """
+        Page through a listing until already-seen content or the page budget
+
+        Returns (new posts, after token to resume from, reached seen content
+        or the end of the listing, pages fetched).
+        """
+        posts = []
+        pages = 0
+
+        while pages < budget:
+            page, next_after = await self._get_page(client, listing, after)
+            if page is None:
+                return posts, after, False, pages
+
+            pages += 1
+            seen = self._seen_flags(db, listing, page, until)
+            posts.extend(post for post, is_seen in zip(page, seen) if not is_seen)
+
+            if listing in CHRONOLOGICAL_LISTINGS:
+                reached = any(seen)
+            else:
+                reached = bool(page) and all(seen)
+
+            if reached or not page or not next_after:
+                return posts, None, True, pages
+
+            after = next_after
+
+        return posts, after, False, pages
+
+    async def _run_listing(self, client: httpx.AsyncClient, db: Session, listing: str, state: Dict) -> List[Dict]:
+        """Fetch new posts of one listing, updating its cursor state in place"""
+        posts = []
+        budget = self.max_pages
+        is_first_run = not state.get("last_seen_utc")
+
+        # Finish the catch-up a previous run could not complete
+        if state.get("after"):
+            found, after, reached, pages = await self._walk(
+                client, db, listing, state["after"], state.get("backlog_until") or 0, budget
+            )
+            posts.extend(found)
+            budget -= pages
+            if reached:
+                state["after"] = None
+                state["backlog_until"] = None
+            elif after:
+                state["after"] = after
+
+        if budget > 0:
+            until = state.get("last_seen_utc") or 0
+            found, after, reached, pages = await self._walk(client, db, listing, None, until, budget)
+            posts.extend(found)
+
+            # More new posts than the page budget - continue from here next run.
+            # The very first run only takes the newest pages instead of the full history.
+            if not reached and after and not is_first_run and not state.get("after"):
+                state["after"] = after
+                state["backlog_until"] = until
+
+        if posts:
+            newest = max(post.get("created_utc", 0) for post in posts)
+            state["last_seen_utc"] = max(state.get("last_seen_utc") or 0, newest)
+
+        return posts
+
+    async def run(self) -> Dict[str, int]:
+        """
+        Fetch every configured listing concurrently and save new posts
+
+        Uses its own session, so it can run alongside the RSS pipeline.
+        Cursors are saved only after the posts are stored.
+        """
+        db = SessionLocal()
+
+        try:
+            cursors = self._load_cursors(db)
+
+            client = http_clients.get("reddit", self._http_client)
+            results = await asyncio.gather(*(
+                self._run_listing(client, db, listing, cursors.setdefault(listing, {}))
+                for listing in self.listings
+            ))
+
+            posts_by_url = {}
+            for posts in results:
+                for post in posts:
+                    posts_by_url.setdefault(post.get("permalink"), post)
+
+            items = [_post_to_item(post) for post in posts_by_url.values()]
+
+            def save(write_db: Session) -> List[Dict]:
+                new_items = news_aggregator._insert_new_articles(write_db, items)
+                self._save_cursors(write_db, cursors)
+                return new_items
+
+            # Posts and cursors are committed together by the database writer
+            new_items = await db_writer.run(save)
+
+            print(f"✅ Reddit: {len(items)} new posts across {len(self.listings)} listings, saved {len(new_items)}")
+            return {"fetched": len(items), "saved": len(new_items)}
+
+        except Exception as e:
+            print(f"❌ Error ingesting Reddit: {str(e)}")
+            db.rollback()
+            return {"fetched": 0, "saved": 0}
+
+        finally:
+            db.close()
+
+
+# Singleton instance
+reddit_ingestor = RedditIngestor()
@@ -0,0 +1,131 @@
+"""
+Scheduler Leader Lock
+Lease row in the database so only one API worker runs the scheduled jobs
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import case, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal, SchedulerLease
+
+
+class SchedulerLeaderLock:
+    """
+    Lease-based leader election
+
+    Every worker tries to take or renew the lease each heartbeat with one
+    conditional UPDATE (holder is us, or the lease has expired), so at most
+    one worker wins. A leader that dies stops renewing and another worker
+    takes over once the lease expires; a clean shutdown releases it at once.
+    """
+
+    LEASE_NAME = "scheduler"
+
+    def __init__(self):
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = settings.SCHEDULER_LEASE_SECONDS
+        self.is_leader = False
+
+    def acquire(self) -> bool:
+        """Take or renew the lease; True while this worker is the leader"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        db = SessionLocal()
+
+        try:
+            updated = db.query(SchedulerLease).filter(
+                SchedulerLease.name == self.LEASE_NAME,
+                or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+            ).update({
+                # Keep acquired_at on renewal, reset it on takeover
+                SchedulerLease.acquired_at: case(
+                    (SchedulerLease.holder == self.holder, SchedulerLease.acquired_at),
+                    else_=now
+                ),
+                SchedulerLease.holder: self.holder,
+                SchedulerLease.heartbeat_at: now,
+                SchedulerLease.expires_at: expires_at
+            }, synchronize_session=False)
+
+            if not updated:
+                if db.query(SchedulerLease.name).filter(SchedulerLease.name == self.LEASE_NAME).first():
+                    db.rollback()
+                    return self._set_leader(False)
+
+                db.add(SchedulerLease(
+                    name=self.LEASE_NAME,
+                    holder=self.holder,
+                    acquired_at=now,
+                    heartbeat_at=now,
+                    expires_at=expires_at
+                ))
+
+            db.commit()
+            return self._set_leader(True)
+
+        except IntegrityError:
+            # Another worker inserted the lease first
+            db.rollback()
+            return self._set_leader(False)
+
+        except Exception as e:
+            # Cannot confirm the lease - stop leading rather than risk two leaders
+            print(f"❌ Scheduler lease check failed: {str(e)}")
+            db.rollback()
+            return self._set_leader(False)
+
+        finally:
+            db.close()
+
+    def release(self):
+        """Give up the lease so another worker can take over immediately"""
+        db = SessionLocal()
+
+        try:
+            db.query(SchedulerLease).filter(
+                SchedulerLease.name == self.LEASE_NAME,
+                SchedulerLease.holder == self.holder
+            ).delete(synchronize_session=False)
+            db.commit()
+
+        except Exception as e:
+            print(f"⚠️ Could not release scheduler lease: {str(e)}")
+            db.rollback()
+
+        finally:
+            self.is_leader = False
+            db.close()
+
+    def _set_leader(self, is_leader: bool) -> bool:
+        if is_leader != self.is_leader:
+            print(f"👑 {self.holder} is now the scheduler leader" if is_leader else f"👥 {self.holder} is a follower")
+        self.is_leader = is_leader
+        return is_leader
+
+    def get_status(self) -> Dict[str, Optional[str]]:
+        """Current lease holder as seen by this worker"""
+        db = SessionLocal()
+
+        try:
+            lease = db.query(SchedulerLease).filter(SchedulerLease.name == self.LEASE_NAME).first()
+            return {
+                "worker": self.holder,
+                "is_leader": self.is_leader,
+                "leader": lease.holder if lease else None,
+                "acquired_at": lease.acquired_at.isoformat() if lease and lease.acquired_at else None,
+                "expires_at": lease.expires_at.isoformat() if lease else None
+            }
+
+        finally:
+            db.close()
+
+
+# Singleton instance
+scheduler_leader = SchedulerLeaderLock()
@@ -3,323 +3,519 @@ Scheduler Service
 Automated content posting and news fetching on schedule
 """
 
-from apscheduler.schedulers.background import BackgroundScheduler
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
-from app.core.database import SessionLocal, ContentPost, NewsArticle
+from app.core.database import SessionLocal, ReadSessionLocal, ContentPost, NewsArticle, engine
+from app.core.db_writer import db_writer
 from app.core.config import settings
 from app.services.news_service import news_aggregator
+from app.services.feed_poll_planner import feed_poll_planner
+from app.services.trending_terms_service import trending_terms
+from app.services.reddit_ingestor import reddit_ingestor
+from app.services.scheduler_leader import scheduler_leader
 from app.services.ai_content_service_ollama import AIContentGenerator
 from app.services.image_service import meme_generator
 from app.services.facebook_service import facebook_service
+from app.services.insights_collector import insights_collector
+from app.services.analytics_refresh_planner import analytics_refresh_planner, DuePost
+from app.services.engagement_rollups import engagement_rollups
 
 # Initialize AI generator
 ai_generator = AIContentGenerator()
 
+# PIL rendering is blocking and CPU-bound - keep it off the event loop
+_render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="meme-render")
+
+
+async def run_job(name: str):
+    """
+    Scheduler entry point: run a SchedulerService job by method name
+
+    Module-level so the persistent job store can reference it.
+    """
+    await scheduler_service.run_job(name)
+
+
 class SchedulerService:
-    """Manage automated tasks"""
+    """
+    Manage automated tasks
+
+    Jobs run as coroutines on the application's event loop (the scheduler is
+    started from the FastAPI lifespan), so they share its HTTP clients, DB
+    pool and caches instead of spinning up a loop and client per run.
+    Blocking work goes to executors: reads run in a worker thread, writes
+    through the database writer, and only awaits stay on the loop.
+
+    In "leader" mode (SCHEDULER_MODE) jobs are stored in the database and
+    every API worker competes for a lease; only the leader runs jobs, so
+    running uvicorn with several workers does not duplicate fetches or posts.
+    """
 
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
+        self.scheduler = self._create_scheduler()
         self.is_running = False
+        self.is_leading = False
+        self.job_stats: Dict[str, Dict] = {}
+        self._lease_task: Optional[asyncio.Task] = None
+
+    def _create_scheduler(self) -> AsyncIOScheduler:
+        job_defaults = {
+            "coalesce": True,
+            "max_instances": 1,
+            "misfire_grace_time": settings.SCHEDULER_MISFIRE_GRACE
+        }
+
+        if settings.SCHEDULER_MODE == "leader":
+            # Next run times survive restarts and failovers
+            return AsyncIOScheduler(jobstores={"default": SQLAlchemyJobStore(engine=engine)}, job_defaults=job_defaults)
+
+        return AsyncIOScheduler(job_defaults=job_defaults)
+
+    def _job_definitions(self) -> List[Tuple[str, str, BaseTrigger]]:
+        """(job id, SchedulerService method, trigger) of every scheduled job"""
+        jobs = [
+            # Poll RSS sources that are due (each source has its own adaptive interval)
+            ("poll_news", "poll_news_job", IntervalTrigger(minutes=settings.NEWS_POLL_TICK)),
+            # Fetch new Reddit posts (incremental, cursors persist between runs)
+            ("fetch_reddit", "fetch_reddit_job", IntervalTrigger(minutes=settings.REDDIT_FETCH_INTERVAL)),
+            # Refresh analytics of posts that are due (decaying per-post schedule)
+            ("fetch_analytics", "fetch_analytics_job", IntervalTrigger(minutes=settings.ANALYTICS_REFRESH_TICK)),
+            # Roll analytics snapshots up into hourly / daily engagement tables
+            ("rollup_engagement", "rollup_engagement_job", IntervalTrigger(minutes=settings.ANALYTICS_ROLLUP_INTERVAL)),
+            # Generate daily content plan at 7 AM
+            ("daily_plan", "generate_daily_plan", CronTrigger(hour=7, minute=0)),
+            # Drop expired trending term buckets every night
+            ("prune_trending_terms", "prune_trending_terms_job", CronTrigger(hour=3, minute=0))
+        ]
+
+        # Auto-post at scheduled times
+        if settings.AUTO_POST_ENABLED:
+            for post_time in settings.AUTO_POST_TIMES:
+                hour, minute = map(int, post_time.split(":"))
+                jobs.append((f"auto_post_{post_time}", "auto_post_job", CronTrigger(hour=hour, minute=minute)))
+
+        return jobs
+
+    def _sync_jobs(self):
+        """Make the job store match the configured jobs"""
+        wanted = set()
+
+        for job_id, name, trigger in self._job_definitions():
+            wanted.add(job_id)
+            existing = self.scheduler.get_job(job_id)
+
+            # Unchanged job: keep its stored next run time (a missed run still fires)
+            if existing and existing.args == (name,) and str(existing.trigger) == str(trigger):
+                continue
+
+            self.scheduler.add_job(run_job, trigger, args=[name], id=job_id, name=name, replace_existing=True)
+
+        for job in self.scheduler.get_jobs():
+            if job.id not in wanted:
+                job.remove()
+
+    def _run_jobs(self):
+        """Begin running jobs in this worker"""
+        if not self.scheduler.running:
+            # Paused until the store is in sync, so stale jobs never fire
+            self.scheduler.start(paused=True)
+            self._sync_jobs()
+        self.scheduler.resume()
+        self.is_leading = True
+
+    def _pause_jobs(self):
+        """Stop running jobs in this worker (jobs already running finish)"""
+        if self.scheduler.running:
+            self.scheduler.pause()
+        self.is_leading = False
+
+    async def _lead(self):
+        """Renew or take the lease every heartbeat and start/pause jobs to match"""
+        while True:
+            is_leader = await asyncio.to_thread(scheduler_leader.acquire)
+
+            if is_leader and not self.is_leading:
+                self._run_jobs()
+            elif not is_leader and self.is_leading:
+                self._pause_jobs()
+
+            await asyncio.sleep(settings.SCHEDULER_HEARTBEAT_SECONDS)
 
     def start(self):
-        """Start the scheduler"""
+        """Start the scheduler (call from the running event loop)"""
         if self.is_running:
             print("⚠️ Scheduler already running")
             return
 
         print("🕐 Starting scheduler...")
 
-        # Fetch news every 30 minutes
-        self.scheduler.add_job(
-            self.fetch_news_job,
-            "interval",
-            minutes=settings.NEWS_FETCH_INTERVAL,
-            id="fetch_news",
-            replace_existing=True
-        )
+        if settings.SCHEDULER_MODE == "leader":
+            self._lease_task = asyncio.get_running_loop().create_task(self._lead())
+            print(f"✅ Scheduler started as {scheduler_leader.holder} (jobs run on the lease holder)")
+        else:
+            self._run_jobs()
+            print("✅ Scheduler started successfully")
 
-        # Auto-post at scheduled times
-        if settings.AUTO_POST_ENABLED:
-            for post_time in settings.AUTO_POST_TIMES:
-                hour, minute = map(int, post_time.split(":"))
-                self.scheduler.add_job(
-                    self.auto_post_job,
-                    CronTrigger(hour=hour, minute=minute),
-                    id=f"auto_post_{post_time}",
-                    replace_existing=True
-                )
-
-        # Fetch analytics every hour
-        self.scheduler.add_job(
-            self.fetch_analytics_job,
-            "interval",
-            hours=1,
-            id="fetch_analytics",
-            replace_existing=True
-        )
-
-        # Generate daily content plan at 7 AM
-        self.scheduler.add_job(
-            self.generate_daily_plan,
-            CronTrigger(hour=7, minute=0),
-            id="daily_plan",
-            replace_existing=True
-        )
-
-        self.scheduler.start()
         self.is_running = True
-        print("✅ Scheduler started successfully")
 
     def stop(self):
         """Stop the scheduler"""
         if not self.is_running:
             return
 
-        self.scheduler.shutdown()
+        if self._lease_task:
+            self._lease_task.cancel()
+            self._lease_task = None
+
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        self.is_leading = False
+
+        if settings.SCHEDULER_MODE == "leader":
+            # Let another worker take over without waiting for the lease to expire
+            scheduler_leader.release()
+
         self.is_running = False
         print("✅ Scheduler stopped")
 
-    def fetch_news_job(self):
-        """Job: Fetch news from all sources"""
+    async def run_job(self, name: str):
+        """Run one job on the current loop and record its duration"""
+        job = getattr(self, name)
+        started = time.perf_counter()
+
+        try:
+            if asyncio.iscoroutinefunction(job):
+                await job()
+            else:
+                # Blocking DB job
+                await asyncio.get_running_loop().run_in_executor(None, job)
+        finally:
+            self._record_run(name, time.perf_counter() - started)
+
+    def _record_run(self, name: str, seconds: float):
+        stats = self.job_stats.setdefault(
+            name, {"runs": 0, "last_seconds": 0.0, "avg_seconds": 0.0, "max_seconds": 0.0, "last_run": None}
+        )
+        stats["runs"] += 1
+        stats["last_seconds"] = round(seconds, 4)
+        stats["avg_seconds"] = round(stats["avg_seconds"] + (seconds - stats["avg_seconds"]) / stats["runs"], 4)
+        stats["max_seconds"] = round(max(stats["max_seconds"], seconds), 4)
+        stats["last_run"] = datetime.utcnow().isoformat()
+
+    def get_job_stats(self) -> Dict[str, Dict]:
+        """Run count and durations per job since startup"""
+        return self.job_stats
+
+    async def fetch_news_job(self):
+        """Job: Fetch news from all sources (ignores per-source poll times)"""
         print("📰 Fetching news...")
 
         db = SessionLocal()
 
         try:
-            # Fetch from RSS feeds
-            rss_news = []
-            import asyncio
-            rss_news = asyncio.run(news_aggregator.fetch_rss_feeds())
+            # RSS pipeline and Reddit listings run side by side
+            rss_result, reddit_result = await asyncio.gather(
+                news_aggregator.fetch_and_save_rss(db),
+                reddit_ingestor.run()
+            )
+            saved = rss_result["saved"] + reddit_result["saved"]
+
+            print(f"✅ Fetched and saved {saved} new articles")
 
-            # Fetch from Reddit
-            reddit_news = asyncio.run(news_aggregator.scrape_reddit_soccer())
+        except Exception as e:
+            print(f"❌ Error in fetch_news_job: {str(e)}")
 
-            # Combine all sources
-            all_news = rss_news + reddit_news
+        finally:
+            db.close()
 
-            # Save to database
-            saved = news_aggregator.save_to_database(db, all_news)
+    async def poll_news_job(self):
+        """Job: Fetch only the RSS sources the adaptive planner marks as due"""
+        db = SessionLocal()
 
-            print(f"✅ Fetched and saved {saved} new articles")
+        try:
+            sources, due = await asyncio.to_thread(self._due_sources, db)
+
+            if not due:
+                return
+
+            print(f"📰 Polling {len(due)}/{len(sources)} due sources...")
+            result = await news_aggregator.fetch_and_save_rss(db, sources=due)
+
+            print(f"✅ Fetched and saved {result['saved']} new articles")
 
         except Exception as e:
-            print(f"❌ Error in fetch_news_job: {str(e)}")
+            print(f"❌ Error in poll_news_job: {str(e)}")
 
         finally:
             db.close()
 
-    def auto_post_job(self):
-        """Job: Automatically create and post content"""
-        print("🤖 Auto-posting content...")
+    def _due_sources(self, db: Session) -> Tuple[List[str], List[str]]:
+        """(all sources, sources due for a poll)"""
+        sources = news_aggregator._get_news_sources(db)
+        return sources, feed_poll_planner.due_sources(db, sources)
 
+    async def fetch_reddit_job(self):
+        """Job: Fetch new posts from Reddit"""
+        try:
+            result = await reddit_ingestor.run()
+
+            print(f"✅ Fetched and saved {result['saved']} new Reddit posts")
+
+        except Exception as e:
+            print(f"❌ Error in fetch_reddit_job: {str(e)}")
+
+    def prune_trending_terms_job(self):
+        """Job: Remove trending term counters past their retention"""
         db = SessionLocal()
 
         try:
-            # Get pending scheduled posts
-            now = datetime.utcnow()
-            window_start = now - timedelta(minutes=10)
-            window_end = now + timedelta(minutes=10)
+            trending_terms.prune(db)
 
-            scheduled_posts = db.query(ContentPost).filter(
-                ContentPost.status == "scheduled",
-                ContentPost.scheduled_time >= window_start,
-                ContentPost.scheduled_time <= window_end
-            ).all()
+        except Exception as e:
+            print(f"❌ Error in prune_trending_terms_job: {str(e)}")
+
+        finally:
+            db.close()
+
+    def rollup_engagement_job(self):
+        """Job: Roll new analytics snapshots into the engagement rollups and compact old points"""
+        try:
+            # Runs on the database writer; this worker thread just waits for it
+            stats = db_writer.submit(engagement_rollups.rollup).result()
+
+            if stats["compacted_raw"] or stats["compacted_hourly"]:
+                print(f"🗜️ Compacted {stats['compacted_raw']} snapshots, {stats['compacted_hourly']} hourly rows")
+
+        except Exception as e:
+            print(f"❌ Error in rollup_engagement_job: {str(e)}")
+
+    async def auto_post_job(self):
+        """Job: Automatically create and post content"""
+        print("🤖 Auto-posting content...")
+
+        try:
+            # Get pending scheduled posts
+            scheduled_posts = await asyncio.to_thread(self._scheduled_posts, datetime.utcnow())
 
             if scheduled_posts:
                 # Post scheduled content
                 for post in scheduled_posts:
-                    self._post_content(db, post)
+                    await self._post_content(post)
             else:
                 # Generate new content if no scheduled posts
-                self._generate_and_post(db)
+                await self._generate_and_post()
 
         except Exception as e:
             print(f"❌ Error in auto_post_job: {str(e)}")
 
+    def _scheduled_posts(self, now: datetime) -> List[Dict]:
+        """Scheduled posts due within 10 minutes of now, as {id, title, caption, image_path}"""
+        db = ReadSessionLocal()
+
+        try:
+            rows = db.query(ContentPost.id, ContentPost.title, ContentPost.caption, ContentPost.image_path).filter(
+                ContentPost.status == "scheduled",
+                ContentPost.scheduled_time >= now - timedelta(minutes=10),
+                ContentPost.scheduled_time <= now + timedelta(minutes=10)
+            ).all()
+            return [row._asdict() for row in rows]
+
         finally:
             db.close()
 
-    def fetch_analytics_job(self):
-        """Job: Fetch analytics for recent posts"""
-        print("📊 Fetching analytics...")
+    async def fetch_analytics_job(self):
+        """Job: Refresh analytics of the posts the refresh planner marks as due"""
+        try:
+            now = datetime.utcnow()
 
-        db = SessionLocal()
+            # Planning new posts writes their plans: it goes through the database writer,
+            # which hands back plain (id, fb_post_id, posted_time) tuples
+            due_posts = await db_writer.run(lambda write_db: analytics_refresh_planner.due_posts(write_db, now))
 
-        try:
-            # Get posts from last 7 days that have been posted
-            cutoff_date = datetime.utcnow() - timedelta(days=7)
+            if not due_posts:
+                return
 
-            recent_posts = db.query(ContentPost).filter(
-                ContentPost.status == "posted",
-                ContentPost.posted_time >= cutoff_date,
-                ContentPost.fb_post_id.isnot(None)
-            ).all()
+            print(f"📊 Refreshing analytics for {len(due_posts)} due posts...")
+
+            results, errors = await insights_collector.collect([post.fb_post_id for post in due_posts])
 
-            for post in recent_posts:
-                analytics = facebook_service.get_post_insights(post.fb_post_id)
-
-                if "error" not in analytics:
-                    # Save analytics to database
-                    from app.core.database import PostAnalytics
-
-                    existing = db.query(PostAnalytics).filter(
-                        PostAnalytics.post_id == post.id
-                    ).first()
-
-                    if existing:
-                        # Update existing
-                        for key, value in analytics.items():
-                            if hasattr(existing, key):
-                                setattr(existing, key, value)
-                    else:
-                        # Create new
-                        new_analytics = PostAnalytics(
-                            post_id=post.id,
-                            **analytics
-                        )
-                        db.add(new_analytics)
-
-            db.commit()
-            print(f"✅ Updated analytics for {len(recent_posts)} posts")
+            # Nothing was fetched (no token, throttled...): the posts stay due for the next run
+            if not results and not errors:
+                print("⚠️ No insights fetched - analytics refresh skipped")
+                return
+
+            updated = await db_writer.run(lambda write_db: self._save_analytics(write_db, due_posts, results, errors, now))
+
+            print(f"✅ Updated analytics for {updated}/{len(due_posts)} posts")
 
         except Exception as e:
             print(f"❌ Error in fetch_analytics_job: {str(e)}")
 
-        finally:
-            db.close()
-
-    def generate_daily_plan(self):
+    def _save_analytics(
+        self,
+        db: Session,
+        posts: List[DuePost],
+        results: Dict[str, Dict],
+        errors: Dict[str, str],
+        now: datetime
+    ) -> int:
+        """Snapshots, next refresh times and latest values in one transaction"""
+        analytics_refresh_planner.record(db, posts, results, errors, now)
+        return insights_collector.save(db, posts, results)
+
+    async def generate_daily_plan(self):
         """Job: Generate content plan for the day"""
         print("📝 Generating daily content plan...")
 
-        db = SessionLocal()
-
         try:
-            import asyncio
-
             # Generate content ideas
-            ideas = asyncio.run(ai_generator.generate_daily_content_ideas(count=settings.POSTS_PER_DAY))
+            ideas = await ai_generator.generate_daily_content_ideas(count=settings.POSTS_PER_DAY)
 
             # Create scheduled posts based on ideas
-            for idea in ideas:
-                post_time = datetime.strptime(idea.get("best_time", "12:00"), "%H:%M")
-                scheduled_time = datetime.utcnow().replace(
-                    hour=post_time.hour,
-                    minute=post_time.minute,
-                    second=0,
-                    microsecond=0
-                )
-
-                # If time has passed, schedule for tomorrow
-                if scheduled_time < datetime.utcnow():
-                    scheduled_time += timedelta(days=1)
-
-                new_post = ContentPost(
-                    title=idea.get("topic", ""),
-                    caption=idea.get("caption_idea", ""),
-                    content_type=idea.get("type", "meme"),
-                    status="draft",
-                    scheduled_time=scheduled_time
-                )
-
-                db.add(new_post)
-
-            db.commit()
+            def create_drafts(db: Session):
+                for idea in ideas:
+                    post_time = datetime.strptime(idea.get("best_time", "12:00"), "%H:%M")
+                    scheduled_time = datetime.utcnow().replace(
+                        hour=post_time.hour,
+                        minute=post_time.minute,
+                        second=0,
+                        microsecond=0
+                    )
+
+                    # If time has passed, schedule for tomorrow
+                    if scheduled_time < datetime.utcnow():
+                        scheduled_time += timedelta(days=1)
+
+                    db.add(ContentPost(
+                        title=idea.get("topic", ""),
+                        caption=idea.get("caption_idea", ""),
+                        content_type=idea.get("type", "meme"),
+                        status="draft",
+                        scheduled_time=scheduled_time
+                    ))
+
+            await db_writer.run(create_drafts)
             print(f"✅ Created {len(ideas)} content ideas for today")
 
         except Exception as e:
             print(f"❌ Error in generate_daily_plan: {str(e)}")
 
+    def _next_news(self) -> Optional[Dict]:
+        """Latest unused news article as {id, title, description, image_url}"""
+        db = ReadSessionLocal()
+
+        try:
+            news = news_aggregator.get_latest_news(db, limit=1)
+            if not news:
+                return None
+
+            return {key: getattr(news[0], key) for key in ("id", "title", "description", "image_url")}
+
         finally:
             db.close()
 
-    def _generate_and_post(self, db: Session):
+    async def _generate_and_post(self):
         """Generate new content and post it"""
-        import asyncio
-
         # Get unused news
-        news = news_aggregator.get_latest_news(db, limit=1)
+        news_item = await asyncio.to_thread(self._next_news)
 
-        if not news:
+        if not news_item:
             print("⚠️ No news available to create content")
             return
 
-        news_item = news[0]
-
         # Generate meme content
-        content = asyncio.run(ai_generator.generate_meme_caption(
-            news_item.title,
-            news_item.description or ""
-        ))
+        content = await ai_generator.generate_meme_caption(
+            news_item["title"],
+            news_item["description"] or ""
+        )
 
         # Create meme image if news has image
         image_path = None
-        if news_item.image_url:
-            image_path = meme_generator.create_text_meme(
-                news_item.image_url,
+        if news_item["image_url"]:
+            image_path = await asyncio.get_running_loop().run_in_executor(
+                _render_executor,
+                meme_generator.create_text_meme,
+                news_item["image_url"],
                 content.get("meme_text_top", ""),
                 content.get("meme_text_bottom", "")
             )
 
         # Create post record
-        caption = content.get("caption", news_item.title)
+        caption = content.get("caption", news_item["title"])
         hashtags = " ".join(content.get("hashtags", []))
         full_caption = f"{caption}\n\n{hashtags}"
 
-        new_post = ContentPost(
-            title=news_item.title,
-            caption=full_caption,
-            content_type="meme",
-            image_path=image_path,
-            news_id=news_item.id,
-            status="draft"
-        )
+        def create_post(db: Session) -> Dict:
+            new_post = ContentPost(
+                title=news_item["title"],
+                caption=full_caption,
+                content_type="meme",
+                image_path=image_path,
+                news_id=news_item["id"],
+                status="draft"
+            )
+            db.add(new_post)
+            db.flush()
+            return {"id": new_post.id, "title": new_post.title, "caption": full_caption, "image_path": image_path}
 
-        db.add(new_post)
-        db.commit()
+        post = await db_writer.run(create_post)
 
         # Post to Facebook
-        self._post_content(db, new_post)
+        await self._post_content(post)
 
         # Mark news as used
-        news_item.is_used = True
-        db.commit()
+        def mark_used(db: Session):
+            article = db.get(NewsArticle, news_item["id"])
+            if article:
+                article.is_used = True
+
+        await db_writer.run(mark_used)
 
-    def _post_content(self, db: Session, post: ContentPost):
-        """Post content to Facebook"""
+    async def _post_content(self, post: Dict):
+        """Post content to Facebook (post: {id, title, caption, image_path})"""
 
         try:
-            if post.image_path:
-                result = facebook_service.post_photo(post.image_path, post.caption)
+            # Graph API calls are blocking (requests)
+            if post["image_path"]:
+                result = await asyncio.to_thread(facebook_service.post_photo, post["image_path"], post["caption"])
             else:
-                result = facebook_service.post_text(post.caption)
+                result = await asyncio.to_thread(facebook_service.post_text, post["caption"])
 
             if result.get("success"):
-                post.status = "posted"
-                post.posted_time = datetime.utcnow()
-                post.fb_post_id = result.get("post_id")
-                print(f"✅ Posted: {post.title[:50]}...")
+                changes = {"status": "posted", "posted_time": datetime.utcnow(), "fb_post_id": result.get("post_id")}
+                print(f"✅ Posted: {post['title'][:50]}...")
             else:
-                post.status = "failed"
+                changes = {"status": "failed"}
                 print(f"❌ Failed to post: {result.get('error')}")
 
-            db.commit()
-
         except Exception as e:
             print(f"❌ Error posting content: {str(e)}")
-            post.status = "failed"
-            db.commit()
+            changes = {"status": "failed"}
+
+        def update_post(db: Session):
+            row = db.get(ContentPost, post["id"])
+            if row:
+                for field, value in changes.items():
+                    setattr(row, field, value)
+
+        await db_writer.run(update_post)
 
 # Global scheduler instance
 scheduler_service = SchedulerService()
 
 def start_scheduler():
-    """Start the global scheduler"""
+    """Start the global scheduler (call from the running event loop)"""
     scheduler_service.start()
 
 def stop_scheduler():
@@ -0,0 +1,462 @@
+"""
+Search Service
+Full-text index over news, content suggestions and meme templates
+(SQLite FTS5 / PostgreSQL tsvector), kept in sync by database triggers
+"""
+
+import base64
+import json
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.database import NewsArticle
+from app.models.content_suggestions import ContentSuggestion
+from app.models.meme_templates import MemeTemplate
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Index key = source id * KEY_STRIDE + type code, so one index covers all sources
+KEY_STRIDE = 4
+
+# SQLite: đ has no Unicode decomposition, so unicode61's diacritic removal
+# does not fold it - do it before tokenizing
+_SQLITE_FOLD = "replace(replace(coalesce({}, ''), 'đ', 'd'), 'Đ', 'D')"
+
+SEARCH_SOURCES = {
+    "news": {
+        "code": 1,
+        "model": NewsArticle,
+        "table": "news_articles",
+        "columns": ("title", "description"),
+        "sqlite": {
+            "title": _SQLITE_FOLD.format("{row}.title"),
+            "body": _SQLITE_FOLD.format("{row}.description"),
+        },
+        "postgresql": {
+            "title": "{row}.title",
+            "body": "{row}.description",
+        },
+    },
+    "suggestion": {
+        "code": 2,
+        "model": ContentSuggestion,
+        "table": "content_suggestions",
+        "columns": ("title", "content", "hashtags"),
+        "sqlite": {
+            "title": _SQLITE_FOLD.format("{row}.title"),
+            "body": _SQLITE_FOLD.format("{row}.content || ' ' || coalesce({row}.hashtags, '')"),
+        },
+        "postgresql": {
+            "title": "{row}.title",
+            "body": "coalesce({row}.content, '') || ' ' || coalesce({row}.hashtags::text, '')",
+        },
+    },
+    "meme": {
+        "code": 3,
+        "model": MemeTemplate,
+        "table": "meme_templates",
+        "columns": ("title", "category", "tags", "analysis"),
+        "sqlite": {
+            "title": _SQLITE_FOLD.format("{row}.title"),
+            "body": _SQLITE_FOLD.format(
+                "coalesce({row}.category, '') || ' ' || coalesce({row}.tags, '') || ' ' || "
+                "CASE WHEN json_valid({row}.analysis) THEN "
+                "coalesce(json_extract({row}.analysis, '$.caption'), '') || ' ' || "
+                "coalesce(json_extract({row}.analysis, '$.description'), '') ELSE '' END"
+            ),
+        },
+        "postgresql": {
+            "title": "{row}.title",
+            "body": (
+                "coalesce({row}.category, '') || ' ' || coalesce({row}.tags::text, '') || ' ' || "
+                "coalesce({row}.analysis->>'caption', '') || ' ' || coalesce({row}.analysis->>'description', '')"
+            ),
+        },
+    },
+}
+
+SOURCES_BY_CODE = {source["code"]: name for name, source in SEARCH_SOURCES.items()}
+
+
+class SearchIndex:
+    """Ranked, diacritic-insensitive search with keyset pagination"""
+
+    # Relative weight of title vs body matches (SQLite bm25)
+    TITLE_WEIGHT = 4.0
+    BODY_WEIGHT = 1.0
+
+    # Only the newest N matches of each source are ranked - scoring every hit
+    # of a common word is what makes searches slow on large tables
+    MAX_RANKED = 10000
+
+    def __init__(self):
+        self.dialect: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        return self.dialect in ("sqlite", "postgresql")
+
+    # ---- Schema -----------------------------------------------------------
+
+    def install(self, engine: Engine):
+        """Create the index and its sync triggers; backfills when the index is new"""
+        dialect = engine.dialect.name
+
+        if dialect not in ("sqlite", "postgresql"):
+            print(f"⚠️ Full-text search not supported on {dialect}")
+            return
+
+        try:
+            with engine.begin() as conn:
+                if dialect == "sqlite":
+                    self._install_sqlite(conn)
+                else:
+                    self._install_postgresql(conn)
+
+            self.dialect = dialect
+            print(f"🔎 Search index ready ({dialect})")
+
+        except Exception as e:
+            print(f"⚠️ Could not set up search index: {e}")
+
+    def _expr(self, dialect: str, source: Dict, part: str, row: str) -> str:
+        return source[dialect][part].format(row=row)
+
+    def _install_sqlite(self, conn):
+        is_new = not inspect(conn).has_table("search_index")
+
+        # Contentless: the index holds only tokens, rows are hydrated from the source tables
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "title, body, content='', tokenize='unicode61 remove_diacritics 2')"
+        ))
+
+        for name, source in SEARCH_SOURCES.items():
+            key = f"{{row}}.id * {KEY_STRIDE} + {source['code']}"
+            insert_new = (
+                "INSERT INTO search_index(rowid, title, body) VALUES ({key}, {title}, {body});"
+            ).format(
+                key=key.format(row="new"),
+                title=self._expr("sqlite", source, "title", "new"),
+                body=self._expr("sqlite", source, "body", "new")
+            )
+            # Contentless tables need the originally indexed values to delete a row
+            delete_old = (
+                "INSERT INTO search_index(search_index, rowid, title, body) "
+                "VALUES ('delete', {key}, {title}, {body});"
+            ).format(
+                key=key.format(row="old"),
+                title=self._expr("sqlite", source, "title", "old"),
+                body=self._expr("sqlite", source, "body", "old")
+            )
+
+            table = source["table"]
+            columns = ", ".join(source["columns"])
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS search_{name}_ai AFTER INSERT ON {table} "
+                f"BEGIN {insert_new} END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS search_{name}_ad AFTER DELETE ON {table} "
+                f"BEGIN {delete_old} END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS search_{name}_au AFTER UPDATE OF {columns} ON {table} "
+                f"BEGIN {delete_old} {insert_new} END"
+            ))
+
+            if is_new:
+                conn.execute(text(
+                    f"INSERT INTO search_index(rowid, title, body) "
+                    f"SELECT {key.format(row=table)}, "
+                    f"{self._expr('sqlite', source, 'title', table)}, "
+                    f"{self._expr('sqlite', source, 'body', table)} FROM {table}"
+                ))
+
+    def _install_postgresql(self, conn):
+        is_new = not inspect(conn).has_table("search_documents")
+
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS search_documents ("
+            "doc_key BIGINT PRIMARY KEY, tsv TSVECTOR NOT NULL)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_search_documents_tsv ON search_documents USING GIN (tsv)"
+        ))
+
+        for name, source in SEARCH_SOURCES.items():
+            table = source["table"]
+            columns = ", ".join(source["columns"])
+
+            conn.execute(text(f"""
+                CREATE OR REPLACE FUNCTION search_sync_{name}() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP = 'DELETE' THEN
+                        DELETE FROM search_documents WHERE doc_key = OLD.id * {KEY_STRIDE} + {source['code']};
+                        RETURN OLD;
+                    END IF;
+
+                    INSERT INTO search_documents (doc_key, tsv)
+                    VALUES (NEW.id * {KEY_STRIDE} + {source['code']}, {self._pg_vector(source, 'NEW')})
+                    ON CONFLICT (doc_key) DO UPDATE SET tsv = EXCLUDED.tsv;
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+            """))
+            conn.execute(text(f"DROP TRIGGER IF EXISTS search_sync_{name} ON {table}"))
+            conn.execute(text(
+                f"CREATE TRIGGER search_sync_{name} "
+                f"AFTER INSERT OR UPDATE OF {columns} OR DELETE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION search_sync_{name}()"
+            ))
+
+            if is_new:
+                conn.execute(text(
+                    f"INSERT INTO search_documents (doc_key, tsv) "
+                    f"SELECT id * {KEY_STRIDE} + {source['code']}, {self._pg_vector(source, table)} FROM {table}"
+                ))
+
+    def _pg_vector(self, source: Dict, row: str) -> str:
+        # unaccent folds Vietnamese diacritics (including đ); 'simple' skips stemming
+        return (
+            "setweight(to_tsvector('simple', unaccent(coalesce({title}, ''))), 'A') || "
+            "setweight(to_tsvector('simple', unaccent(coalesce({body}, ''))), 'B')"
+        ).format(
+            title=self._expr("postgresql", source, "title", row),
+            body=self._expr("postgresql", source, "body", row)
+        )
+
+    def rebuild(self, engine: Engine):
+        """Drop and recreate the index (after changing indexed expressions)"""
+        dialect = engine.dialect.name
+
+        with engine.begin() as conn:
+            for name, source in SEARCH_SOURCES.items():
+                if dialect == "sqlite":
+                    for suffix in ("ai", "ad", "au"):
+                        conn.execute(text(f"DROP TRIGGER IF EXISTS search_{name}_{suffix}"))
+                elif dialect == "postgresql":
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS search_sync_{name} ON {source['table']}"))
+
+            if dialect == "sqlite":
+                conn.execute(text("DROP TABLE IF EXISTS search_index"))
+            elif dialect == "postgresql":
+                conn.execute(text("DROP TABLE IF EXISTS search_documents"))
+
+        self.install(engine)
+
+    # ---- Queries ----------------------------------------------------------
+
+    def tokenize(self, query: str) -> List[str]:
+        """Lowercase, strip diacritics (đ -> d) and split into word tokens"""
+        folded = unicodedata.normalize("NFD", query.lower().replace("đ", "d"))
+        folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+        return _TOKEN_RE.findall(folded)[:16]
+
+    def _encode_cursor(self, score: float, key: int, floors: Dict[int, int]) -> str:
+        raw = json.dumps([score, key, floors]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def _decode_cursor(self, cursor: str):
+        try:
+            score, key, floors = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return float(score), int(key), {int(code): int(floor) for code, floor in floors.items()}
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def _floor_filter(self, column: str, floors: Dict[int, int]) -> Optional[str]:
+        """
+        Drop each source's matches below its floor
+
+        Keys interleave the sources' own id sequences, so one floor over all
+        keys would cut off every low-id meme or suggestion once news has
+        MAX_RANKED newer matches. Each source gets its own.
+        """
+        capped = [(code, floor) for code, floor in sorted(floors.items()) if floor]
+        if not capped:
+            return None
+
+        return " AND ".join(
+            f"NOT ({column} % {KEY_STRIDE} = {code} AND {column} < {floor})"
+            for code, floor in capped
+        )
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        types: Sequence[str] = None,
+        limit: int = 20,
+        cursor: str = None,
+        prefix: bool = True
+    ) -> Dict:
+        """
+        Ranked search across all indexed sources
+
+        Args:
+            query: Free text; every word must match, the last one as a prefix
+            types: Restrict to these sources ("news", "suggestion", "meme")
+            cursor: next_cursor from the previous page
+
+        Returns:
+            {"results": [...], "next_cursor": str or None}
+        """
+        if not self.available:
+            raise RuntimeError("Search index is not available")
+
+        tokens = self.tokenize(query)
+        if not tokens:
+            return {"results": [], "next_cursor": None}
+
+        codes = [SEARCH_SOURCES[t]["code"] for t in (types or SEARCH_SOURCES) if t in SEARCH_SOURCES]
+        if not codes:
+            return {"results": [], "next_cursor": None}
+
+        after = self._decode_cursor(cursor) if cursor else None
+
+        if self.dialect == "sqlite":
+            hits, floors = self._search_sqlite(db, tokens, codes, limit + 1, after, prefix)
+        else:
+            hits, floors = self._search_postgresql(db, tokens, codes, limit + 1, after, prefix)
+
+        has_more = len(hits) > limit
+        hits = hits[:limit]
+
+        next_cursor = None
+        if has_more:
+            last_key, last_score = hits[-1]
+            # The floors are kept so new inserts don't shift later pages
+            next_cursor = self._encode_cursor(last_score, last_key, floors)
+
+        return {"results": self._hydrate(db, hits), "next_cursor": next_cursor}
+
+    def _search_sqlite(self, db: Session, tokens, codes, limit, after, prefix):
+        match = " ".join(f'"{t}"' for t in tokens)
+        if prefix:
+            match += "*"
+
+        # bm25 is lower-is-better, so ascending (score, key) is the ranking order
+        score = f"bm25(search_index, {self.TITLE_WEIGHT}, {self.BODY_WEIGHT})"
+        params = {"match": match, "limit": limit}
+
+        where = ["search_index MATCH :match"]
+        if len(codes) < len(SEARCH_SOURCES):
+            where.append(f"rowid % {KEY_STRIDE} IN ({', '.join(str(c) for c in codes)})")
+
+        if after:
+            floors = after[2]
+        else:
+            # Walking the doclist backwards by rowid is cheap - no scoring involved
+            floors = {
+                code: db.execute(text(
+                    f"SELECT rowid FROM search_index WHERE search_index MATCH :match AND rowid % {KEY_STRIDE} = {code} "
+                    f"ORDER BY rowid DESC LIMIT 1 OFFSET :cap"
+                ), {**params, "cap": self.MAX_RANKED}).scalar() or 0
+                for code in codes
+            }
+
+        floor_filter = self._floor_filter("rowid", floors)
+        if floor_filter:
+            where.append(floor_filter)
+
+        if after:
+            where.append(f"({score} > :after_score OR ({score} = :after_score AND rowid > :after_key))")
+            params.update(after_score=after[0], after_key=after[1])
+
+        rows = db.execute(text(
+            f"SELECT rowid AS doc_key, {score} AS score FROM search_index "
+            f"WHERE {' AND '.join(where)} ORDER BY score, doc_key LIMIT :limit"
+        ), params).all()
+
+        return [(row.doc_key, row.score) for row in rows], floors
+
+    def _search_postgresql(self, db: Session, tokens, codes, limit, after, prefix):
+        terms = list(tokens)
+        if prefix:
+            terms[-1] += ":*"
+
+        # Negated rank so ascending (score, key) is the ranking order on both backends
+        score = "-ts_rank(tsv, query)"
+        params = {"query": " & ".join(terms), "limit": limit}
+
+        where = ["tsv @@ query"]
+        if len(codes) < len(SEARCH_SOURCES):
+            where.append(f"doc_key % {KEY_STRIDE} IN ({', '.join(str(c) for c in codes)})")
+
+        source = "FROM search_documents, to_tsquery('simple', :query) AS query"
+
+        if after:
+            floors = after[2]
+        else:
+            floors = {
+                code: db.execute(text(
+                    f"SELECT doc_key {source} WHERE tsv @@ query AND doc_key % {KEY_STRIDE} = {code} "
+                    f"ORDER BY doc_key DESC OFFSET :cap LIMIT 1"
+                ), {**params, "cap": self.MAX_RANKED}).scalar() or 0
+                for code in codes
+            }
+
+        floor_filter = self._floor_filter("doc_key", floors)
+        if floor_filter:
+            where.append(floor_filter)
+
+        if after:
+            where.append(f"({score}, doc_key) > (:after_score, :after_key)")
+            params.update(after_score=after[0], after_key=after[1])
+
+        rows = db.execute(text(
+            f"SELECT doc_key, {score} AS score {source} "
+            f"WHERE {' AND '.join(where)} ORDER BY score, doc_key LIMIT :limit"
+        ), params).all()
+
+        return [(row.doc_key, row.score) for row in rows], floors
+
+    def _hydrate(self, db: Session, hits) -> List[Dict]:
+        """Load the matched rows, one query per source type, keeping rank order"""
+        ids_by_code: Dict[int, List[int]] = {}
+        for key, _ in hits:
+            ids_by_code.setdefault(key % KEY_STRIDE, []).append(key // KEY_STRIDE)
+
+        records = {}
+        for code, ids in ids_by_code.items():
+            model = SEARCH_SOURCES[SOURCES_BY_CODE[code]]["model"]
+            for record in db.query(model).filter(model.id.in_(ids)).all():
+                records[record.id * KEY_STRIDE + code] = record
+
+        results = []
+        for key, score in hits:
+            record = records.get(key)
+            if record is None:
+                continue
+            results.append(self._to_result(SOURCES_BY_CODE[key % KEY_STRIDE], record, score))
+
+        return results
+
+    def _to_result(self, doc_type: str, record, score: float) -> Dict:
+        if doc_type == "news":
+            excerpt, url = record.description, record.url
+        elif doc_type == "suggestion":
+            excerpt, url = record.content, None
+        else:
+            excerpt = (record.analysis or {}).get("description") if isinstance(record.analysis, dict) else None
+            url = record.image_url
+
+        return {
+            "type": doc_type,
+            "id": record.id,
+            "title": record.title,
+            "excerpt": (excerpt or "")[:200],
+            "url": url,
+            "created_at": record.created_at.isoformat() if record.created_at else None,
+            "score": round(-score, 4)
+        }
+
+
+# Singleton instance
+search_index = SearchIndex()
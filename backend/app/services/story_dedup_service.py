@@ -0,0 +1,375 @@
+"""
+Story Deduplication Service
+Cluster near-duplicate news (same story, different outlets) with MinHash + LSH
+"""
+
+import os
+import pickle
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import NewsArticle, NewsStoryMember
+
+# Mersenne prime for the (a * x + b) % p hash family - a * x stays below 2^63
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+# Max URLs per IN (...) lookup
+_URL_CHUNK_SIZE = 500
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class StoryDeduplicator:
+    """MinHash signatures with an in-memory LSH index, persisted to disk"""
+
+    def __init__(self):
+        self.enabled = settings.NEWS_DEDUP_ENABLED
+        self.threshold = settings.NEWS_DEDUP_THRESHOLD
+        self.num_perm = settings.NEWS_DEDUP_NUM_PERM
+        self.bands = settings.NEWS_DEDUP_BANDS
+        self.rows = self.num_perm // self.bands
+        self.window = timedelta(hours=settings.NEWS_DEDUP_WINDOW_HOURS)
+        self.index_path = settings.NEWS_DEDUP_INDEX_PATH
+        self.save_interval = settings.NEWS_DEDUP_SAVE_INTERVAL
+
+        if self.rows * self.bands != self.num_perm:
+            raise ValueError("NEWS_DEDUP_NUM_PERM must be divisible by NEWS_DEDUP_BANDS")
+
+        # Fixed seed: signatures must stay comparable across restarts
+        rng = np.random.RandomState(42)
+        self._a = rng.randint(1, int(_MERSENNE_PRIME), size=self.num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_MERSENNE_PRIME), size=self.num_perm).astype(np.uint64)
+
+        # article_id -> (signature, added_at timestamp)
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._added_at: Dict[int, float] = {}
+        # One bucket table per band: band key -> article ids
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(self.bands)]
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False  # indexed articles not in the snapshot on disk yet
+        self._saved_at = 0.0
+
+    # ---- Signatures -------------------------------------------------------
+
+    def _normalize(self, text: str) -> List[str]:
+        """Lowercase, strip diacritics (đ -> d) and split into word tokens"""
+        text = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+        return _TOKEN_RE.findall(text)
+
+    def _shingles(self, title: str, description: str) -> Set[str]:
+        """Word bigrams of title + description (unigrams for one-word texts)"""
+        tokens = self._normalize(f"{title or ''} {description or ''}")
+        if len(tokens) < 2:
+            return set(tokens)
+        return {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+    def signature(self, title: str, description: str = "") -> Optional[np.ndarray]:
+        """MinHash signature of a story, or None if it has no text"""
+        shingles = self._shingles(title, description)
+        if not shingles:
+            return None
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[i * self.rows:(i + 1) * self.rows].tobytes()
+            for i in range(self.bands)
+        ]
+
+    def _similarity(self, sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        """Estimated Jaccard similarity"""
+        return float(np.count_nonzero(sig_a == sig_b)) / self.num_perm
+
+    # ---- Index ------------------------------------------------------------
+
+    def _add(self, article_id: int, signature: np.ndarray, added_at: float):
+        self._signatures[article_id] = signature
+        self._added_at[article_id] = added_at
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, set()).add(article_id)
+
+    def _remove(self, article_id: int):
+        signature = self._signatures.pop(article_id, None)
+        self._added_at.pop(article_id, None)
+        if signature is None:
+            return
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket:
+                bucket.discard(article_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def _best_match(self, signature: np.ndarray) -> Tuple[Optional[int], float]:
+        """Most similar indexed article above the threshold"""
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best_id, best_score = None, 0.0
+        for article_id in candidates:
+            score = self._similarity(signature, self._signatures[article_id])
+            if score > best_score:
+                best_id, best_score = article_id, score
+
+        if best_score >= self.threshold:
+            return best_id, best_score
+        return None, best_score
+
+    def prune(self, now: float = None):
+        """Drop stories older than the comparison window"""
+        cutoff = (now or time.time()) - self.window.total_seconds()
+        with self._lock:
+            for article_id in [a for a, ts in self._added_at.items() if ts < cutoff]:
+                self._remove(article_id)
+
+    def ensure_loaded(self, db: Session):
+        """Load the index from disk, or rebuild it from recent articles"""
+        if self._loaded:
+            return
+
+        with self._lock:
+            if self._loaded:
+                return
+
+            if self._load_from_disk():
+                # Articles indexed after the snapshot was taken
+                if self._rebuild(db, after_id=max(self._signatures, default=0)):
+                    self._dirty = True
+            else:
+                self._rebuild(db)
+                self.save()
+
+            self._loaded = True
+            self.prune()
+
+    def _load_from_disk(self) -> bool:
+        if not os.path.exists(self.index_path):
+            return False
+
+        try:
+            with open(self.index_path, "rb") as f:
+                data = pickle.load(f)
+
+            if data.get("params") != self._params():
+                print("⚠️ Story index parameters changed, rebuilding")
+                return False
+
+            for article_id, (signature, added_at) in data["entries"].items():
+                self._add(article_id, signature, added_at)
+
+            print(f"📚 Loaded story index: {len(self._signatures)} stories")
+            return True
+
+        except Exception as e:
+            print(f"⚠️ Could not load story index: {e}")
+            return False
+
+    def _rebuild(self, db: Session, after_id: int = 0) -> int:
+        """Index recent articles with an id above after_id; returns how many were read"""
+        cutoff = datetime.utcnow() - self.window
+        articles = db.query(
+            NewsArticle.id, NewsArticle.title, NewsArticle.description, NewsArticle.created_at
+        ).filter(NewsArticle.created_at >= cutoff, NewsArticle.id > after_id).all()
+
+        for article in articles:
+            signature = self.signature(article.title, article.description)
+            if signature is not None:
+                # created_at is naive UTC - timestamp() alone would read it as local time
+                added_at = (
+                    article.created_at.replace(tzinfo=timezone.utc).timestamp()
+                    if article.created_at else time.time()
+                )
+                self._add(article.id, signature, added_at)
+
+        if after_id:
+            print(f"📚 Indexed {len(articles)} articles added since the last snapshot")
+        else:
+            print(f"📚 Rebuilt story index from {len(articles)} recent articles")
+        return len(articles)
+
+    def _params(self) -> Dict:
+        return {"num_perm": self.num_perm, "bands": self.bands, "seed": 42}
+
+    def save(self):
+        """Persist signatures to disk (buckets are rebuilt on load)"""
+        with self._lock:
+            data = {
+                "params": self._params(),
+                "entries": {
+                    article_id: (signature, self._added_at[article_id])
+                    for article_id, signature in self._signatures.items()
+                }
+            }
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+        except Exception as e:
+            print(f"⚠️ Could not save story index: {e}")
+
+        self._saved_at = time.time()
+
+    def flush(self):
+        """Persist the index if it changed since the last snapshot"""
+        if self._dirty:
+            self.save()
+
+    # ---- Ingestion --------------------------------------------------------
+
+    def plan(self, db: Session, rows: List[Dict]) -> Dict:
+        """
+        Split new rows into canonical articles and near-duplicate members
+
+        Does not touch the index; call apply() after the articles are inserted.
+
+        Returns:
+            {
+                "articles": rows to insert as NewsArticle,
+                "members": [(row, target, similarity)] where target is an
+                           existing article id or the URL of a canonical row
+                           from this batch,
+                "signatures": {url: signature} for canonical rows
+            }
+        """
+        plan = {"articles": [], "members": [], "signatures": {}}
+
+        if not self.enabled:
+            plan["articles"] = list(rows)
+            return plan
+
+        self.ensure_loaded(db)
+
+        # Small LSH index for stories repeated inside this batch
+        batch_buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+
+        with self._lock:
+            for row in rows:
+                signature = self.signature(row.get("title", ""), row.get("description", ""))
+
+                if signature is None:
+                    plan["articles"].append(row)
+                    continue
+
+                article_id, score = self._best_match(signature)
+                if article_id is not None:
+                    plan["members"].append((row, article_id, score))
+                    continue
+
+                band_keys = self._band_keys(signature)
+                batch_url, batch_score = self._best_batch_match(signature, band_keys, batch_buckets, plan["signatures"])
+                if batch_url is not None:
+                    plan["members"].append((row, batch_url, batch_score))
+                    continue
+
+                plan["articles"].append(row)
+                plan["signatures"][row["url"]] = signature
+                for band, key in enumerate(band_keys):
+                    batch_buckets[band].setdefault(key, []).append(row["url"])
+
+        return plan
+
+    def _best_batch_match(self, signature, band_keys, batch_buckets, batch_signatures) -> Tuple[Optional[str], float]:
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates.update(batch_buckets[band].get(key, ()))
+
+        best_url, best_score = None, 0.0
+        for url in candidates:
+            score = self._similarity(signature, batch_signatures[url])
+            if score > best_score:
+                best_url, best_score = url, score
+
+        if best_score >= self.threshold:
+            return best_url, best_score
+        return None, best_score
+
+    def apply(self, db: Session, plan: Dict) -> Dict[str, int]:
+        """
+        Attach near-duplicates to their clusters after the canonical articles were inserted
+
+        Adds the member rows to the session (caller commits) and returns
+        {url: article_id} for the canonical rows so they can be indexed once
+        the transaction is committed.
+        """
+        canonical_urls = list(plan["signatures"])
+        article_ids = {}
+
+        for i in range(0, len(canonical_urls), _URL_CHUNK_SIZE):
+            chunk = canonical_urls[i:i + _URL_CHUNK_SIZE]
+            for row in db.query(NewsArticle.id, NewsArticle.url).filter(NewsArticle.url.in_(chunk)).all():
+                article_ids[row.url] = row.id
+
+        members = []
+        for row, target, similarity in plan["members"]:
+            article_id = article_ids.get(target) if isinstance(target, str) else target
+            if article_id is None:
+                continue
+            members.append({
+                "article_id": article_id,
+                "url": row["url"],
+                "title": row.get("title"),
+                "source": row.get("source"),
+                "similarity": round(similarity, 3)
+            })
+
+        if members:
+            db.execute(insert(NewsStoryMember), members)
+            print(f"🔗 Attached {len(members)} near-duplicate stories to existing clusters")
+
+        return article_ids
+
+    def index(self, plan: Dict, article_ids: Dict[str, int]):
+        """
+        Add committed canonical articles to the LSH index
+
+        The index is written to disk at most every NEWS_DEDUP_SAVE_INTERVAL
+        seconds; articles added since the last snapshot are re-read from the
+        database when the index is loaded.
+        """
+        if not self.enabled or not article_ids:
+            return
+
+        now = time.time()
+        with self._lock:
+            for url, article_id in article_ids.items():
+                self._add(article_id, plan["signatures"][url], now)
+            self._dirty = True
+
+        self.prune(now)
+        if now - self._saved_at >= self.save_interval:
+            self.save()
+
+    def get_members(self, db: Session, article_id: int) -> List[NewsStoryMember]:
+        """Other outlets' copies of a story"""
+        return db.query(NewsStoryMember).filter(
+            NewsStoryMember.article_id == article_id
+        ).order_by(NewsStoryMember.created_at).all()
+
+
+# Singleton instance
+story_deduplicator = StoryDeduplicator()
@@ -12,6 +12,8 @@ from collections import Counter, defaultdict
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 
+from app.services.keyword_matcher import KeywordMatcher
+
 # Note: You'll need to install these
 # pip install tweepy praw textblob
 
@@ -70,6 +72,16 @@ class TrendDetectorService:
             "engagement_rate": 0.05,  # 5%+ engagement = viral
         }
 
+        # Keyword classes for viral prediction
+        self.viral_matcher = KeywordMatcher({
+            "celebrity": ["Ronaldo", "Messi", "Mbappe", "Haaland", "Neymar"],
+            "emotional": [
+                "amazing", "shocking", "unbelievable", "disaster", "controversy",
+                "không thể tin", "kinh ngạc", "thảm họa"
+            ],
+            "controversial": ["VAR", "red card", "penalty", "thẻ đỏ"]
+        })
+
         # Celebrity accounts (high impact)
         self.CELEBRITY_ACCOUNTS = [
             "Cristiano", "TeamCRonaldo", "FCBarcelona", "realmadriden",
@@ -309,19 +321,16 @@ class TrendDetectorService:
         score = 0.0
         factors = []
 
+        # All keyword classes matched against the title at once
+        title_matches = self.viral_matcher.match(title)
+
         # Factor 1: Celebrity names (20 points)
-        celebrities = ["Ronaldo", "Messi", "Mbappe", "Haaland", "Neymar"]
-        if any(celeb.lower() in title.lower() for celeb in celebrities):
+        if "celebrity" in title_matches:
             score += 20
             factors.append("Celebrity mention")
 
         # Factor 2: Emotional keywords (20 points)
-        emotional_words = [
-            "amazing", "shocking", "unbelievable", "disaster", "controversy",
-            "không thể tin", "kinh ngạc", "thảm họa"
-        ]
-        if any(word.lower() in title.lower() or word.lower() in description.lower()
-               for word in emotional_words):
+        if "emotional" in title_matches or self.viral_matcher.match(description, ("emotional",)):
             score += 20
             factors.append("Emotional content")
 
@@ -336,8 +345,7 @@ class TrendDetectorService:
             factors.append("Vietnamese relevance")
 
         # Factor 5: Controversial topics (20 points)
-        controversial = ["VAR", "red card", "penalty", "thẻ đỏ"]
-        if any(word.lower() in title.lower() for word in controversial):
+        if "controversial" in title_matches:
             score += 20
             factors.append("Controversial topic")
 
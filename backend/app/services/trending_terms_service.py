@@ -0,0 +1,177 @@
+"""
+Trending Terms Service
+Incremental hourly term counters for news trending topics
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import NewsArticle, TrendingTermBucket
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Function words that never make a useful topic
+ENGLISH_STOP_WORDS = frozenset("""
+about above after again against along among around because before behind below between
+could during every first from have having here into just last like more most much never
+over said says should since some than that their them then there these they this those
+through under until very what when where which while will with without would your
+""".split())
+
+VIETNAMESE_STOP_WORDS = frozenset("""
+và của là có được cho với trong không những các một người này đã sẽ khi về tại từ ra vào
+lại đến theo như sau trước bị thì mà nhưng cũng rất nhiều hơn đang vẫn còn chỉ nên nếu
+để do bởi vì đó đây ấy nào gì sao thế hay hoặc cùng trên dưới giữa ngoài qua năm ngày
+tháng giờ phút lần việc điều cách đi làm nói thấy muốn phải biết ông anh chị em họ chúng
+tôi bạn mình sự cuộc nhà
+""".split())
+
+
+class TrendingTermStore:
+    """Term frequencies bucketed by hour, so trending queries sum buckets instead of rescanning articles"""
+
+    def tokenize(self, title: str) -> List[str]:
+        """
+        Extract topic terms from a title
+
+        Latin (ASCII) words need at least 5 letters; Vietnamese syllables are
+        short by nature, so accented tokens only need 2 - stop words are
+        dropped either way.
+        """
+        if not title:
+            return []
+
+        text = unicodedata.normalize("NFC", title.lower())
+        terms = []
+
+        for token in _TOKEN_RE.findall(text):
+            if token.isdigit():
+                continue
+
+            if token.isascii():
+                if len(token) <= 4 or token in ENGLISH_STOP_WORDS or token in VIETNAMESE_STOP_WORDS:
+                    continue
+            elif len(token) < 2 or token in VIETNAMESE_STOP_WORDS:
+                continue
+
+            terms.append(token)
+
+        return terms
+
+    def _bucket(self, published_at: datetime) -> datetime:
+        """Hour bucket (naive UTC) for a publish time"""
+        if published_at is None:
+            published_at = datetime.utcnow()
+        elif published_at.tzinfo is not None:
+            published_at = published_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return published_at.replace(minute=0, second=0, microsecond=0)
+
+    def count_terms(self, articles: List[Dict]) -> Counter:
+        """Count terms per (bucket, term) for a batch of new articles"""
+        counts = Counter()
+        for article in articles:
+            bucket = self._bucket(article.get("published_at"))
+            for term in self.tokenize(article.get("title", "")):
+                counts[(bucket, term)] += 1
+        return counts
+
+    def record(self, db: Session, articles: List[Dict]):
+        """
+        Add a batch of new articles to the counters
+
+        Uses the caller's transaction (caller commits), so counters and
+        articles are saved together.
+        """
+        counts = self.count_terms(articles)
+        if not counts:
+            return
+
+        rows = [
+            {"bucket_start": bucket, "term": term, "count": count}
+            for (bucket, term), count in counts.items()
+        ]
+
+        dialect = db.bind.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+
+            stmt = upsert(TrendingTermBucket)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["bucket_start", "term"],
+                set_={"count": TrendingTermBucket.count + stmt.excluded.count}
+            )
+            db.execute(stmt, rows)
+        else:
+            self._record_generic(db, rows)
+
+    def _record_generic(self, db: Session, rows: List[Dict]):
+        """Upsert fallback for databases without ON CONFLICT"""
+        buckets = {row["bucket_start"] for row in rows}
+        existing = {
+            (b.bucket_start, b.term): b
+            for b in db.query(TrendingTermBucket).filter(TrendingTermBucket.bucket_start.in_(buckets)).all()
+        }
+
+        for row in rows:
+            bucket = existing.get((row["bucket_start"], row["term"]))
+            if bucket:
+                bucket.count += row["count"]
+            else:
+                db.add(TrendingTermBucket(**row))
+
+    def prune(self, db: Session):
+        """Drop buckets older than the retention period"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.TRENDING_TERMS_RETENTION_DAYS)
+        db.query(TrendingTermBucket).filter(
+            TrendingTermBucket.bucket_start < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    def rebuild(self, db: Session):
+        """Recount all buckets from stored articles (one-off backfill)"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.TRENDING_TERMS_RETENTION_DAYS)
+
+        db.query(TrendingTermBucket).delete(synchronize_session=False)
+
+        articles = db.query(NewsArticle.title, NewsArticle.published_at).filter(
+            NewsArticle.published_at >= cutoff
+        ).all()
+
+        self.record(db, [
+            {"title": article.title, "published_at": article.published_at}
+            for article in articles
+        ])
+
+        db.commit()
+        print("📈 Rebuilt trending term counters")
+
+    def top_terms(self, db: Session, hours: int = 24, limit: int = 10) -> List[Dict]:
+        """Most frequent terms over the last N hours, summed from hourly buckets"""
+        # Backfill once when the counters were just introduced
+        if not db.query(TrendingTermBucket.id).first():
+            if not db.query(NewsArticle.id).first():
+                return []
+            self.rebuild(db)
+
+        cutoff = self._bucket(datetime.utcnow() - timedelta(hours=hours))
+        total = func.sum(TrendingTermBucket.count).label("total")
+
+        rows = db.query(TrendingTermBucket.term, total).filter(
+            TrendingTermBucket.bucket_start >= cutoff
+        ).group_by(TrendingTermBucket.term).order_by(total.desc()).limit(limit).all()
+
+        return [{"topic": row.term, "count": int(row.total)} for row in rows]
+
+
+# Singleton instance
+trending_terms = TrendingTermStore()
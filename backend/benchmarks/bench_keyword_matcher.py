@@ -0,0 +1,127 @@
+"""
+Keyword Matcher Benchmark for TrollFB
+Classifies synthetic titles with the previous per-keyword scans and with the shared KeywordMatcher
+
+Usage:
+    python bench_keyword_matcher.py
+    python bench_keyword_matcher.py --titles 100000 --repeat 3
+
+Both paths must return the same categories; exit code 1 otherwise.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.localization_service import localization_service
+from app.services.news_service import news_aggregator
+
+VIETNAMESE_CHARS = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
+
+FILLER = [
+    "coach", "says", "team", "after", "match", "season", "fans", "react", "week", "new",
+    "player", "club", "report", "training", "stadium", "night", "derby", "title", "race", "cup"
+]
+VIETNAMESE_FILLER = ["bóng đá", "trận đấu", "huấn luyện viên", "cầu thủ", "người hâm mộ"]
+
+
+# ---- Previous implementation (per-keyword scans on every call) -------------
+
+def legacy_categorize_content(title: str, description: str = "") -> str:
+    text = f"{title} {description}".lower()
+
+    has_vietnamese_chars = any(char in text for char in VIETNAMESE_CHARS)
+    has_vn = has_vietnamese_chars or any(keyword in text for keyword in settings.VIETNAMESE_KEYWORDS)
+    has_intl = any(keyword in text for keyword in settings.INTERNATIONAL_KEYWORDS)
+
+    if has_vn and not has_intl:
+        return "vietnamese"
+    elif has_intl and not has_vn:
+        return "international"
+    elif has_vn and has_intl:
+        return "mixed"
+    return "general"
+
+
+def legacy_categorize_news(title: str) -> str:
+    title_lower = title.lower()
+
+    if any(word in title_lower for word in ["transfer", "signs", "joins", "linked"]):
+        return "transfer"
+    elif any(word in title_lower for word in ["vs", "wins", "loses", "draw", "goal", "score"]):
+        return "match_result"
+    elif any(word in title_lower for word in ["injury", "injured", "out", "sidelined"]):
+        return "injury"
+    elif any(word in title_lower for word in ["drama", "controversy", "ban", "suspended"]):
+        return "drama"
+    elif any(word in title_lower for word in ["record", "milestone", "achievement"]):
+        return "achievement"
+    return "general"
+
+
+# ---- Benchmark --------------------------------------------------------------
+
+def synthetic_titles(count: int, seed: int = 42):
+    """Titles mixing filler words with Vietnamese, international and category keywords"""
+    rng = random.Random(seed)
+    keywords = settings.VIETNAMESE_KEYWORDS + settings.INTERNATIONAL_KEYWORDS + ["transfer", "injury", "record", "wins"]
+    titles = []
+
+    for _ in range(count):
+        words = rng.sample(FILLER, 6)
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        if rng.random() < 0.3:
+            words.append(rng.choice(VIETNAMESE_FILLER))
+        titles.append(" ".join(words).capitalize())
+
+    return titles
+
+
+def timed(classify, titles, repeat):
+    """Best wall time of repeat runs, with the results of the last one"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [classify(title) for title in titles]
+        best = min(best, time.perf_counter() - started)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark title classification: per-keyword scans vs KeywordMatcher')
+    parser.add_argument('--titles', type=int, default=100000, help='Synthetic titles to classify (default: 100000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per path, best one reported (default: 3)')
+    args = parser.parse_args()
+
+    titles = synthetic_titles(args.titles)
+    paths = [
+        ("localization categorize_content", legacy_categorize_content, localization_service.categorize_content),
+        ("news _categorize_news", legacy_categorize_news, news_aggregator._categorize_news),
+    ]
+
+    mismatches = 0
+    for name, legacy, current in paths:
+        legacy_seconds, legacy_results = timed(legacy, titles, args.repeat)
+        current_seconds, current_results = timed(current, titles, args.repeat)
+        differ = sum(a != b for a, b in zip(legacy_results, current_results))
+        mismatches += differ
+
+        print(f"{name}: {len(titles)} titles")
+        print(f"  per-keyword scans: {legacy_seconds:.3f}s")
+        print(f"  KeywordMatcher:    {current_seconds:.3f}s ({legacy_seconds / current_seconds:.2f}x)")
+        if differ:
+            print(f"  ❌ {differ} titles classified differently")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Render Queue Benchmark for TrollFB
+Model switches and wall time of ComfyUI renders: arrival order (FIFO) vs ComfyUIRenderQueue
+
+Sends --requests meme generation requests for the same four styles, one every --arrival
+seconds from their own threads, to the stand-in ComfyUI server (mock_comfyui.py), which
+charges a penalty whenever a render needs another checkpoint or LoRA. Two of the styles are
+moved to a second checkpoint, so both kinds of switch happen. Each mode starts unloaded:
+  - fifo:  every prompt is handed to ComfyUI in arrival order as soon as it is queued
+           (COMFYUI_MAX_IN_FLIGHT unlimited, no grouping), as before the render queue
+  - queue: the render queue's defaults - COMFYUI_MAX_IN_FLIGHT prompts in ComfyUI, the
+           rest grouped by model
+
+Usage:
+    python bench_render_queue.py
+    python bench_render_queue.py --requests 10 --render-seconds 1 --checkpoint-penalty 4
+
+Exit code 1 when a request loses images, or the render queue does not switch models less
+often and finish sooner than FIFO.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mock_comfyui import MockComfyUI
+
+STYLES = ["claymation", "chibi", "claymate", "doodle_art"]
+SECOND_CHECKPOINT = {"chibi", "doodle_art"}
+
+
+def run(comfy: MockComfyUI, mode: str, requests: int, arrival: float):
+    """(seconds, images, slowest request seconds, render queue model switches)"""
+    from app.core.config import settings
+    from app.services.comfyui_render_queue import comfyui_render_queue
+    from app.services.comfyui_service import comfyui_service
+
+    comfy.reset()
+    max_in_flight = settings.COMFYUI_MAX_IN_FLIGHT
+    if mode == "fifo":
+        settings.COMFYUI_MAX_IN_FLIGHT = 1000
+        comfyui_render_queue._pick = lambda now: comfyui_render_queue._jobs[0]  # oldest job, whatever its model
+    switches_before = comfyui_render_queue.stats["model_switches"]
+
+    images, latencies = [], []
+
+    def request(n: int):
+        started = time.perf_counter()
+        results = comfyui_service.generate_meme_images(f"Meme {n}", "caption", f"Player{n}", selected_styles=STYLES)
+        latencies.append(time.perf_counter() - started)
+        images.append(len(results))
+
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            threads = []
+            for n in range(requests):
+                thread = threading.Thread(target=request, args=(n,))
+                thread.start()
+                threads.append(thread)
+                time.sleep(arrival)
+            for thread in threads:
+                thread.join()
+    finally:
+        settings.COMFYUI_MAX_IN_FLIGHT = max_in_flight
+        comfyui_render_queue.__dict__.pop("_pick", None)
+
+    switches = comfyui_render_queue.stats["model_switches"] - switches_before
+    return time.perf_counter() - started, sum(images), max(latencies), switches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FIFO vs render queue against a stand-in ComfyUI with model load penalties')
+    parser.add_argument('--requests', type=int, default=6, help='Meme generation requests (default: 6)')
+    parser.add_argument('--arrival', type=float, default=0.3, help='Seconds between requests (default: 0.3)')
+    parser.add_argument('--render-seconds', type=float, default=0.25, help='Seconds per render (default: 0.25)')
+    parser.add_argument('--checkpoint-penalty', type=float, default=1.0, help='Seconds to load a checkpoint (default: 1.0)')
+    parser.add_argument('--lora-penalty', type=float, default=0.4, help='Seconds to apply another LoRA (default: 0.4)')
+    args = parser.parse_args()
+
+    comfy = MockComfyUI(args.render_seconds, args.checkpoint_penalty, args.lora_penalty)
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_render_queue_"))
+    os.environ["COMFYUI_URL"] = comfy.start()
+    os.environ["COMFYUI_PATH"] = str(workdir)
+    os.chdir(workdir)
+
+    from app.services.comfyui_service import comfyui_service
+    for style in SECOND_CHECKPOINT:
+        comfyui_service.STYLE_CONFIGS[style]["checkpoint"] = "JuggernautXL.safetensors"
+
+    expected = args.requests * len(STYLES)
+    print(f"🎨 {args.requests} requests x {len(STYLES)} styles, render {args.render_seconds}s, "
+          f"checkpoint load {args.checkpoint_penalty}s, LoRA load {args.lora_penalty}s\n")
+
+    measured = {}
+    ok = True
+    for mode in ("fifo", "queue"):
+        seconds, images, slowest, switches = run(comfy, mode, args.requests, args.arrival)
+        measured[mode] = (seconds, comfy.stats["checkpoint_loads"], comfy.stats["lora_loads"])
+        ok &= images == expected
+        print(f"{'✅' if images == expected else '❌'} {mode:5} {seconds:6.1f}s  {images}/{expected} images  "
+              f"{comfy.stats['checkpoint_loads']:2} checkpoint loads  {comfy.stats['lora_loads']:2} LoRA loads  "
+              f"slowest request {slowest:.1f}s" + (f"  ({switches} queue switches)" if mode == "queue" else ""))
+
+    fifo, queue = measured["fifo"], measured["queue"]
+    faster = queue[0] < fifo[0]
+    fewer = queue[1] + queue[2] < fifo[1] + fifo[2]
+    print(f"\n📊 Render queue: {fifo[0] / queue[0]:.1f}x faster, "
+          f"{fifo[1] + fifo[2]} -> {queue[1] + queue[2]} model loads")
+
+    if not (ok and faster and fewer):
+        print("❌ Render queue lost images or did not cut model switches and wall time")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+RSS Ingest Benchmark for TrollFB
+Wall-clock time of fetch_and_save_rss() against a local stand-in server with many slow feeds
+
+Starts a threaded HTTP server on 127.0.0.1 serving --feeds synthetic RSS feeds, each answering
+after its own latency (uniform in [--min-latency, --max-latency], fixed seed). Then it times:
+  - sequential: feedparser.parse(url) for each feed in turn, as fetch_rss_feeds used to
+  - processing: fetch_and_save_rss() on the same feeds served without latency, i.e. the
+    parse, enrich and save work alone (this also starts the enrichment process pool)
+  - concurrent: fetch_and_save_rss() on a fresh set of items with the latencies
+
+Everything is saved into a temporary SQLite database. The sequential run costs about the sum
+of all latencies. The concurrent one should cost about the processing time plus
+max(slowest feed, sum of latencies / NEWS_FETCH_CONCURRENCY).
+
+Usage:
+    python bench_rss_ingest.py
+    python bench_rss_ingest.py --feeds 100 --concurrency 100 --max-latency 2
+
+Exit code 1 when an item is missing from the database, or the concurrent run takes more
+than twice that estimate plus one second (the sources were not fetched in parallel).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def make_feeds(feeds: int, items: int, seed: int, round_name: str):
+    """Synthetic RSS bodies; titles are random words so no two items look like the same story"""
+    rng = random.Random(f"{seed}-{round_name}")
+    vocabulary = [f"word{i}" for i in range(5000)]
+    bodies = []
+
+    for feed in range(feeds):
+        entries = "".join(
+            f"<item><title>{' '.join(rng.sample(vocabulary, 8))}</title>"
+            f"<link>http://feeds.bench/{round_name}/{feed}/{item}</link>"
+            f"<description>{' '.join(rng.sample(vocabulary, 30))}</description>"
+            f"<pubDate>Mon, 01 Jan 2024 10:{item % 60:02d}:00 +0000</pubDate></item>"
+            for item in range(items)
+        )
+        bodies.append(
+            f"<?xml version='1.0'?><rss version='2.0'><channel><title>Feed {feed}</title>"
+            f"{entries}</channel></rss>".encode()
+        )
+
+    return bodies
+
+
+def start_server(rounds):
+    """Serve /<round>/<n> with feed n of that round after its latency"""
+
+    class FeedHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            round_name, feed = self.path.strip("/").split("/")
+            bodies, latencies = rounds[round_name]
+            time.sleep(latencies[int(feed)])
+            body = bodies[int(feed)]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence stdout at the file descriptor level, including the enrichment processes"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sequential vs concurrent RSS ingest against a stand-in server')
+    parser.add_argument('--feeds', type=int, default=60, help='Synthetic feeds (default: 60)')
+    parser.add_argument('--items', type=int, default=10, help='Items per feed (default: 10)')
+    parser.add_argument('--min-latency', type=float, default=0.1, help='Fastest feed, seconds (default: 0.1)')
+    parser.add_argument('--max-latency', type=float, default=1.0, help='Slowest feed, seconds (default: 1.0)')
+    parser.add_argument('--concurrency', type=int, help='NEWS_FETCH_CONCURRENCY (default: the configured value)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    args = parser.parse_args()
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_rss_bench_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["NEWS_DEDUP_INDEX_PATH"] = str(workdir / "dedup_index.pkl")
+    if args.concurrency:
+        os.environ["NEWS_FETCH_CONCURRENCY"] = str(args.concurrency)
+    os.chdir(workdir)
+
+    import feedparser
+    from app.core.config import settings
+    from app.core.database import init_db, SessionLocal, NewsArticle
+    from app.services.ingest_pipeline import feed_pipeline
+    from app.services.news_service import news_aggregator
+
+    rng = random.Random(args.seed)
+    latencies = [rng.uniform(args.min_latency, args.max_latency) for _ in range(args.feeds)]
+    server = start_server({
+        "warm": (make_feeds(args.feeds, args.items, args.seed, "warm"), [0.0] * args.feeds),
+        "slow": (make_feeds(args.feeds, args.items, args.seed, "slow"), latencies)
+    })
+
+    def sources(round_name):
+        return [f"http://127.0.0.1:{server.server_address[1]}/{round_name}/{feed}" for feed in range(args.feeds)]
+
+    def ingest(round_name):
+        started = time.perf_counter()
+        with quiet():
+            result = asyncio.run(news_aggregator.fetch_and_save_rss(db, sources=sources(round_name)))
+        return result, time.perf_counter() - started
+
+    total_latency = sum(latencies)
+    fetch_bound = max(max(latencies), total_latency / settings.NEWS_FETCH_CONCURRENCY)
+    print(f"📡 {args.feeds} feeds x {args.items} items, latency sum {total_latency:.2f}s, "
+          f"slowest {max(latencies):.2f}s, NEWS_FETCH_CONCURRENCY={settings.NEWS_FETCH_CONCURRENCY}")
+
+    started = time.perf_counter()
+    parsed = sum(len(feedparser.parse(url).entries) for url in sources("slow"))
+    sequential = time.perf_counter() - started
+    print(f"🐢 Sequential feedparser.parse: {sequential:.2f}s ({parsed} entries)")
+
+    with quiet():
+        init_db()
+    db = SessionLocal()
+
+    warm_result, processing = ingest("warm")
+    print(f"⚙️  Processing only (no latency): {processing:.2f}s")
+
+    result, concurrent = ingest("slow")
+    stages = feed_pipeline.get_stats()["last_run"]["stages"]
+    estimate = processing + fetch_bound
+    print(f"🚀 Concurrent fetch_and_save_rss: {concurrent:.2f}s "
+          f"(estimate {estimate:.2f}s, {sequential / concurrent:.1f}x faster than sequential)")
+    print("   busy seconds per stage: " + ", ".join(
+        f"{stage} {metrics['busy_seconds']:.2f}" for stage, metrics in stages.items()
+    ))
+
+    saved = db.query(NewsArticle).count()
+    db.close()
+    server.shutdown()
+    feed_pipeline.shutdown()
+
+    expected = args.feeds * min(args.items, 10)  # the parser keeps the latest 10 entries per feed
+    ok = True
+    if saved != 2 * expected or warm_result["saved"] != expected or result["saved"] != expected:
+        ok = False
+        print(f"❌ Saved {warm_result['saved']} + {result['saved']} articles, expected {expected} per round")
+    if concurrent > 2 * estimate + 1:
+        ok = False
+        print(f"❌ Concurrent run took {concurrent:.2f}s, more than 2 x {estimate:.2f}s + 1s")
+
+    if not ok:
+        sys.exit(1)
+    print("✅ All feeds ingested concurrently")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Scheduler Overhead Benchmark for TrollFB
+Per-job cost of running scheduler jobs in worker threads vs on the application's event loop
+
+Each run is one RSS poll tick against a local stand-in feed that always answers
+304 Not Modified, so almost all of the time measured is the job's own overhead:
+  - thread: the old BackgroundScheduler way - a worker thread per run, asyncio.run() and a
+            new HTTP client (connection, pool) per run
+  - loop:   SchedulerService.run_job() on one long-lived loop, as jobs run now - the
+            shared HTTP client and its kept-alive connection are reused
+The first --warmup runs of each mode are not counted. The poll's feed cache and planner
+writes go through the database writer, whose batch wait (DB_WRITER_BATCH_WAIT_MS) both
+modes pay alike; it is set to --writer-wait-ms (default 0) so the job overhead shows.
+
+Usage:
+    python bench_scheduler_overhead.py
+    python bench_scheduler_overhead.py --runs 100
+    python bench_scheduler_overhead.py --writer-wait-ms 20
+
+Exit code 1 when the median per-job time on the loop is not lower than in threads.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def start_server():
+    class FeedHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_threads(sources, runs: int):
+    """Seconds per run: a thread running the poll in its own loop"""
+    from app.core.database import SessionLocal
+    from app.services.news_service import news_aggregator
+
+    def job():
+        db = SessionLocal()
+        try:
+            asyncio.run(news_aggregator.fetch_and_save_rss(db, sources=sources))
+        finally:
+            db.close()
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        thread = threading.Thread(target=job)
+        thread.start()
+        thread.join()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def bench_loop(sources, runs: int):
+    """Seconds per run: SchedulerService.run_job() on this loop"""
+    from app.core.database import SessionLocal
+    from app.core.http_clients import http_clients
+    from app.services.news_service import news_aggregator
+    from app.services.scheduler_service import scheduler_service
+
+    async def poll_bench_feed_job():
+        db = SessionLocal()
+        try:
+            await news_aggregator.fetch_and_save_rss(db, sources=sources)
+        finally:
+            db.close()
+
+    scheduler_service.poll_bench_feed_job = poll_bench_feed_job
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await scheduler_service.run_job("poll_bench_feed_job")
+        timings.append(time.perf_counter() - started)
+
+    await http_clients.aclose()
+    return timings
+
+
+def summary(timings):
+    return f"median {statistics.median(timings) * 1000:6.2f} ms  p90 {sorted(timings)[int(len(timings) * 0.9)] * 1000:6.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-job overhead: worker thread + asyncio.run vs the shared event loop')
+    parser.add_argument('--runs', type=int, default=40, help='Runs per mode (default: 40)')
+    parser.add_argument('--warmup', type=int, default=2, help='Runs per mode not counted (default: 2)')
+    parser.add_argument('--writer-wait-ms', type=int, default=0, help='DB_WRITER_BATCH_WAIT_MS (default: 0)')
+    args = parser.parse_args()
+
+    server = start_server()
+    sources = [f"http://127.0.0.1:{server.server_address[1]}/feed.xml"]
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_scheduler_bench_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["NEWS_DEDUP_INDEX_PATH"] = str(workdir / "dedup_index.pkl")
+    os.environ["NEWS_ENRICH_PROCESSES"] = "0"
+    os.environ["DB_WRITER_BATCH_WAIT_MS"] = str(args.writer_wait_ms)
+    os.chdir(workdir)
+
+    from app.core.database import init_db
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+        threads = bench_threads(sources, args.runs + args.warmup)[args.warmup:]
+        loop = asyncio.run(bench_loop(sources, args.runs + args.warmup))[args.warmup:]
+
+    print(f"🧵 thread + asyncio.run: {summary(threads)}")
+    print(f"🔁 shared event loop:    {summary(loop)}")
+
+    speedup = statistics.median(threads) / statistics.median(loop)
+    if speedup <= 1:
+        print(f"\n❌ Jobs on the event loop are not cheaper ({speedup:.2f}x)")
+        sys.exit(1)
+    print(f"\n✅ Jobs on the event loop are {speedup:.1f}x cheaper per run")
+
+
+if __name__ == "__main__":
+    main()
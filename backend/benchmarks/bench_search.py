@@ -0,0 +1,167 @@
+"""
+Search Benchmark for TrollFB
+Latency of ranked full-text search on a synthetic news corpus
+
+Inserts --rows news articles into a temporary SQLite database with bulk Core inserts (the
+search index is kept in sync by its triggers, as during ingestion). Titles and descriptions
+are drawn from a small Vietnamese/football vocabulary, so each common word matches a large
+share of the table, plus one rare token per title. Each query is then run --runs times
+through search_index.search():
+  - page 1: the median of the runs
+  - page 2: the next_cursor of page 1, which must not repeat page 1 results
+and compared with a LIKE scan, which has to read every row and cannot rank.
+
+Usage:
+    python bench_search.py
+    python bench_search.py --rows 100000 --runs 10
+
+Exit code 1 when a query's median is above --max-ms, page 2 repeats results, or an
+unaccented query does not find what its accented form finds.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+WORDS = (
+    "ronaldo messi haaland mbappe đội tuyển việt nam thắng thua trận đấu bàn thắng chuyển nhượng "
+    "hợp đồng chấn thương huấn luyện viên arsenal chelsea liverpool united city barcelona madrid "
+    "quang hải công phượng"
+).split()
+
+# (label, query) - the rare token is filled in from the corpus
+QUERIES = [
+    ("rare token", "{rare}"),
+    ("two words", "quang hai"),
+    ("accented", "quang hải"),
+    ("three words", "chan thuong messi"),
+    ("five words", "doi tuyen viet nam thang"),
+    ("common word", "arsenal"),
+    ("prefix", "barc"),
+]
+# Every word of the vocabulary is in most rows, so the multi-word queries match nearly the
+# whole table: the worst case for ranking. The limit leaves room for a slower machine.
+MAX_MEDIAN_MS = 2000
+
+
+def seed(rows: int, seed: int) -> str:
+    """Insert the corpus; returns a rare token that is in it"""
+    from sqlalchemy import insert
+    from app.core.database import init_db, engine, NewsArticle
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+
+    rng = random.Random(seed)
+    rare_tokens = max(rows // 5, 1)
+    batch = 10000
+
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(insert(NewsArticle), [
+                dict(
+                    title=" ".join(rng.choices(WORDS, k=8)) + f" w{rng.randrange(rare_tokens)}",
+                    description=" ".join(rng.choices(WORDS, k=25)),
+                    url=f"https://news.bench/{i}",
+                    source="bench"
+                )
+                for i in range(start, min(start + batch, rows))
+            ])
+
+    return f"w{rare_tokens // 2}"
+
+
+def bench_query(db, query: str, runs: int):
+    """(page 1 median seconds, page 2 seconds or None, page 1 ids, page 2 ids)"""
+    from app.services.search_service import search_index
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        first = search_index.search(db, query, limit=20)
+        timings.append(time.perf_counter() - started)
+
+    second_seconds, second = None, {"results": []}
+    if first["next_cursor"]:
+        started = time.perf_counter()
+        second = search_index.search(db, query, limit=20, cursor=first["next_cursor"])
+        second_seconds = time.perf_counter() - started
+
+    ids = lambda page: [(r["type"], r["id"]) for r in page["results"]]
+    return sorted(timings)[len(timings) // 2], second_seconds, ids(first), ids(second)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ranked full-text search latency on a synthetic news corpus')
+    parser.add_argument('--rows', type=int, default=1000000, help='News articles to insert (default: 1000000)')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per query (default: 5)')
+    parser.add_argument('--max-ms', type=float, default=MAX_MEDIAN_MS,
+                        help=f'Fail when a median is above this (default: {MAX_MEDIAN_MS})')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    args = parser.parse_args()
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_search_bench_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["NEWS_DEDUP_INDEX_PATH"] = str(workdir / "dedup_index.pkl")
+    os.chdir(workdir)
+
+    from sqlalchemy import text
+    from app.core.database import SessionLocal
+    from app.services.search_service import search_index
+
+    started = time.perf_counter()
+    rare = seed(args.rows, args.seed)
+    print(f"🌱 Inserted {args.rows} articles in {time.perf_counter() - started:.1f}s")
+
+    if not search_index.available:
+        print("❌ Search index is not available")
+        sys.exit(1)
+
+    db = SessionLocal()
+    ok = True
+    found = {}
+
+    print(f"\n   {'':12} {'query':28} {'page 1':>10} {'page 2':>10}")
+    for label, query in QUERIES:
+        query = query.format(rare=rare)
+        median, second, first_ids, second_ids = bench_query(db, query, args.runs)
+        found[label] = first_ids
+
+        problems = []
+        if median * 1000 > args.max_ms:
+            problems.append(f"median above {args.max_ms:.0f} ms")
+        if set(first_ids) & set(second_ids):
+            problems.append("page 2 repeats page 1")
+        ok = ok and not problems
+
+        page2 = f"{second * 1000:7.1f} ms" if second is not None else "         -"
+        print(f"{'❌' if problems else '✅'} {label:12} {query!r:28} {median * 1000:7.1f} ms {page2}"
+              f"{' - ' + ', '.join(problems) if problems else ''}")
+
+    if found["two words"] != found["accented"]:
+        print("❌ 'quang hai' and 'quang hải' return different results")
+        ok = False
+
+    started = time.perf_counter()
+    db.execute(text("SELECT count(*) FROM news_articles WHERE title LIKE '%quang hải%'")).scalar()
+    print(f"\n🐢 LIKE '%quang hải%' count (no ranking): {(time.perf_counter() - started) * 1000:.1f} ms")
+    db.close()
+
+    if not ok:
+        print("\n❌ Search over its latency limit or returning wrong pages")
+        sys.exit(1)
+    print("\n✅ Search within its latency limit")
+
+
+if __name__ == "__main__":
+    main()
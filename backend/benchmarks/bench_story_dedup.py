@@ -0,0 +1,181 @@
+"""
+Story Dedup Benchmark for TrollFB
+Lookup latency and clustering accuracy of the MinHash/LSH story index on a synthetic corpus
+
+Builds --stories random-word stories (title + description), each republished by 0-3 other
+outlets with a source tag and --edits words replaced, shuffles everything and feeds it to a
+fresh StoryDeduplicator one article at a time, as ingestion does:
+  - lookup: plan() for one article (signature + LSH candidates + similarity)
+  - index:  index() of a new canonical article
+Then it checks what the index is rebuilt from after a restart, with the process in
+Asia/Ho_Chi_Minh time (created_at is naive UTC):
+  - rebuild: every article inside the window must survive prune()
+  - snapshot: a saved index plus the articles added after it must match a full rebuild
+
+Usage:
+    python bench_story_dedup.py
+    python bench_story_dedup.py --stories 10000 --edits 3
+
+Exit code 1 when the lookup p99 is 1 ms or more, or a rebuild drops articles.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+OUTLETS = ["BBC Sport", "Sky Sports", "bongda24h", "thethao247", "r/soccer", "ESPN"]
+
+
+def synthetic_corpus(stories: int, edits: int, seed: int):
+    """[(story id, title, description)] - originals and their republished copies, shuffled"""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    corpus = []
+
+    for story in range(stories):
+        title = rng.sample(vocabulary, 9)
+        description = rng.sample(vocabulary, 30)
+        corpus.append((story, " ".join(title), " ".join(description)))
+
+        for _ in range(rng.randint(0, 3)):
+            copy = list(description)
+            for position in rng.sample(range(len(copy)), edits):
+                copy[position] = rng.choice(vocabulary)
+            corpus.append((story, f"{' '.join(title)} - {rng.choice(OUTLETS)}", " ".join(copy)))
+
+    rng.shuffle(corpus)
+    return corpus
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def bench_lookups(dedup, corpus):
+    """Feed the corpus one article at a time; returns (lookup seconds, index seconds, precision, recall)"""
+    dedup._loaded = True  # nothing to load - start from an empty index
+    story_of = {}
+    lookups, indexing = [], []
+    attached = correct = 0
+    seen_stories = set()
+    copies = 0
+
+    for article_id, (story, title, description) in enumerate(corpus, start=1):
+        row = {"url": f"https://news.bench/{article_id}", "title": title, "description": description}
+
+        started = time.perf_counter()
+        plan = dedup.plan(None, [row])
+        lookups.append(time.perf_counter() - started)
+
+        if story in seen_stories:
+            copies += 1
+        seen_stories.add(story)
+
+        if plan["members"]:
+            _, target, _ = plan["members"][0]
+            attached += 1
+            correct += story_of.get(target) == story
+            continue
+
+        story_of[article_id] = story
+        started = time.perf_counter()
+        dedup.index(plan, {row["url"]: article_id})
+        indexing.append(time.perf_counter() - started)
+
+    precision = correct / attached if attached else 1.0
+    recall = correct / copies if copies else 1.0
+    return lookups, indexing, precision, recall
+
+
+def seed_articles(db, NewsArticle, corpus, window: timedelta, first_id: int = 1):
+    """Store corpus entries as articles spread over the window (the oldest 1h inside it)"""
+    now = datetime.utcnow()
+    span = window - timedelta(hours=1)
+    db.bulk_insert_mappings(NewsArticle, [
+        dict(id=first_id + i, title=title, description=description, url=f"https://news.bench/db/{first_id + i}",
+             source="bench", created_at=now - span * (1 - i / len(corpus)))
+        for i, (_, title, description) in enumerate(corpus)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MinHash/LSH story index on a synthetic corpus')
+    parser.add_argument('--stories', type=int, default=5000, help='Distinct stories (default: 5000)')
+    parser.add_argument('--edits', type=int, default=2, help='Description words replaced per copy (default: 2)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    args = parser.parse_args()
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_dedup_bench_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["NEWS_DEDUP_INDEX_PATH"] = str(workdir / "dedup_index.pkl")
+    os.chdir(workdir)
+
+    from app.core.database import init_db, SessionLocal, NewsArticle
+    from app.services.story_dedup_service import StoryDeduplicator
+
+    corpus = synthetic_corpus(args.stories, args.edits, args.seed)
+    print(f"📰 {len(corpus)} articles from {args.stories} stories, {args.edits} edits per copy")
+
+    dedup = StoryDeduplicator()
+    lookups, indexing, precision, recall = bench_lookups(dedup, corpus)
+    lookup_p99 = percentile(lookups, 0.99) * 1000
+    print(f"🔎 lookup: mean {sum(lookups) / len(lookups) * 1000:.3f} ms, p50 {percentile(lookups, 0.5) * 1000:.3f} ms, "
+          f"p99 {lookup_p99:.3f} ms")
+    print(f"➕ index:  mean {sum(indexing) / len(indexing) * 1000:.3f} ms, p99 {percentile(indexing, 0.99) * 1000:.3f} ms "
+          f"({len(indexing)} stories indexed)")
+    print(f"🎯 clustering: precision {precision:.3f}, recall {recall:.3f}")
+
+    # Restarts, with local time 7 hours ahead of UTC
+    os.environ["TZ"] = "Asia/Ho_Chi_Minh"
+    time.tzset()
+    init_db()
+    db = SessionLocal()
+    half = len(corpus) // 2
+    seed_articles(db, NewsArticle, corpus[:half], dedup.window)
+
+    ok = lookup_p99 < 1.0
+
+    # A separate snapshot file - the lookup run above saved its own
+    restart_index = str(workdir / "restart_index.pkl")
+
+    rebuilt = StoryDeduplicator()
+    rebuilt.index_path = restart_index
+    started = time.perf_counter()
+    rebuilt.ensure_loaded(db)
+    elapsed = time.perf_counter() - started
+    kept = len(rebuilt._signatures)
+    passed = kept == half
+    ok = ok and passed
+    print(f"{'✅' if passed else '❌'} rebuild: {kept}/{half} articles kept after prune ({elapsed:.2f}s)")
+
+    # Snapshot on disk, then more articles arrive before the next restart
+    rebuilt.save()
+    seed_articles(db, NewsArticle, corpus[half:], dedup.window, first_id=half + 1)
+    restarted = StoryDeduplicator()
+    restarted.index_path = restart_index
+    started = time.perf_counter()
+    restarted.ensure_loaded(db)
+    elapsed = time.perf_counter() - started
+    kept = len(restarted._signatures)
+    passed = kept == len(corpus)
+    ok = ok and passed
+    print(f"{'✅' if passed else '❌'} snapshot + newer articles: {kept}/{len(corpus)} indexed ({elapsed:.2f}s)")
+
+    db.close()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
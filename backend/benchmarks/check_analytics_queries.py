@@ -0,0 +1,223 @@
+"""
+Analytics Query Check for TrollFB
+Queries and latency per /api/analytics endpoint against 100k posts
+
+Seeds a temporary SQLite database with --posts posts spread over 30 days (mixed statuses),
+one PostAnalytics row each, 3 days of daily engagement rollups per post and hourly rollups
+for the posts of the last day. Every endpoint is then requested --runs times through the
+ASGI app, counting the SQL statements sent on the read engines (writes of snapshot rows go
+through the database writer and are not counted):
+  - snapshot endpoints (dashboard, overview, content-stats) twice: cold, i.e. rebuilt on
+    every request (snapshot load + builder), and warm, i.e. served from the snapshot
+  - the other endpoints as they are served
+
+Usage:
+    python check_analytics_queries.py
+    python check_analytics_queries.py --posts 20000 --runs 10
+
+Exit code 1 when an endpoint answers with an error, sends more queries than its limit,
+or its median latency is above its limit (see ENDPOINTS).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# (name, path, snapshot kind or None, max queries, max median ms)
+# Query limits are exact counts of the current implementation: one more means a query per row
+# crept back in. Latency limits leave room for a slower machine than the one they were measured on.
+ENDPOINTS = [
+    ("dashboard", "/api/analytics/dashboard?days=7", "analytics.dashboard", 5, 500),
+    ("overview", "/api/analytics/overview?days=30", "analytics.overview", 7, 3000),
+    ("content-stats", "/api/analytics/content-stats", "analytics.content_stats", 2, 300),
+    ("top-performing", "/api/analytics/top-performing?limit=10", None, 1, 100),
+    ("trends", "/api/analytics/trends?days=30", None, 2, 1500),
+    ("series 24h", "/api/analytics/engagement-series?hours=24", None, 1, 500),
+    ("series post", "/api/analytics/engagement-series?hours=72&post_id={post_id}", None, 1, 100),
+    ("post", "/api/analytics/post/{post_id}", None, 1, 100),
+]
+WARM_MAX_QUERIES = 1  # a snapshot row read at most
+WARM_MAX_MS = 50
+
+STATUSES = ("posted", "posted", "draft", "scheduled", "failed")
+
+
+def seed(posts: int):
+    """Posts over the last 30 days with their analytics and engagement rollups"""
+    from sqlalchemy import insert
+    from app.core.database import init_db, SessionLocal, ContentPost, PostAnalytics, EngagementDaily, EngagementHourly
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+    db = SessionLocal()
+    now = datetime.utcnow()
+    tables = {ContentPost: [], PostAnalytics: [], EngagementDaily: [], EngagementHourly: []}
+
+    for i in range(posts):
+        post_id = i + 1
+        posted_time = now - timedelta(seconds=int(30 * 86400 * i / posts) + 60)
+        tables[ContentPost].append(dict(
+            id=post_id, title=f"Post {i}", caption="caption " * 20, fb_post_id=f"1_{i}",
+            status=STATUSES[i % 5] if i % 7 else "posted", posted_time=posted_time
+        ))
+        tables[PostAnalytics].append(dict(
+            post_id=post_id, platform="facebook", fb_post_id=f"1_{i}", impressions=5000, reach=2500 + i % 100,
+            likes=300, comments=30, shares=10, engagement_rate=(i * 7919) % 1000 / 100
+        ))
+
+        day = posted_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        for offset in range(3):
+            if day + timedelta(days=offset) <= now:
+                tables[EngagementDaily].append(dict(
+                    post_id=post_id, platform="facebook", bucket_start=day + timedelta(days=offset),
+                    impressions=1000, reach=500, likes=60, comments=6, shares=2, samples=5
+                ))
+
+        hour = posted_time.replace(minute=0, second=0, microsecond=0)
+        while now - hour < timedelta(hours=24) and hour <= now:
+            tables[EngagementHourly].append(dict(
+                post_id=post_id, platform="facebook", bucket_start=hour,
+                impressions=100, reach=50, likes=6, comments=1, shares=1, samples=1
+            ))
+            hour += timedelta(hours=1)
+
+    for model, rows in tables.items():
+        for start in range(0, len(rows), 20000):
+            db.execute(insert(model), rows[start:start + 20000])
+    db.commit()
+    db.close()
+
+    print("🌱 Seeded " + ", ".join(f"{len(rows)} {model.__tablename__}" for model, rows in tables.items()))
+
+
+def count_queries():
+    """Counter of statements sent on the read engines"""
+    from sqlalchemy import event
+    from app.core.database import read_engine, async_read_engine
+
+    counter = {"queries": 0}
+
+    def on_execute(*args, **kwargs):
+        counter["queries"] += 1
+
+    engines = {read_engine} | ({async_read_engine.sync_engine} if async_read_engine is not None else set())
+    for target in engines:
+        event.listen(target, "before_cursor_execute", on_execute)
+    return counter
+
+
+@contextlib.contextmanager
+def snapshots_rebuilt_every_request():
+    """Make every snapshot stale and unusable, so each request runs the builder"""
+    from app.core.config import settings
+    from app.services.dashboard_snapshots import dashboard_snapshots
+
+    names = ("DASHBOARD_SNAPSHOT_MAX_AGE", "DASHBOARD_SNAPSHOT_MAX_STALENESS", "DASHBOARD_SNAPSHOT_MEMORY_TTL")
+    saved = {name: getattr(settings, name) for name in names}
+    for name in names:
+        setattr(settings, name, 0)
+    dashboard_snapshots._memory.clear()
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+        # Entries built meanwhile are stale under the restored settings: drop them, and let
+        # background refreshes already started finish, so their queries are not counted later
+        dashboard_snapshots._memory.clear()
+        while dashboard_snapshots._refreshing:
+            time.sleep(0.01)
+
+
+async def measure(client, counter, path: str, runs: int):
+    """(median ms, max queries per request, error or None)"""
+    timings, queries = [], []
+
+    for _ in range(runs):
+        counter["queries"] = 0
+        started = time.perf_counter()
+        response = await client.get(path)
+        timings.append(time.perf_counter() - started)
+        queries.append(counter["queries"])
+
+        if response.status_code != 200:
+            return 0, 0, f"HTTP {response.status_code} {response.text[:200]}"
+
+    return sorted(timings)[len(timings) // 2] * 1000, max(queries), None
+
+
+def report(name: str, ms: float, queries: int, error, max_queries: int, max_ms: float) -> bool:
+    problems = [error] if error else []
+    if not error and queries > max_queries:
+        problems.append(f"more than {max_queries} queries")
+    if not error and ms > max_ms:
+        problems.append(f"median above {max_ms} ms")
+
+    print(f"{'❌' if problems else '✅'} {name:20} {ms:8.1f} ms {queries:3} queries"
+          f"{' - ' + ', '.join(problems) if problems else ''}")
+    return not problems
+
+
+async def check(runs: int, post_id: int) -> bool:
+    import httpx
+    from main import app
+
+    counter = count_queries()
+    ok = True
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        # First request opens the pools and compiles the statements
+        for _, path, _, _, _ in ENDPOINTS:
+            await client.get(path.format(post_id=post_id))
+
+        for name, path, kind, max_queries, max_ms in ENDPOINTS:
+            path = path.format(post_id=post_id)
+
+            if kind is None:
+                ok &= report(name, *await measure(client, counter, path, runs), max_queries, max_ms)
+                continue
+
+            with snapshots_rebuilt_every_request():
+                ok &= report(f"{name} (cold)", *await measure(client, counter, path, runs), max_queries, max_ms)
+
+            await client.get(path)  # builds the snapshot again
+            ok &= report(f"{name} (warm)", *await measure(client, counter, path, runs), WARM_MAX_QUERIES, WARM_MAX_MS)
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Queries and latency per analytics endpoint on a seeded database')
+    parser.add_argument('--posts', type=int, default=100000, help='Posts to seed (default: 100000)')
+    parser.add_argument('--runs', type=int, default=5, help='Requests per endpoint (default: 5)')
+    args = parser.parse_args()
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_analytics_check_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'check.db'}"
+    os.environ["NEWS_DEDUP_INDEX_PATH"] = str(workdir / "dedup_index.pkl")
+    os.chdir(workdir)
+
+    started = time.perf_counter()
+    seed(args.posts)
+    print(f"   ({time.perf_counter() - started:.1f}s)")
+
+    if not asyncio.run(check(args.runs, post_id=1)):
+        print("\n❌ Analytics endpoints over their query or latency limits")
+        sys.exit(1)
+    print("\n✅ Analytics endpoints within their query and latency limits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+ComfyUI Variants Check for TrollFB
+Runs ComfyUIService meme generation against the stand-in ComfyUI server (mock_comfyui.py)
+
+Every scenario asks for four styles (claymation, chibi, claymate, doodle_art), each
+rendered in --render-seconds plus the model load penalties of the stand-in:
+  - completion order: another request's claymate render is already in ComfyUI, so the
+                      render queue runs this request's claymate variant first -
+                      iter_meme_images() must yield in the order renders finish, each one
+                      as soon as it is done, not in variant order once all are done
+  - failed variant:   the chibi render ends with execution_error - the other three images
+                      are still returned, in variant order, by generate_meme_images()
+  - rejected variant: ComfyUI refuses the claymate prompt (HTTP 400) - same as above
+
+Usage:
+    python check_comfyui_variants.py
+    python check_comfyui_variants.py --render-seconds 1
+
+Exit code 1 when results arrive out of completion order or only at the end, or a failing
+variant takes the others' results with it.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mock_comfyui import MockComfyUI
+
+STYLES = ["claymation", "chibi", "claymate", "doodle_art"]
+
+
+def style_names(prefixes, keyword: str):
+    """Style names of the renders of one request, from the filename prefixes"""
+    from app.services.comfyui_service import comfyui_service
+
+    names = {style["name"]: style["id"] for style in comfyui_service.STYLE_CONFIGS.values()}
+    marker = f"meme_{keyword}_"
+    return [names[prefix[len(marker):].rsplit("_v", 1)[0]] for prefix in prefixes if prefix.startswith(marker)]
+
+
+def check_completion_order(comfy: MockComfyUI) -> bool:
+    from app.services.comfyui_service import comfyui_service
+
+    comfy.reset()
+
+    # Another request keeps ComfyUI busy on the claymate model
+    busy = threading.Thread(target=lambda: comfyui_service.generate_meme_images(
+        "busy", "busy", "Busy", selected_styles=["claymate"]
+    ))
+    with contextlib.redirect_stdout(io.StringIO()):
+        busy.start()
+        time.sleep(0.2)
+
+        started = time.perf_counter()
+        arrivals = []
+        for result in comfyui_service.iter_meme_images("t", "c", "Ronaldo", selected_styles=STYLES):
+            arrivals.append((result["style_id"], time.perf_counter() - started))
+        busy.join()
+
+    yielded = [style for style, _ in arrivals]
+    finished = style_names(comfy.completed, "Ronaldo")
+    spread = arrivals[-1][1] - arrivals[0][1] if arrivals else 0
+
+    problems = []
+    if yielded != finished:
+        problems.append(f"yielded {yielded}, finished {finished}")
+    if finished == STYLES:
+        problems.append("renders finished in variant order - the scenario proves nothing")
+    if spread < comfy.render_seconds * 2:
+        problems.append(f"all results arrived within {spread:.2f}s")
+
+    print(f"{'❌' if problems else '✅'} {'completion order':18} "
+          + ", ".join(f"{style} +{seconds:.1f}s" for style, seconds in arrivals)
+          + (f" - {'; '.join(problems)}" if problems else ""))
+    return not problems
+
+
+def check_partial(comfy: MockComfyUI, name: str, broken_style: str, fail: bool) -> bool:
+    from app.services.comfyui_service import comfyui_service
+
+    comfy.reset()
+    broken = f"_{comfyui_service.STYLE_CONFIGS[broken_style]['name']}_"
+    comfy.fail_prefixes = [broken] if fail else []
+    comfy.reject_prefixes = [] if fail else [broken]
+
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = comfyui_service.generate_meme_images("t", "c", "Ronaldo", selected_styles=STYLES)
+    finally:
+        comfy.fail_prefixes, comfy.reject_prefixes = [], []
+    seconds = time.perf_counter() - started
+
+    expected = [style for style in STYLES if style != broken_style]
+    got = [result["style_id"] for result in results]
+    variant_ids = [result["variant_id"] for result in results]
+    missing_files = [result["filename"] for result in results if not result["filename"].startswith("meme_Ronaldo_")]
+
+    problems = []
+    if got != expected:
+        problems.append(f"got {got}, expected {expected}")
+    if variant_ids != sorted(variant_ids):
+        problems.append(f"variant ids {variant_ids} not in order")
+    if missing_files:
+        problems.append(f"unexpected files {missing_files}")
+
+    print(f"{'❌' if problems else '✅'} {name:18} {len(results)}/{len(STYLES)} images ({', '.join(got)}) in {seconds:.1f}s"
+          + (f" - {'; '.join(problems)}" if problems else ""))
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ComfyUIService variants against a stand-in ComfyUI')
+    parser.add_argument('--render-seconds', type=float, default=0.5, help='Seconds per render (default: 0.5)')
+    args = parser.parse_args()
+
+    comfy = MockComfyUI(render_seconds=args.render_seconds, checkpoint_penalty=args.render_seconds,
+                        lora_penalty=args.render_seconds / 2)
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_comfyui_check_"))
+    os.environ["COMFYUI_URL"] = comfy.start()
+    os.environ["COMFYUI_PATH"] = str(workdir)
+    os.chdir(workdir)
+
+    ok = check_completion_order(comfy)
+    ok &= check_partial(comfy, "failed variant", "chibi", fail=True)
+    ok &= check_partial(comfy, "rejected variant", "claymate", fail=False)
+
+    if not ok:
+        print("\n❌ ComfyUI variant checks failed")
+        sys.exit(1)
+    print("\n✅ ComfyUI variant checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Insights Batching Check for TrollFB
+Runs InsightsCollector against a local stand-in for the Graph API batch endpoint
+
+The stand-in answers POST / batches of post insights requests, each response after
+--latency seconds, and counts every call and the posts in it. Scenarios, in order:
+  - clean:        120 posts - 3 calls of at most FB_BATCH_SIZE, nothing retried
+  - throttled:    the first call fails with error code 4 - the batch waits and is sent again
+  - 429:          the first call is HTTP 429 - same as above
+  - null:         one sub-response is null - only that post is sent again
+  - sub-throttle: one sub-response is error 613 - only that post is sent again, after a pause
+  - permanent:    one sub-response is error 100 - reported as failed, never retried
+  - usage:        X-App-Usage at 95% - the batches after it wait for the pause
+  - bad token:    the call is rejected with error 190 - not retried, nothing fetched
+  - job:          fetch_analytics_job end to end: PostAnalytics rows and refresh plans
+
+Usage:
+    python check_insights_batching.py
+    python check_insights_batching.py --latency 0.2
+
+Exit code 1 when a scenario fetches or fails the wrong posts, retries a permanent error,
+or sends more calls than it should.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+PAGE_ID = "123"
+BATCH_SIZE = 50
+RATE_LIMIT_PAUSE = 1.5  # instead of 60s - above the 1s retry backoff, so the pause shows in the timings
+
+
+class StandInGraph:
+    """Faults to inject and the calls received, shared with the request handler"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = []  # post ids per batch call
+        self.reject_next = None  # (HTTP status, error code) for the next call
+        self.null_once = set()
+        self.throttle_once = set()
+        self.permanent = set()
+        self.usage_percent = 10
+        self.lock = threading.Lock()
+
+    def reset(self):
+        self.calls.clear()
+        self.reject_next = None
+        self.null_once.clear()
+        self.throttle_once.clear()
+        self.permanent.clear()
+        self.usage_percent = 10
+
+    def insights(self, post_id: str):
+        n = int(post_id.split("_")[1])
+        return {
+            "id": post_id,
+            "insights": {"data": [
+                {"name": "post_impressions", "values": [{"value": 1000 + n}]},
+                {"name": "post_reactions_by_type_total", "values": [{"value": {"like": n, "love": 1}}]}
+            ]},
+            "comments": {"summary": {"total_count": 3}},
+            "shares": {"count": 2}
+        }
+
+    def sub_response(self, post_id: str):
+        if post_id in self.null_once:
+            self.null_once.discard(post_id)
+            return None
+        if post_id in self.throttle_once:
+            self.throttle_once.discard(post_id)
+            return {"code": 403, "body": json.dumps({"error": {"code": 613, "message": "Calls to this api have exceeded the rate limit"}})}
+        if post_id in self.permanent:
+            return {"code": 400, "body": json.dumps({"error": {"code": 100, "message": "Unsupported get request"}})}
+        return {"code": 200, "body": json.dumps(self.insights(post_id))}
+
+
+def start_server(graph: StandInGraph):
+    class GraphHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+            batch = json.loads(form["batch"][0])
+            post_ids = [request["relative_url"].split("?")[0] for request in batch]
+            time.sleep(graph.latency)
+
+            with graph.lock:
+                graph.calls.append(post_ids)
+
+                if graph.reject_next:
+                    status, code = graph.reject_next
+                    graph.reject_next = None
+                    self.reply(status, {"error": {"code": code, "message": "Rejected by the stand-in"}}, {})
+                    return
+
+                body = [graph.sub_response(post_id) for post_id in post_ids]
+                usage = {"call_count": graph.usage_percent, "total_cputime": 5, "total_time": 5}
+
+            self.reply(200, body, {"X-App-Usage": json.dumps(usage)})
+
+        def reply(self, status, body, headers):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GraphHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def post_ids(count: int):
+    return [f"{PAGE_ID}_{n}" for n in range(count)]
+
+
+async def check_collector(graph: StandInGraph) -> int:
+    """Fault scenarios against InsightsCollector.collect(); returns the number failed"""
+    from app.services.insights_collector import insights_collector
+
+    failed = 0
+
+    async def scenario(name, count, expect, **faults):
+        nonlocal failed
+        graph.reset()
+        for key, value in faults.items():
+            setattr(graph, key, value)
+        insights_collector._resume_at = 0.0
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results, errors = await insights_collector.collect(post_ids(count))
+        seconds = time.perf_counter() - started
+
+        problem = expect(results, errors, seconds)
+        if not problem:
+            wrong = [post_id for post_id, analytics in results.items()
+                     if analytics["impressions"] != 1000 + int(post_id.split("_")[1])]
+            problem = f"wrong insights for {wrong[:3]}" if wrong else None
+        failed += bool(problem)
+
+        stats = insights_collector.last_run
+        print(f"{'❌' if problem else '✅'} {name:12} {len(results):3} fetched, {len(errors)} failed, "
+              f"{len(graph.calls)} calls, {stats['retries']} retries, {seconds:.2f}s{' - ' + problem if problem else ''}")
+
+    def sizes():
+        return sorted(len(call) for call in graph.calls)
+
+    await scenario("clean", 120, lambda results, errors, s: (
+        None if len(results) == 120 and not errors and sizes() == [20, 50, 50]
+        else f"batch sizes {sizes()}"
+    ))
+    await scenario("throttled", 50, lambda results, errors, s: (
+        None if len(results) == 50 and sizes() == [50, 50] and s >= RATE_LIMIT_PAUSE
+        else f"batch sizes {sizes()} in {s:.2f}s"
+    ), reject_next=(400, 4))
+    await scenario("429", 50, lambda results, errors, s: (
+        None if len(results) == 50 and sizes() == [50, 50] and s >= RATE_LIMIT_PAUSE
+        else f"batch sizes {sizes()} in {s:.2f}s"
+    ), reject_next=(429, None))
+    await scenario("null", 50, lambda results, errors, s: (
+        None if len(results) == 50 and graph.calls[1:] == [[f"{PAGE_ID}_7"]]
+        else f"calls after the first: {graph.calls[1:]}"
+    ), null_once={f"{PAGE_ID}_7"})
+    await scenario("sub-throttle", 50, lambda results, errors, s: (
+        None if len(results) == 50 and graph.calls[1:] == [[f"{PAGE_ID}_8"]] and s >= RATE_LIMIT_PAUSE
+        else f"calls after the first: {graph.calls[1:]} in {s:.2f}s"
+    ), throttle_once={f"{PAGE_ID}_8"})
+    await scenario("permanent", 50, lambda results, errors, s: (
+        None if len(results) == 49 and list(errors) == [f"{PAGE_ID}_9"] and len(graph.calls) == 1
+        else f"errors {list(errors)}, {len(graph.calls)} calls"
+    ), permanent={f"{PAGE_ID}_9"})
+    await scenario("usage", 250, lambda results, errors, s: (
+        None if len(results) == 250 and len(graph.calls) == 5 and s >= RATE_LIMIT_PAUSE
+        else f"{len(graph.calls)} calls in {s:.2f}s"
+    ), usage_percent=95)
+    await scenario("bad token", 50, lambda results, errors, s: (
+        None if not results and not errors and len(graph.calls) == 1
+        else f"{len(results)} fetched, {len(graph.calls)} calls"
+    ), reject_next=(400, 190))
+
+    return failed
+
+
+async def check_job(graph: StandInGraph) -> int:
+    """fetch_analytics_job on seeded posts; returns the number of checks failed"""
+    from app.core.database import init_db, SessionLocal, ContentPost, PostAnalytics, PostRefreshPlan
+    from app.services.insights_collector import insights_collector
+    from app.services.scheduler_service import scheduler_service
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+
+    db = SessionLocal()
+    posted_time = datetime.utcnow() - timedelta(hours=2)
+    for n in range(120):
+        db.add(ContentPost(title=f"Post {n}", caption="caption", status="posted",
+                           posted_time=posted_time, fb_post_id=f"{PAGE_ID}_{n}"))
+    db.commit()
+
+    graph.reset()
+    graph.null_once = {f"{PAGE_ID}_7"}
+    graph.permanent = {f"{PAGE_ID}_9"}
+    insights_collector._resume_at = 0.0
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await scheduler_service.run_job("fetch_analytics_job")
+    seconds = time.perf_counter() - started
+
+    rows = {row.fb_post_id: row for row in db.query(PostAnalytics).all()}
+    plans = {plan.post_id: plan for plan in db.query(PostRefreshPlan).all()}
+    failed_post = db.query(ContentPost.id).filter(ContentPost.fb_post_id == f"{PAGE_ID}_9").scalar()
+    db.close()
+
+    problems = []
+    if len(rows) != 119 or f"{PAGE_ID}_9" in rows:
+        problems.append(f"{len(rows)} PostAnalytics rows")
+    if rows.get(f"{PAGE_ID}_7") is None or rows[f"{PAGE_ID}_7"].impressions != 1007:
+        problems.append("post 7 (null once) not stored")
+    if len(plans) != 120 or plans[failed_post].consecutive_failures != 1:
+        problems.append("refresh plans not recorded")
+
+    print(f"{'❌' if problems else '✅'} {'job':12} {len(rows):3} rows, {len(plans)} plans, "
+          f"{len(graph.calls)} calls, {seconds:.2f}s{' - ' + ', '.join(problems) if problems else ''}")
+    return len(problems)
+
+
+async def check(graph: StandInGraph) -> bool:
+    """Every scenario on one event loop, as the scheduler runs them"""
+    from app.core.http_clients import http_clients
+
+    failed = await check_collector(graph)
+    failed += await check_job(graph)
+    await http_clients.aclose()
+
+    if failed:
+        print(f"\n❌ {failed} insights batching checks failed")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='InsightsCollector against a local Graph API stand-in')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per stand-in response (default: 0.05)')
+    args = parser.parse_args()
+
+    graph = StandInGraph(args.latency)
+    server = start_server(graph)
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_insights_check_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'check.db'}"
+    os.environ["NEWS_DEDUP_INDEX_PATH"] = str(workdir / "dedup_index.pkl")
+    os.environ["FB_GRAPH_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v18.0"
+    os.environ["FB_PAGE_ACCESS_TOKEN"] = "stand-in-token"
+    os.environ["FB_PAGE_ID"] = PAGE_ID
+    os.environ["FB_BATCH_SIZE"] = str(BATCH_SIZE)
+    os.chdir(workdir)
+
+    from app.services import insights_collector
+    insights_collector.RATE_LIMIT_PAUSE = RATE_LIMIT_PAUSE
+
+    if not asyncio.run(check(graph)):
+        sys.exit(1)
+    server.shutdown()
+    print("\n✅ Insights batching checks passed")
+
+
+if __name__ == "__main__":
+    main()
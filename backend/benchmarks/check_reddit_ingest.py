@@ -0,0 +1,216 @@
+"""
+Reddit Ingest Check for TrollFB
+Runs RedditIngestor against a local stand-in for Reddit's listing API
+
+The stand-in serves r/soccer new/hot/top listings with after-token paging,
+X-Ratelimit-* headers and an optional 429, each response after --latency seconds.
+Scenarios, in order:
+  - first run:  takes the newest pages of every listing
+  - idle:       nothing new - one request per listing, nothing saved
+  - burst:      more new posts than REDDIT_MAX_PAGES pages - the rest is picked up next run
+  - 429:        one throttled response with Retry-After - waited out, nothing lost
+  - budget:     X-Ratelimit-Remaining 0 - waits for the reset before the next request
+
+Usage:
+    python check_reddit_ingest.py
+    python check_reddit_ingest.py --latency 0.2
+
+Exit code 1 when a scenario saves the wrong posts, a post is never stored, or the runs
+together open more connections than the ingestor's pool allows (the pool is kept across runs).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+PAGE_SIZE = 10
+MAX_PAGES = 3
+MAX_CONNECTIONS = 4  # RedditIngestor._http_client pool size
+
+
+class StandInReddit:
+    """Listing state shared with the request handler"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.posts = 0  # post ids 0 .. posts-1, higher is newer
+        self.requests = []  # (listing, after, client port)
+        self.ports = set()  # client ports over every run
+        self.throttle_next = False
+        self.remaining = 1000
+        self.lock = threading.Lock()
+
+    def post(self, post_id: int):
+        return {"data": {
+            "title": f"Post {post_id}: transfer talk topic{post_id} word{post_id * 7919 % 5000}",
+            "permalink": f"/r/soccer/comments/{post_id}/",
+            "created_utc": 1700000000 + post_id * 60,
+            "selftext": "",
+            "subreddit": "soccer"
+        }}
+
+    def listing(self, name: str):
+        ids = list(range(self.posts - 1, -1, -1))  # newest first
+        if name == "hot":
+            ids.sort(key=lambda post_id: (post_id % 7, -post_id))
+        return ids
+
+
+def start_server(reddit: StandInReddit):
+    class RedditHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            name = url.path.rsplit("/", 1)[-1].split(".")[0]
+            after = query.get("after", [None])[0]
+            time.sleep(reddit.latency)
+
+            with reddit.lock:
+                reddit.requests.append((name, after, self.client_address[1]))
+                reddit.ports.add(self.client_address[1])
+
+                if reddit.throttle_next:
+                    reddit.throttle_next = False
+                    self.reply(429, {}, {"Retry-After": "1"})
+                    return
+
+                ids = reddit.listing(name)
+                start = ids.index(int(after.split("_")[1])) + 1 if after else 0
+                page = ids[start:start + int(query["limit"][0])]
+                next_after = f"t3_{page[-1]}" if page and start + len(page) < len(ids) else None
+                reddit.remaining -= 1
+                body = {"data": {"children": [reddit.post(post_id) for post_id in page], "after": next_after}}
+                headers = {"X-Ratelimit-Remaining": str(reddit.remaining), "X-Ratelimit-Reset": "1"}
+
+            self.reply(200, body, headers)
+
+        def reply(self, status, body, headers):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RedditHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def check(reddit: StandInReddit) -> bool:
+    """Every scenario on one event loop, as the scheduler runs them"""
+    from app.core.database import init_db, SessionLocal, NewsArticle
+    from app.core.http_clients import http_clients
+    from app.services.reddit_ingestor import reddit_ingestor
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+    db = SessionLocal()
+    listings = len(reddit_ingestor.listings)
+    failed = 0
+
+    def stored():
+        db.expire_all()
+        return {int(article.url.rstrip("/").rsplit("/", 1)[-1]) for article in db.query(NewsArticle.url)}
+
+    async def scenario(name, posts, expect, throttle=False, remaining=None):
+        nonlocal failed
+        reddit.posts = posts
+        reddit.throttle_next = throttle
+        if remaining is not None:
+            reddit.remaining = remaining
+        reddit.requests.clear()
+        before = stored()
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = await reddit_ingestor.run()
+        seconds = time.perf_counter() - started
+
+        saved = stored() - before
+        problem = expect(saved, seconds)
+        failed += bool(problem)
+        print(f"{'❌' if problem else '✅'} {name:10} {result['saved']:3} saved, {len(reddit.requests):2} requests, "
+              f"{seconds:.2f}s{' - ' + problem if problem else ''}")
+
+    budget = listings * MAX_PAGES
+
+    await scenario("first run", 25, lambda saved, s: None if saved == set(range(25)) else f"saved {len(saved)} of 25")
+    await scenario("idle", 25, lambda saved, s: (
+        f"{len(reddit.requests)} requests" if len(reddit.requests) != listings
+        else f"saved {len(saved)}" if saved else None
+    ))
+    await scenario("burst", 80, lambda saved, s: (
+        None if saved and len(saved) < 55 and len(reddit.requests) <= budget
+        else f"{len(saved)} saved in {len(reddit.requests)} requests"
+    ))
+    await scenario("catch-up", 80, lambda saved, s: None if stored() == set(range(80)) else f"{80 - len(stored())} posts missing")
+    await scenario("429", 82, lambda saved, s: (
+        None if {80, 81} <= saved and s >= 1 else f"saved {sorted(saved)} in {s:.2f}s"
+    ), throttle=True)
+    await scenario("budget", 83, lambda saved, s: (
+        None if saved == {82} and s >= 1 else f"saved {sorted(saved)} in {s:.2f}s"
+    ), remaining=1)
+
+    ports = len(reddit.ports)
+    missing = set(range(83)) - stored()
+    db.close()
+    await http_clients.aclose()
+
+    if missing:
+        failed += 1
+        print(f"❌ {len(missing)} posts never stored")
+    print(f"{'✅' if ports <= MAX_CONNECTIONS else '❌'} {ports} connection(s) over all runs")
+    failed += ports > MAX_CONNECTIONS
+
+    if failed:
+        print(f"\n❌ {failed} Reddit ingest checks failed")
+    return not failed
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RedditIngestor against a local stand-in server')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per stand-in response (default: 0.05)')
+    args = parser.parse_args()
+
+    reddit = StandInReddit(args.latency)
+    server = start_server(reddit)
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_reddit_check_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'check.db'}"
+    os.environ["NEWS_DEDUP_INDEX_PATH"] = str(workdir / "dedup_index.pkl")
+    os.environ["REDDIT_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["REDDIT_PAGE_SIZE"] = str(PAGE_SIZE)
+    os.environ["REDDIT_MAX_PAGES"] = str(MAX_PAGES)
+    os.chdir(workdir)
+
+    if not asyncio.run(check(reddit)):
+        sys.exit(1)
+    server.shutdown()
+    print("\n✅ Reddit ingestion checks passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Ingestion vs Reads Load Test for TrollFB
+Read endpoint latency and lock errors while news ingestion writes to the same SQLite file
+
+Seeds a temporary SQLite database with --seed-news articles, then saves --jobs batches of
+--items-per-job new articles with save_to_database() (dedup, story clustering and trending
+terms included) while --readers clients request the read endpoints back to back through the
+ASGI app. Writes go either:
+  - writer: through the database writer queue, as the feed pipeline and Reddit ingestor do
+  - direct: each batch in its own SessionLocal from --writer-threads threads, as background
+    jobs used to commit
+
+Run it with --writes direct --no-performance-mode for the old setup (rollback journal,
+every writer on its own connection) and with the defaults for WAL + the single writer.
+
+Usage:
+    python load_test_ingest_reads.py
+    python load_test_ingest_reads.py --writes direct --no-performance-mode
+    python load_test_ingest_reads.py --jobs 200 --readers 16
+
+Exit code 1 when a read or a write fails (e.g. "database is locked"), an article is missing,
+or a read endpoint's p99 exceeds --max-p99-ms.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to Python path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+READ_PATHS = [
+    "/api/news/latest?limit=20",
+    "/api/news/category/transfer?limit=20",
+    "/api/news/trending",
+    "/api/search?q=arsenal"
+]
+
+
+def news_item(rng, vocabulary, url: str, published_at: datetime):
+    return {
+        "title": " ".join(rng.sample(vocabulary, 8)),
+        "description": " ".join(rng.sample(vocabulary, 30)),
+        "url": url,
+        "source": "bench",
+        "published_at": published_at,
+        "category": "transfer",
+        "content_category": "general",
+        "vn_angle": "",
+        "hashtags": "[]"
+    }
+
+
+def seed(count: int, vocabulary):
+    from app.core.database import init_db, SessionLocal, NewsArticle
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+    rng = random.Random(0)
+    now = datetime.utcnow()
+
+    db = SessionLocal()
+    db.bulk_insert_mappings(NewsArticle, [
+        dict(news_item(rng, vocabulary, f"https://news.bench/seed/{i}", now - timedelta(minutes=i)), is_used=False)
+        for i in range(count)
+    ])
+    db.commit()
+    db.close()
+
+
+def ingest(args, vocabulary, errors):
+    """Save every batch; returns seconds"""
+    from app.core.database import SessionLocal
+    from app.core.db_writer import db_writer
+    from app.services.news_service import news_aggregator
+
+    rng = random.Random(1)
+    batches = [
+        [news_item(rng, vocabulary, f"https://news.bench/new/{job}/{i}", datetime.utcnow()) for i in range(args.items_per_job)]
+        for job in range(args.jobs)
+    ]
+
+    started = time.perf_counter()
+
+    if args.writes == "writer":
+        futures = [
+            db_writer.submit(lambda write_db, items=items: news_aggregator.save_to_database(write_db, items))
+            for items in batches
+        ]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(f"write: {str(e)[:80]}")
+    else:
+        def worker(own_batches):
+            for items in own_batches:
+                db = SessionLocal()
+                try:
+                    news_aggregator.save_to_database(db, items)
+                except Exception as e:
+                    errors.append(f"write: {str(e)[:80]}")
+                finally:
+                    db.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(batches[i::args.writer_threads],))
+            for i in range(args.writer_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def run(args, vocabulary) -> bool:
+    import httpx
+    from main import app
+    from app.core.database import SessionLocal, NewsArticle
+
+    errors = []
+    latencies = {path: [] for path in READ_PATHS}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+        # Warm up (pools, statement caches, the story index)
+        for path in READ_PATHS:
+            await client.get(path)
+
+        done = asyncio.Event()
+
+        async def reader(offset: int):
+            i = offset
+            while not done.is_set():
+                path = READ_PATHS[i % len(READ_PATHS)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors.append(f"read {path}: HTTP {response.status_code} {response.text[:80]}")
+                except Exception as e:
+                    errors.append(f"read {path}: {str(e)[:80]}")
+                latencies[path].append(time.perf_counter() - started)
+
+        readers = [asyncio.create_task(reader(i)) for i in range(args.readers)]
+        # One redirect for the whole run: swapping sys.stdout per thread is not thread-safe
+        with contextlib.redirect_stdout(io.StringIO()):
+            write_seconds = await asyncio.to_thread(ingest, args, vocabulary, errors)
+        done.set()
+        await asyncio.gather(*readers)
+
+    db = SessionLocal()
+    stored = db.query(NewsArticle).filter(NewsArticle.url.like("https://news.bench/new/%")).count()
+    db.close()
+
+    expected = args.jobs * args.items_per_job
+    reads = sum(len(values) for values in latencies.values())
+    print(f"\n✍️  {args.writes} writes: {stored}/{expected} articles in {write_seconds:.2f}s "
+          f"({expected / write_seconds:.0f} rows/s), {reads} reads meanwhile ({reads / write_seconds:.0f}/s)")
+
+    ok = stored == expected and not errors
+    for path, values in latencies.items():
+        if not values:
+            continue
+        p99 = percentile(values, 0.99) * 1000
+        passed = p99 <= args.max_p99_ms
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} {path}: n={len(values)} "
+              f"p50={percentile(values, 0.5) * 1000:.1f} ms p99={p99:.1f} ms max={max(values) * 1000:.0f} ms")
+
+    if stored != expected:
+        print(f"❌ {expected - stored} articles missing")
+    if errors:
+        print(f"❌ {len(errors)} failed reads/writes, e.g.: " + "; ".join(sorted(set(errors))[:3]))
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Read endpoint latency while news ingestion writes')
+    parser.add_argument('--writes', choices=['writer', 'direct'], default='writer',
+                        help='writer: database writer queue, direct: one session per batch (default: writer)')
+    parser.add_argument('--no-performance-mode', action='store_true', help='SQLITE_PERFORMANCE_MODE=false (no WAL)')
+    parser.add_argument('--seed-news', type=int, default=20000, help='Articles stored before the run (default: 20000)')
+    parser.add_argument('--jobs', type=int, default=100, help='Ingestion batches (default: 100)')
+    parser.add_argument('--items-per-job', type=int, default=50, help='Articles per batch (default: 50)')
+    parser.add_argument('--writer-threads', type=int, default=4, help='Threads for --writes direct (default: 4)')
+    parser.add_argument('--readers', type=int, default=8, help='Concurrent read clients (default: 8)')
+    parser.add_argument('--max-p99-ms', type=float, default=1000, help='Fail above this p99 (default: 1000)')
+    args = parser.parse_args()
+
+    # The app reads its settings when it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="trollfb_ingest_reads_"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'loadtest.db'}"
+    os.environ["NEWS_DEDUP_INDEX_PATH"] = str(workdir / "dedup_index.pkl")
+    if args.no_performance_mode:
+        os.environ["SQLITE_PERFORMANCE_MODE"] = "false"
+    os.chdir(workdir)
+
+    vocabulary = [f"word{i}" for i in range(5000)] + ["arsenal"] * 50
+    seed(args.seed_news, vocabulary)
+    print(f"🌱 Seeded {args.seed_news} articles; {args.jobs} x {args.items_per_job} to ingest, {args.readers} readers"
+          f"{', no WAL' if args.no_performance_mode else ''}")
+
+    if not asyncio.run(run(args, vocabulary)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Stand-in ComfyUI Server for TrollFB
+Renders queued prompts one at a time, with a penalty whenever the checkpoint or LoRA changes
+
+Serves what ComfyUIService, the render queue and the prompt tracker use:
+  - GET  /system_stats
+  - POST /prompt        queues a workflow (400 for prompts matching reject_prefixes)
+  - GET  /history/{id}  the entry of a finished prompt
+  - WS   /ws            execution_start / executing / progress / executed / execution_error
+                        events, sent to the socket of the client_id that queued the prompt
+Nothing is drawn: a render sleeps render_seconds, plus checkpoint_penalty when its
+checkpoint is not the loaded one and lora_penalty when its LoRA is not. Prompts whose
+filename prefix contains one of fail_prefixes end with execution_error.
+
+Used by check_comfyui_variants.py and bench_render_queue.py (started in a thread of
+their process), or on its own for manual testing:
+
+Usage:
+    python mock_comfyui.py --port 8188
+    python mock_comfyui.py --port 8188 --render-seconds 5 --fail chibi
+"""
+
+import argparse
+import asyncio
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+STEPS = 5  # progress events per render
+
+
+class MockComfyUI:
+    """Server state: prompts, history, loaded model and counters"""
+
+    def __init__(self, render_seconds: float = 0.5, checkpoint_penalty: float = 2.0, lora_penalty: float = 0.75):
+        self.render_seconds = render_seconds
+        self.checkpoint_penalty = checkpoint_penalty
+        self.lora_penalty = lora_penalty
+        self.fail_prefixes: List[str] = []
+        self.reject_prefixes: List[str] = []
+        self.url: Optional[str] = None
+        self.reset()
+
+    def reset(self):
+        """Forget prompts, unload the model and zero the counters (the server keeps running)"""
+        self.history: Dict[str, Dict] = {}
+        self.completed: List[str] = []  # filename prefixes, in completion order
+        self.loaded = {"checkpoint": None, "lora": None}
+        self.stats = {"prompts": 0, "rejected": 0, "rendered": 0, "failed": 0, "checkpoint_loads": 0, "lora_loads": 0}
+
+    def app(self):
+        from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+        from fastapi.responses import JSONResponse
+
+        app = FastAPI()
+        sockets = {}
+        queue = asyncio.Queue()
+
+        async def send(client_id, message):
+            ws = sockets.get(client_id)
+            if ws is None:
+                return
+            try:
+                await ws.send_json(message)
+            except Exception:
+                sockets.pop(client_id, None)
+
+        async def render(prompt_id, workflow, client_id):
+            nodes = {node["class_type"]: node["inputs"] for node in workflow.values()}
+            checkpoint = nodes["CheckpointLoaderSimple"]["ckpt_name"]
+            lora = nodes.get("LoraLoader", {}).get("lora_name")
+            prefix = nodes["SaveImage"]["filename_prefix"]
+
+            await send(client_id, {"type": "execution_start", "data": {"prompt_id": prompt_id}})
+
+            if checkpoint != self.loaded["checkpoint"]:
+                self.stats["checkpoint_loads"] += 1
+                await asyncio.sleep(self.checkpoint_penalty)
+                self.loaded = {"checkpoint": checkpoint, "lora": None}
+            if lora != self.loaded["lora"]:
+                self.stats["lora_loads"] += 1
+                await asyncio.sleep(self.lora_penalty)
+                self.loaded["lora"] = lora
+
+            for node in ("4", "10", "5", "6", "7", "3"):
+                await send(client_id, {"type": "executing", "data": {"node": node, "prompt_id": prompt_id}})
+            for step in range(1, STEPS + 1):
+                await asyncio.sleep(self.render_seconds / STEPS)
+                await send(client_id, {"type": "progress", "data": {"value": step, "max": STEPS, "node": "3", "prompt_id": prompt_id}})
+
+            self.completed.append(prefix)
+
+            if any(fail in prefix for fail in self.fail_prefixes):
+                self.stats["failed"] += 1
+                self.history[prompt_id] = {"outputs": {}, "status": {"status_str": "error", "completed": False}}
+                await send(client_id, {"type": "execution_error", "data": {"prompt_id": prompt_id, "exception_message": "CUDA out of memory"}})
+                return
+
+            self.stats["rendered"] += 1
+            images = {"images": [
+                {"filename": f"{prefix}_{i + 1:05d}_.png", "subfolder": "", "type": "output"}
+                for i in range(nodes["EmptyLatentImage"].get("batch_size", 1))
+            ]}
+            self.history[prompt_id] = {"outputs": {"9": images}, "status": {"status_str": "success", "completed": True}}
+            for node in ("8", "9"):
+                await send(client_id, {"type": "executing", "data": {"node": node, "prompt_id": prompt_id}})
+            await send(client_id, {"type": "executed", "data": {"node": "9", "output": images, "prompt_id": prompt_id}})
+            await send(client_id, {"type": "executing", "data": {"node": None, "prompt_id": prompt_id}})
+
+        async def worker():
+            while True:
+                await render(*await queue.get())
+
+        @app.on_event("startup")
+        async def startup():
+            asyncio.create_task(worker())
+
+        @app.get("/system_stats")
+        async def system_stats():
+            return {"system": {"os": "mock"}, "devices": []}
+
+        @app.post("/prompt")
+        async def prompt(request: Request):
+            body = await request.json()
+            workflow = body["prompt"]
+            prefix = next(node["inputs"]["filename_prefix"] for node in workflow.values() if node["class_type"] == "SaveImage")
+
+            if any(reject in prefix for reject in self.reject_prefixes):
+                self.stats["rejected"] += 1
+                return JSONResponse({"error": {"type": "prompt_outputs_failed_validation"}}, status_code=400)
+
+            prompt_id = str(uuid.uuid4())
+            self.stats["prompts"] += 1
+            await queue.put((prompt_id, workflow, body.get("client_id")))
+            return {"prompt_id": prompt_id, "number": self.stats["prompts"]}
+
+        @app.get("/history/{prompt_id}")
+        async def history(prompt_id: str):
+            return {prompt_id: self.history[prompt_id]} if prompt_id in self.history else {}
+
+        @app.websocket("/ws")
+        async def events(ws: WebSocket):
+            await ws.accept()
+            client_id = ws.query_params.get("clientId")
+            sockets[client_id] = ws
+            await ws.send_json({"type": "status", "data": {"status": {"exec_info": {"queue_remaining": queue.qsize()}}}})
+            try:
+                while True:
+                    await ws.receive_text()
+            except WebSocketDisconnect:
+                pass
+            finally:
+                if sockets.get(client_id) is ws:
+                    sockets.pop(client_id, None)
+
+        return app
+
+    def start(self) -> str:
+        """Serve on a free local port from a daemon thread; returns the base URL"""
+        import uvicorn
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", 0))
+
+        server = uvicorn.Server(uvicorn.Config(self.app(), log_level="warning"))
+        threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True).start()
+        while not server.started:
+            time.sleep(0.01)
+
+        self.url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        return self.url
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='Stand-in ComfyUI server')
+    parser.add_argument('--port', type=int, default=8188, help='Port (default: 8188)')
+    parser.add_argument('--render-seconds', type=float, default=0.5, help='Seconds per render (default: 0.5)')
+    parser.add_argument('--checkpoint-penalty', type=float, default=2.0, help='Seconds to load a checkpoint (default: 2.0)')
+    parser.add_argument('--lora-penalty', type=float, default=0.75, help='Seconds to apply another LoRA (default: 0.75)')
+    parser.add_argument('--fail', action='append', default=[], help='Fail prompts whose filename prefix contains this')
+    args = parser.parse_args()
+
+    comfy = MockComfyUI(args.render_seconds, args.checkpoint_penalty, args.lora_penalty)
+    comfy.fail_prefixes = args.fail
+    uvicorn.run(comfy.app(), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
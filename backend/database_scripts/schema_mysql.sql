@@ -47,8 +47,10 @@ CREATE TABLE news_articles (
     hashtags JSON,  -- Array of hashtags
 
     INDEX idx_news_category (category),
-    INDEX idx_news_published (published_at DESC),
-    INDEX idx_news_is_used (is_used)
+    INDEX idx_news_is_used (is_used),
+    INDEX ix_news_articles_published_at (published_at),
+    INDEX ix_news_articles_is_used_published (is_used, published_at),
+    INDEX ix_news_articles_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- =============================================================================
@@ -80,6 +82,8 @@ CREATE TABLE content_posts (
     INDEX idx_posts_status (status),
     INDEX idx_posts_scheduled (scheduled_time),
     INDEX idx_posts_content_type (content_type),
+    INDEX ix_content_posts_status_scheduled (status, scheduled_time),
+    INDEX ix_content_posts_status_posted (status, posted_time),
     FOREIGN KEY (news_id) REFERENCES news_articles(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -111,8 +115,9 @@ CREATE TABLE post_analytics (
     engagement_rate DECIMAL(5,2) DEFAULT 0.0,
     fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
-    INDEX idx_analytics_post (post_id),
     INDEX idx_analytics_platform (platform),
+    INDEX ix_post_analytics_post_id (post_id),
+    INDEX ix_post_analytics_engagement_rate (engagement_rate),
     FOREIGN KEY (post_id) REFERENCES content_posts(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -227,7 +232,8 @@ CREATE TABLE meme_templates (
 
     INDEX idx_meme_templates_category (category),
     INDEX idx_meme_templates_status (status),
-    INDEX idx_meme_templates_viral_score (viral_score DESC)
+    INDEX idx_meme_templates_viral_score (viral_score DESC),
+    INDEX ix_meme_templates_status_created (status, created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- =============================================================================
@@ -268,6 +274,7 @@ CREATE TABLE meme_variations (
     INDEX idx_meme_variations_template (template_id),
     INDEX idx_meme_variations_status (status),
     INDEX idx_meme_variations_quality (quality_score DESC),
+    INDEX ix_meme_variations_template_created (template_id, created_at),
     FOREIGN KEY (template_id) REFERENCES meme_templates(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -44,8 +44,11 @@ CREATE TABLE news_articles (
 );
 
 CREATE INDEX idx_news_category ON news_articles(category);
-CREATE INDEX idx_news_published ON news_articles(published_at DESC);
 CREATE INDEX idx_news_is_used ON news_articles(is_used);
+-- Same names as the model indexes, so init_db() does not add duplicates
+CREATE INDEX ix_news_articles_published_at ON news_articles(published_at);
+CREATE INDEX ix_news_articles_is_used_published ON news_articles(is_used, published_at);
+CREATE INDEX ix_news_articles_created_at ON news_articles(created_at);
 
 -- =============================================================================
 -- TABLE: content_posts
@@ -77,6 +80,8 @@ CREATE TABLE content_posts (
 CREATE INDEX idx_posts_status ON content_posts(status);
 CREATE INDEX idx_posts_scheduled ON content_posts(scheduled_time);
 CREATE INDEX idx_posts_content_type ON content_posts(content_type);
+CREATE INDEX ix_content_posts_status_scheduled ON content_posts(status, scheduled_time);
+CREATE INDEX ix_content_posts_status_posted ON content_posts(status, posted_time);
 
 -- =============================================================================
 -- TABLE: post_analytics
@@ -107,8 +112,9 @@ CREATE TABLE post_analytics (
     fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_analytics_post ON post_analytics(post_id);
 CREATE INDEX idx_analytics_platform ON post_analytics(platform);
+CREATE INDEX ix_post_analytics_post_id ON post_analytics(post_id);
+CREATE INDEX ix_post_analytics_engagement_rate ON post_analytics(engagement_rate);
 
 -- =============================================================================
 -- TABLE: content_templates
@@ -223,6 +229,7 @@ CREATE TABLE meme_templates (
 CREATE INDEX idx_meme_templates_category ON meme_templates(category);
 CREATE INDEX idx_meme_templates_status ON meme_templates(status);
 CREATE INDEX idx_meme_templates_viral_score ON meme_templates(viral_score DESC);
+CREATE INDEX ix_meme_templates_status_created ON meme_templates(status, created_at);
 
 -- =============================================================================
 -- TABLE: meme_variations
@@ -263,6 +270,7 @@ CREATE TABLE meme_variations (
 CREATE INDEX idx_meme_variations_template ON meme_variations(template_id);
 CREATE INDEX idx_meme_variations_status ON meme_variations(status);
 CREATE INDEX idx_meme_variations_quality ON meme_variations(quality_score DESC);
+CREATE INDEX ix_meme_variations_template_created ON meme_variations(template_id, created_at);
 
 -- =============================================================================
 -- TRIGGERS for updated_at timestamps
@@ -9,7 +9,7 @@ Usage:
     # Create MySQL database
     python setup_database.py --db mysql --host localhost --user root --password mypass --database trollfb_db
 
-    # Migrate data from SQLite to PostgreSQL
+    # Migrate data from SQLite to PostgreSQL (re-run the same command to resume after a crash)
     python setup_database.py --migrate --from sqlite --to postgresql --host localhost --user myuser --password mypass --database trollfb_db
 """
 
@@ -143,89 +143,218 @@ def setup_mysql(host, user, password, database, port=3306):
     return conn_string
 
 
-def migrate_data(from_db, to_db, to_host, to_user, to_password, to_database, to_port=None):
-    """Migrate data from one database to another"""
-    from sqlalchemy import create_engine, MetaData, Table
-    from sqlalchemy.orm import sessionmaker
+# Target table holding each table's migration checkpoint
+MIGRATION_PROGRESS_TABLE = "migration_progress"
 
-    print(f"Migrating data from {from_db} to {to_db}...")
 
-    # Source database (SQLite)
-    if from_db == 'sqlite':
-        source_url = 'sqlite:///./football_meme.db'
-    else:
-        raise ValueError(f"Migration from {from_db} not supported yet")
+def _model_tables():
+    """Every model table, parents before children"""
+    from app.core.database import Base
+    from app.models import meme_templates, trends, content_suggestions  # noqa - register the remaining tables
 
-    # Target database
-    if to_db == 'postgresql':
-        if to_port is None:
-            to_port = 5432
-        target_url = f"postgresql://{to_user}:{to_password}@{to_host}:{to_port}/{to_database}"
-    elif to_db == 'mysql':
-        if to_port is None:
-            to_port = 3306
-        target_url = f"mysql+mysqlconnector://{to_user}:{to_password}@{to_host}:{to_port}/{to_database}"
-    else:
-        raise ValueError(f"Migration to {to_db} not supported")
+    return Base.metadata.sorted_tables
+
+
+def _progress_table():
+    from sqlalchemy import BigInteger, Boolean, Column, DateTime, MetaData, String, Table, Text
+
+    return Table(
+        MIGRATION_PROGRESS_TABLE, MetaData(),
+        Column("table_name", String(255), primary_key=True),
+        Column("last_key", Text),  # JSON primary key of the last copied row
+        Column("rows_copied", BigInteger, nullable=False),
+        Column("finished", Boolean, nullable=False),
+        Column("updated_at", DateTime)
+    )
+
+
+def _reset_sequence(conn, table, pk):
+    """Move a PostgreSQL serial past the copied ids (the rows were inserted with explicit ids)"""
+    from sqlalchemy import Integer, text
+
+    if conn.dialect.name != "postgresql" or not isinstance(pk.type, Integer):
+        return
+
+    quote = conn.dialect.identifier_preparer.quote
+    conn.execute(
+        text(f"SELECT setval(pg_get_serial_sequence(:table, :column), (SELECT max({quote(pk.name)}) FROM {quote(table.name)}))"),
+        {"table": table.name, "column": pk.name}
+    )
+
+
+def migrate_table(source_engine, target_engine, table, progress, batch_size=5000):
+    """
+    Copy one table, resuming after its checkpoint
+
+    Rows are read in primary key order through one streamed query (a
+    server-side cursor where the driver has one) and inserted a batch at a
+    time with executemany. Each batch commits together with the table's
+    checkpoint in the target, so after a crash the next run starts right
+    after the last committed row.
+
+    Returns:
+        Rows copied by this run
+    """
+    import json
+    import time
+    from datetime import datetime
+    from sqlalchemy import inspect, select
+
+    pk_columns = list(table.primary_key.columns)
+    if len(pk_columns) != 1:
+        print(f"⚠️  Table '{table.name}': no single-column primary key to resume on, skipping")
+        return 0
+    pk = pk_columns[0]
+
+    # Only columns both sides have (either may predate a model change)
+    source_columns = {column["name"] for column in inspect(source_engine).get_columns(table.name)}
+    target_columns = {column["name"] for column in inspect(target_engine).get_columns(table.name)}
+    columns = [column for column in table.columns if column.name in source_columns and column.name in target_columns]
+
+    dropped = sorted(source_columns - target_columns)
+    if dropped:
+        print(f"  ⚠️  Table '{table.name}': target has no column {', '.join(dropped)}, not copied")
+
+    with target_engine.begin() as conn:
+        state = conn.execute(select(progress).where(progress.c.table_name == table.name)).first()
+        if state is None:
+            conn.execute(progress.insert().values(table_name=table.name, rows_copied=0, finished=False))
+
+    if state is not None and state.finished:
+        print(f"  ⏭️  Table '{table.name}': already migrated ({state.rows_copied} rows)")
+        return 0
+
+    last_key = json.loads(state.last_key) if state is not None and state.last_key else None
+    copied = state.rows_copied if state is not None else 0
+    if last_key is not None:
+        print(f"  ↪️  Table '{table.name}': resuming after {pk.name}={last_key} ({copied} rows already copied)")
+
+    query = select(*columns).order_by(pk)
+    if last_key is not None:
+        query = query.where(pk > last_key)
+
+    started = time.monotonic()
+    copied_now = 0
+
+    with source_engine.connect() as source:
+        result = source.execution_options(yield_per=batch_size).execute(query)
+
+        for rows in result.partitions():
+            batch = [dict(row._mapping) for row in rows]
+            last_key = batch[-1][pk.name]
+
+            with target_engine.begin() as target:
+                target.execute(table.insert(), batch)
+                target.execute(
+                    progress.update().where(progress.c.table_name == table.name).values(
+                        last_key=json.dumps(last_key),
+                        rows_copied=copied + copied_now + len(batch),
+                        updated_at=datetime.utcnow()
+                    )
+                )
+
+            copied_now += len(batch)
+            if copied_now % (batch_size * 20) < len(batch):
+                rate = copied_now / max(time.monotonic() - started, 1e-9)
+                print(f"  … Table '{table.name}': {copied + copied_now} rows ({rate:,.0f} rows/s)")
+
+    with target_engine.begin() as target:
+        _reset_sequence(target, table, pk)
+        target.execute(
+            progress.update().where(progress.c.table_name == table.name).values(
+                finished=True,
+                updated_at=datetime.utcnow()
+            )
+        )
+
+    if not copied + copied_now:
+        print(f"  ℹ️  Table '{table.name}': 0 rows (empty)")
+        return 0
+
+    elapsed = time.monotonic() - started
+    rate = copied_now / elapsed if elapsed > 0 else 0
+    print(f"  ✅ Table '{table.name}': {copied + copied_now} rows migrated ({copied_now} in {elapsed:.1f}s, {rate:,.0f} rows/s)")
+    return copied_now
+
+
+def copy_database(source_url, target_url, batch_size=5000):
+    """
+    Copy every model table from source to target, resumably
+
+    Missing target tables are created from the models first. Progress is
+    kept in the target's migration_progress table: re-running after a crash
+    continues where the last run stopped, and finished tables are skipped.
+
+    Returns:
+        Rows copied by this run
+    """
+    import time
+    from sqlalchemy import create_engine, inspect
+    from app.core.database import Base
 
-    # Create engines
     source_engine = create_engine(source_url)
     target_engine = create_engine(target_url)
 
-    # Reflect source schema
-    source_metadata = MetaData()
-    source_metadata.reflect(bind=source_engine)
+    # Imports the app.models modules, so their tables are on Base before create_all
+    model_tables = _model_tables()
 
-    SourceSession = sessionmaker(bind=source_engine)
-    TargetSession = sessionmaker(bind=target_engine)
+    # Model tables the target schema file predates (trending_topics, content_suggestions, ...)
+    Base.metadata.create_all(bind=target_engine)
+    progress = _progress_table()
+    progress.create(bind=target_engine, checkfirst=True)
 
-    source_session = SourceSession()
-    target_session = TargetSession()
+    source_tables = set(inspect(source_engine).get_table_names())
 
-    # Tables to migrate (in order to respect foreign keys)
-    tables_order = [
-        'news_articles',
-        'content_posts',
-        'post_analytics',
-        'content_templates',
-        'affiliate_campaigns',
-        'app_settings',
-        'meme_templates',
-        'meme_variations'
-    ]
+    # The full-text search index is rebuilt from news_articles when the app starts on the target
+    derived = {name for name in source_tables if name.startswith("search_index")}
+    unknown = sorted(source_tables - derived - {table.name for table in model_tables})
+    if unknown:
+        print(f"⚠️  Not a model table, not migrated: {', '.join(unknown)}")
 
+    started = time.monotonic()
     total_rows = 0
 
-    for table_name in tables_order:
-        if table_name not in source_metadata.tables:
-            print(f"⚠️  Table '{table_name}' not found in source database, skipping")
+    for table in model_tables:
+        if table.name not in source_tables:
+            print(f"⚠️  Table '{table.name}' not found in source database, skipping")
             continue
 
-        source_table = Table(table_name, source_metadata, autoload_with=source_engine)
+        total_rows += migrate_table(source_engine, target_engine, table, progress, batch_size)
 
-        # Fetch all rows from source
-        rows = source_session.execute(source_table.select()).fetchall()
+    elapsed = time.monotonic() - started
+    rate = total_rows / elapsed if elapsed > 0 else 0
+    print(f"\n✅ Migration complete! Rows migrated: {total_rows} in {elapsed:.1f}s ({rate:,.0f} rows/s)")
 
-        if not rows:
-            print(f"  ℹ️  Table '{table_name}': 0 rows (empty)")
-            continue
+    source_engine.dispose()
+    target_engine.dispose()
+    return total_rows
 
-        # Insert into target
-        for row in rows:
-            row_dict = dict(row._mapping)
-            target_session.execute(
-                Table(table_name, MetaData(), autoload_with=target_engine).insert(),
-                row_dict
-            )
 
-        target_session.commit()
-        total_rows += len(rows)
-        print(f"  ✅ Table '{table_name}': {len(rows)} rows migrated")
+def migrate_data(from_db, to_db, to_host, to_user, to_password, to_database, to_port=None,
+                 source_path='./football_meme.db', batch_size=5000):
+    """Migrate data from one database to another"""
+    print(f"Migrating data from {from_db} to {to_db}...")
+
+    # Source database (SQLite)
+    if from_db == 'sqlite':
+        source_url = f'sqlite:///{source_path}'
+    else:
+        raise ValueError(f"Migration from {from_db} not supported yet")
+
+    # Target database
+    if to_db == 'postgresql':
+        if to_port is None:
+            to_port = 5432
+        target_url = f"postgresql://{to_user}:{to_password}@{to_host}:{to_port}/{to_database}"
+    elif to_db == 'mysql':
+        if to_port is None:
+            to_port = 3306
+        target_url = f"mysql+mysqlconnector://{to_user}:{to_password}@{to_host}:{to_port}/{to_database}"
+    else:
+        raise ValueError(f"Migration to {to_db} not supported")
 
-    source_session.close()
-    target_session.close()
+    copy_database(source_url, target_url, batch_size=batch_size)
 
-    print(f"\n✅ Migration complete! Total rows migrated: {total_rows}")
     print(f"\n📝 Update your .env file:")
     print(f"DATABASE_URL={target_url}")
 
@@ -246,6 +375,10 @@ def main():
                         help='Source database type for migration')
     parser.add_argument('--to', dest='to_db', choices=['postgresql', 'mysql'],
                         help='Target database type for migration')
+    parser.add_argument('--source', default='./football_meme.db',
+                        help='SQLite database file to migrate from (default: ./football_meme.db)')
+    parser.add_argument('--batch-size', type=int, default=5000,
+                        help='Rows read and inserted per batch when migrating (default: 5000)')
 
     args = parser.parse_args()
 
@@ -263,7 +396,9 @@ def main():
                 to_user=args.user,
                 to_password=args.password,
                 to_database=args.database,
-                to_port=args.port
+                to_port=args.port,
+                source_path=args.source,
+                batch_size=args.batch_size
             )
 
         elif args.db:
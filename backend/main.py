@@ -11,8 +11,13 @@ import uvicorn
 
 from app.core.config import settings
 from app.core.database import init_db
-from app.api import news, content, scheduler, analytics, social_media, monetization, settings as settings_api, video_meme, trends, content_suggestions, comfyui, meme_library
+from app.api import news, content, scheduler, analytics, social_media, monetization, settings as settings_api, video_meme, trends, content_suggestions, comfyui, meme_library, search
 from app.services.scheduler_service import start_scheduler, stop_scheduler
+from app.services.ingest_pipeline import feed_pipeline
+from app.services.story_dedup_service import story_deduplicator
+from app.core.http_clients import http_clients
+from app.core.db_writer import db_writer
+from app.services.comfyui_tracker import comfyui_tracker
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,6 +25,7 @@ async def lifespan(app: FastAPI):
     # Startup
     print("Starting Football Meme Super App...")
     init_db()
+    # Jobs run on this event loop
     start_scheduler()
     print("Application started successfully!")
 
@@ -28,6 +34,11 @@ async def lifespan(app: FastAPI):
     # Shutdown
     print("Shutting down...")
     stop_scheduler()
+    feed_pipeline.shutdown()
+    story_deduplicator.flush()
+    db_writer.shutdown()
+    comfyui_tracker.stop()
+    await http_clients.aclose()
     print("Application stopped successfully!")
 
 # Initialize FastAPI app
@@ -60,6 +71,7 @@ app.include_router(trends.router, prefix="/api/trends", tags=["AI Trends"])
 app.include_router(content_suggestions.router, tags=["AI Content Suggestions"])
 app.include_router(comfyui.router, tags=["ComfyUI Image Generation"])
 app.include_router(meme_library.router, tags=["Meme Library & AI Analysis"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
 
 # Mount static files for uploads (memes, images)
 import os